@@ -0,0 +1,1299 @@
+import os
+import sys
+import json
+import time
+import shutil
+import functools
+import contextlib
+
+from asar_archive import AsarArchive, PathList, pack_directory, pack_incremental, save_manifest
+from discovery import discover
+from fileops import JS_PATTERNS, iter_files, copy_files, sync_tree
+from memory_budget import MemoryBudget, MemoryLimitExceeded, WORKER_BASE, FILE_OVERHEAD, MIN_APP_MEMORY
+from toolchain import Toolchain
+from tracing import Tracer, SUBPROCESS
+
+
+def app_name(path):
+    """Name of an app's working directory: the exe name or the app folder name"""
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        return os.path.basename(path.rstrip(os.sep))
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def traced(name, category='phase'):
+    """Run an engine method inside a tracing span named name"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.trace(name, category):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class AnalyzerEngine:
+    """Discovery, extraction, analysis and packing without any UI
+
+    Progress goes through log(message, level); failures are raised or returned
+    so the caller decides how to present them. When progress is set it is
+    called as progress(files, bytes) as work completes, and may raise to
+    cancel the running operation. When cache is an ExtractionCache, archives
+    already seen are materialised from it instead of being extracted again.
+    When memory is a MemoryBudget, work is sized to fit it and stops with
+    MemoryLimitExceeded rather than outgrowing it.
+    """
+
+    def __init__(self, output_dir=None, npm_path=None, log=None):
+        self.app_path = None
+        self.exe_path = None
+        self.container_path = None
+        self.output_dir = output_dir
+        # Searched for on first use, not on every start
+        self.npm_path = npm_path
+        self.toolchain = Toolchain()
+        self.log = log or (lambda message, level='info': None)
+        self.progress = None
+        self.extracted_files = []
+        self.modified_files = set()
+        self.extract_dir = None
+        self.source_asar = None
+        # Unpacked entries of an archive that has no sidecar on disk
+        self.unpacked_paths = set()
+        self.candidates = []
+        self.cache = None
+        self.tracer = None
+        self.memory = None
+        self.node = None
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def trace(self, name, category='phase', **args):
+        """Record the enclosed work as a span when a tracer is attached
+
+        Progress reported while the outermost span is open is counted into
+        the open spans and checked against the memory budget, as well as
+        passed on.
+        """
+        if not (self.tracer or self.memory):
+            yield None
+            return
+        outermost = not self._depth
+        if outermost:
+            forward = self.progress
+            if self.memory:
+                self.memory.check()
+                self.progress = self.memory.progress(self.progress)
+            if self.tracer:
+                self.progress = self.tracer.progress(self.progress)
+        self._depth += 1
+        try:
+            if self.tracer:
+                with self.tracer.span(name, category, **args) as span:
+                    yield span
+            else:
+                yield None
+        finally:
+            self._depth -= 1
+            if outermost:
+                self.progress = forward
+
+    def run_process(self, name, *args, **kwargs):
+        """subprocess.run, traced as time spent in a child process"""
+        import subprocess
+        if self.memory and 'env' not in kwargs:
+            # Node.js tools size their heap from the machine, not the limit
+            kwargs['env'] = dict(os.environ, NODE_OPTIONS=f"--max-old-space-size={self.memory.node_heap_mb()}")
+        with self.trace(name, SUBPROCESS):
+            return subprocess.run(*args, **kwargs)
+
+    def find_npm(self):
+        """Path of npm, looked up (and cached on disk) the first time it is needed"""
+        if not self.npm_path:
+            self.npm_path = self.toolchain.find('npm')
+            if self.npm_path:
+                self.log(f"Found NPM at: {self.npm_path}")
+        return self.npm_path
+
+    def node_worker(self):
+        """The Node helper process, started on first use; None without Node"""
+        if self.node is None:
+            node_path = self.toolchain.find('node')
+            if not node_path:
+                return None
+            from node_worker import NodeWorker
+            self.node = NodeWorker.for_node(node_path, heap_mb=self.memory and self.memory.node_heap_mb())
+        return self.node
+
+    @traced('check_syntax')
+    def check_syntax(self, paths):
+        """Parse JavaScript files in the Node helper without running them
+
+        All files go through one helper process with requests pipelined.
+        Returns {path: message} for files that don't parse; empty when
+        Node isn't installed.
+        """
+        scripts = [path for path in paths if path.endswith(('.js', '.mjs', '.cjs'))]
+        if not scripts:
+            return {}
+        worker = self.node_worker()
+        if worker is None:
+            self.log("Node.js not found; skipping the syntax check", 'debug')
+            return {}
+
+        errors = {}
+        for params, result in worker.map('check', [{'path': path} for path in scripts]):
+            if isinstance(result, Exception):
+                errors[params['path']] = str(result)
+            elif not result['ok']:
+                line = result.get('line')
+                errors[params['path']] = f"line {line}: {result['error']}" if line else result['error']
+            if self.progress:
+                self.progress(1, 0)
+        for path, message in errors.items():
+            self.log(f"Syntax error in {path}: {message}", 'warning')
+        return errors
+
+    @traced('install_tools')
+    def install_tools(self):
+        """Install required npm packages; returns the tools that failed"""
+        if not self.find_npm():
+            raise Exception("NPM not found. Please install Node.js from:\n"
+                            "https://nodejs.org/en/download/\n"
+                            "and restart this application.")
+
+        tools = [
+            'electron-fiddle',
+            'asar',
+            'source-map-explorer',
+            'electron-devtools-installer',
+            'electron-debug',
+            'devtron'
+        ]
+
+        failed = []
+        for tool in tools:
+            try:
+                self.log(f"Installing {tool}...")
+                # Use full path to npm.cmd and run with shell=True
+                cmd = f'"{self.npm_path}" install -g {tool}'
+                process = self.run_process('npm install', cmd, shell=True,
+                                           capture_output=True, text=True)
+
+                if process.returncode == 0:
+                    self.log(f"Successfully installed {tool}", 'success')
+                else:
+                    self.log(f"Error installing {tool}: {process.stderr}", 'error')
+                    failed.append(tool)
+
+            except Exception as e:
+                self.log(f"Error installing {tool}: {str(e)}", 'error')
+                failed.append(tool)
+            if self.progress:
+                self.progress(1, 0)
+
+        self.log("\nAll tools installation completed.")
+        return failed
+
+    def select_app(self, path, output_dir):
+        """Select an executable, app directory or .asar and create its working directory"""
+        from containers import detect as detect_container
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            # Otherwise the search would quietly pick up whatever sits next to it
+            raise FileNotFoundError(f"No such application: {path}")
+        self.exe_path = None
+        if path.endswith('.asar') or os.path.isdir(path):
+            self.app_path = path
+        else:
+            # Get the parent directory containing the .exe
+            self.app_path = os.path.dirname(path)
+            self.exe_path = path
+        # Installer packages are read as containers, not searched around
+        self.container_path = path if os.path.isfile(path) and detect_container(path) else None
+        self.output_dir = output_dir
+        self.log(f"Selected application: {path}")
+        # Read-only inspection runs don't need a working directory
+        if output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.log(f"Working directory: {self.output_dir}")
+        return self.output_dir
+
+    def find_asar_files(self):
+        """Yield candidate ASAR archives, most likely locations first"""
+        # First check if the selected path is itself an ASAR file
+        if self.app_path.endswith('.asar'):
+            yield self.app_path
+            return
+
+        app_dir = self.app_path
+        self.log(f"Searching in application directory: {app_dir}")
+
+        # Expanded list of common locations relative to the .exe location
+        common_paths = [
+            os.path.join(app_dir, 'resources', 'app.asar'),
+            os.path.join(app_dir, 'resources', 'default_app.asar'),
+            os.path.join(app_dir, 'app.asar'),
+            os.path.join(app_dir, 'resources', 'app', 'app.asar'),
+            os.path.join(app_dir, 'Contents', 'Resources', 'app.asar'),
+            os.path.join(app_dir, 'Contents', 'Resources', 'default_app.asar'),
+            os.path.join(app_dir, 'resources', 'electron.asar'),
+            os.path.join(app_dir, 'resources', 'default_app', 'app.asar'),
+            # Add parent directory locations
+            os.path.join(os.path.dirname(app_dir), 'resources', 'app.asar'),
+            os.path.join(os.path.dirname(app_dir), 'app.asar')
+        ]
+
+        found = False
+        for asar_path in common_paths:
+            if os.path.exists(asar_path):
+                found = True
+                yield asar_path
+
+        # If no ASAR found in common locations, do a deep search: one
+        # scandir pass over app_dir, then only the parts of each parent
+        # not already covered, stopping at the first level with an archive
+        if not found:
+            self.log("No ASAR found in common locations. Performing deep search...")
+            with self.trace('discover'):
+                self.candidates = discover(app_dir)
+            for candidate in self.candidates:
+                if candidate.kind == 'asar':
+                    yield candidate.path
+                elif candidate.kind == 'asar.unpacked':
+                    self.log(f"Found unpacked sidecar: {candidate.path}", 'debug')
+
+    @traced('extract')
+    def extract_asar(self):
+        """Extract the application and return the method that worked, or None"""
+        if not self.app_path:
+            raise Exception("Please select an application first")
+
+        self.candidates = []
+        if self.container_path:
+            self.log(f"\nReading package: {self.container_path}")
+            if self.extract_container(self.container_path):
+                return 'asar'
+
+        self.log("\nSearching for ASAR files...")
+        found_asar = False
+        for asar_path in self.find_asar_files():
+            found_asar = True
+            self.log(f"\nFound ASAR: {asar_path}")
+            if self.extract_single_asar(asar_path):
+                return 'asar'
+
+        # Single-file builds carry the archive inside the executable itself
+        if not found_asar and self.exe_path:
+            for region in self.carve_executable():
+                if region.kind == 'asar':
+                    found_asar = True
+                    self.log(f"\nFound embedded ASAR at offset {region.offset} ({region.length} bytes)")
+                    if self.extract_single_asar(self.exe_path, region.offset):
+                        return 'asar'
+                elif region.kind == 'zip':
+                    # e.g. the .nupkg inside a Squirrel Setup.exe
+                    if self.extract_container(self.exe_path, region.offset, region.length):
+                        return 'asar'
+
+        # Handle unpacked resources if no ASAR found
+        app_dir = self.app_path if os.path.isdir(self.app_path) else os.path.dirname(self.app_path)
+        if not found_asar:
+            self.log("\nNo ASAR files found. Looking for unpacked resources...")
+            if self.handle_unpacked_resources(app_dir):
+                return 'resources'
+
+            self.log("\nTrying alternative extraction methods...")
+            # Try to find and extract any packed JavaScript files
+            if self.extract_packed_js(app_dir):
+                return 'js'
+
+        self.log("\nNo extractable resources found.")
+        return None
+
+    @traced('carve')
+    def carve_executable(self):
+        """Archive regions embedded in the selected executable, logging the runtime versions"""
+        from carve import scan as carve_scan
+        try:
+            found = carve_scan(self.exe_path)
+        except OSError as e:
+            self.log(f"Error scanning {self.exe_path}: {str(e)}", 'error')
+            return []
+        self.log(f"Scanned {found['size']} bytes of {os.path.basename(self.exe_path)}", 'debug')
+        for name, version in sorted(found['versions'].items()):
+            self.log(f"Detected {name} {version}", 'debug')
+        for region in found['regions']:
+            if region.kind != 'asar':
+                self.log(f"Embedded {region.kind} at offset {region.offset} ({region.length} bytes)", 'debug')
+        return found['regions']
+
+    @traced('extract_container')
+    def extract_container(self, path, offset=0, length=None):
+        """Stream app.asar out of an installer package (or one embedded at offset) and extract it"""
+        from containers import extract as extract_from_container
+        extract_dir = os.path.join(self.output_dir, 'extracted_app')
+        manifest_path = extract_dir + '.manifest.json'
+        try:
+            found = extract_from_container(path, extract_dir, offset=offset, length=length,
+                                           manifest_path=manifest_path, progress=self.progress)
+        except MemoryLimitExceeded:
+            raise
+        except Exception as e:
+            self.log(f"Error reading {path}: {str(e)}", 'error')
+            return False
+        if not found:
+            self.log(f"No app.asar in {os.path.basename(path)}", 'debug')
+            return False
+        if not found['in_place'] and os.path.exists(manifest_path):
+            # Nothing to splice from; a manifest left by an earlier run would mislead the repack
+            os.remove(manifest_path)
+        self.extract_dir = extract_dir
+        self.extracted_files = found['files']
+        self.unpacked_paths = found['unpacked_paths']
+        # The package can't be repacked in place; recompile asks where to save
+        self.source_asar = None
+        self.modified_files = set()
+        self.log(f"Extracted {len(self.extracted_files)} files from {found['member']} to: {extract_dir}")
+        return True
+
+    @traced('extract_archive')
+    def extract_single_asar(self, asar_path, offset=0):
+        """Extract a single ASAR file, or one embedded at offset in another file"""
+        try:
+            # Create unique extraction directory based on ASAR name
+            asar_name = os.path.splitext(os.path.basename(asar_path))[0] if not offset else 'embedded'
+            extract_dir = os.path.join(self.output_dir, f'extracted_{asar_name}')
+            os.makedirs(extract_dir, exist_ok=True)
+
+            # Read the archive in-process: parse the header once and copy
+            # each entry straight out of the memory-mapped file
+            with AsarArchive(asar_path, offset) as archive:
+                if self.cache:
+                    extract_dir = self.extract_cached(archive, extract_dir)
+                else:
+                    self.extracted_files = archive.extract(extract_dir,
+                                                          manifest_path=extract_dir + '.manifest.json',
+                                                          progress=self.progress)
+                self.unpacked_paths = archive.unpacked_paths() if offset else set()
+            self.extract_dir = extract_dir
+            # An embedded archive can't be replaced in place; recompile asks where to save
+            self.source_asar = asar_path if not offset else None
+
+            self.log(f"Extracted {len(self.extracted_files)} files to: {extract_dir}")
+            self.modified_files = set()
+            return True
+
+        except MemoryLimitExceeded:
+            raise
+        except Exception as e:
+            self.log(f"Error extracting {asar_path}: {str(e)}", 'error')
+            return False
+
+    def extract_cached(self, archive, extract_dir):
+        """Fill extract_dir from the cache, extracting into it first on a miss
+
+        Returns the directory the files ended up in, which is the cached
+        tree itself in 'direct' mode.
+        """
+        key = self.cache.key_for(archive)
+        entry = self.cache.lookup(key)
+        if entry:
+            self.log(f"Cache hit for {os.path.basename(archive.path)} ({key[:12]})", 'success')
+        else:
+            self.log(f"Cache miss for {os.path.basename(archive.path)}, extracting...", 'debug')
+            entry = self.cache.store(key, archive, progress=self.progress)
+
+        if self.cache.link_mode == 'direct':
+            extract_dir = self.cache.tree_path(key)
+            self.extracted_files = PathList(extract_dir, (os.path.join(extract_dir, *rel_path.split('/'))
+                                                          for rel_path in entry['files']))
+        else:
+            self.extracted_files = self.cache.materialize(key, entry, extract_dir, progress=self.progress)
+        # The cached mtimes carry over, so the cached file states still hold
+        save_manifest(extract_dir + '.manifest.json', archive.path, entry['files'], archive.offset)
+        return extract_dir
+
+    def inspect_asar(self, asar_path):
+        """Read package metadata straight from an archive without extracting it"""
+        with AsarArchive(asar_path) as archive:
+            return self.inspect_archive(archive)
+
+    @staticmethod
+    def inspect_archive(archive):
+        """Package metadata of an open AsarArchive"""
+        info = {'archive': archive.path, 'entries': sum(1 for _ in archive.iter_entries())}
+        if archive.exists('package.json'):
+            package = json.loads(archive.read('package.json'))
+            main = package.get('main', 'index.js')
+            info.update(
+                name=package.get('name'),
+                version=package.get('version'),
+                main=main,
+                main_exists=archive.exists(main),
+                dependencies=sorted(package.get('dependencies', {}))
+            )
+        return info
+
+    def inspect_app(self):
+        """Package metadata of the first readable archive, or None"""
+        from containers import open_asar as open_container_asar
+        if not self.app_path:
+            raise Exception("Please select an application first")
+
+        if self.container_path:
+            try:
+                # Opened in place when stored uncompressed, otherwise spooled to a temp file
+                with open_container_asar(self.container_path) as archive:
+                    return dict(self.inspect_archive(archive), archive=self.container_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.log(f"Error reading {self.container_path}: {str(e)}", 'error')
+
+        for asar_path in self.find_asar_files():
+            try:
+                info = self.inspect_asar(asar_path)
+                self.source_asar = asar_path
+                return info
+            except Exception as e:
+                self.log(f"Error reading {asar_path}: {str(e)}", 'error')
+        return None
+
+    @traced('sync_resources')
+    def handle_unpacked_resources(self, directory):
+        """Handle cases where no ASAR files are found"""
+        self.log("\nNo ASAR files found. Checking for unpacked resources...")
+
+        # List of common resource directories
+        resource_dirs = [
+            os.path.join(directory, 'resources'),
+            os.path.join(directory, 'Resources'),
+            os.path.join(directory, 'app'),
+            os.path.join(directory, 'resources', 'app'),
+            os.path.join(directory, 'Contents', 'Resources')
+        ]
+        # Resource directories the deep search turned up, best first
+        resource_dirs += [candidate.path for candidate in self.candidates
+                          if candidate.kind == 'resources' and candidate.path not in resource_dirs]
+
+        for res_dir in resource_dirs:
+            if os.path.exists(res_dir):
+                self.log(f"Found resources directory: {res_dir}")
+                try:
+                    dest_dir = os.path.join(self.output_dir, 'resources')
+                    # Only files that changed since the last extraction are copied
+                    report = sync_tree(res_dir, dest_dir, dest_dir + '.sync.json', progress=self.progress)
+                    for rel_path, error in report['errors']:
+                        self.log(f"Error copying {rel_path}: {error}", 'error')
+                    self.log(f"Synced resources to: {dest_dir} ({report['copied']} copied, "
+                             f"{report['skipped']} unchanged, {report['deleted']} removed, "
+                             f"{report['bytes_skipped'] / 1048576:.1f} MB skipped)")
+                    self.extracted_files = PathList(dest_dir, self.get_extracted_files(dest_dir))
+                    self.modified_files = set()
+                    self.extract_dir = dest_dir
+                    return True
+                except MemoryLimitExceeded:
+                    raise
+                except Exception as e:
+                    self.log(f"Error copying resources: {str(e)}", 'error')
+
+        self.log("No resources directory found")
+        return False
+
+    @traced('collect_js')
+    def extract_packed_js(self, directory, include=JS_PATTERNS, exclude=(), min_size=0, max_size=None, jobs=None):
+        """Copy JavaScript files out of an app directory, keeping their relative paths
+
+        Files are copied as the scan finds them; a file with the same content
+        as one already copied is skipped and listed in extracted_js.duplicates.json.
+        """
+        try:
+            extract_dir = os.path.join(self.output_dir, 'extracted_js')
+            files = iter_files(directory, include, exclude, min_size, max_size, skip=[self.output_dir])
+            summary = copy_files(files, extract_dir, jobs=jobs, progress=self.progress)
+            for rel_path, error in summary['errors']:
+                self.log(f"Error copying {rel_path}: {error}", 'error')
+
+            if not summary['copied']:
+                return False
+
+            duplicates = summary['duplicates']
+            if duplicates:
+                with open(extract_dir + '.duplicates.json', 'w', encoding='utf-8') as f:
+                    json.dump(duplicates, f, indent=2)
+                self.log(f"Skipped {len(duplicates)} files identical to one already copied", 'debug')
+            self.log(f"\nExtracted {summary['copied']} JavaScript files to: {extract_dir}")
+            self.extracted_files = PathList(extract_dir, self.get_extracted_files(extract_dir))
+            self.modified_files = set()
+            self.extract_dir = extract_dir
+            return True
+
+        except MemoryLimitExceeded:
+            raise
+        except Exception as e:
+            self.log(f"Error extracting JavaScript files: {str(e)}", 'error')
+            return False
+
+    def get_extracted_files(self, directory):
+        """Yield every file in an extracted directory, recursively"""
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                yield os.path.join(root, filename)
+
+    def search_index_path(self):
+        """Where the code search index for the working tree lives"""
+        root = self.extract_dir or self.output_dir
+        if not root:
+            raise Exception("Please extract ASAR first")
+        return root.rstrip(os.sep) + '.search.sqlite'
+
+    @traced('index')
+    def build_search_index(self, jobs=None):
+        """Index the working tree for code search; only changed files are re-read"""
+        from search_index import SearchIndex, MAX_INDEXED_SIZE
+        root = self.extract_dir or self.output_dir
+        index_path = self.search_index_path()
+        max_size = MAX_INDEXED_SIZE
+        if self.memory:
+            jobs = self.memory.workers(jobs)
+            max_size = min(max_size, self.memory.max_file_size(jobs))
+        with SearchIndex(index_path) as index:
+            summary = index.update(root, self.get_extracted_files(root), jobs=jobs, progress=self.progress,
+                                   max_size=max_size)
+        self.log(f"Search index: {summary['indexed']} files indexed, {summary['unchanged']} unchanged, "
+                 f"{summary['removed']} removed", 'debug')
+        return summary
+
+    @traced('search')
+    def search(self, query, regex=False, ignore_case=False, max_results=500):
+        """Search the working tree through its index and log each match"""
+        from search_index import SearchIndex
+        if not os.path.exists(self.search_index_path()):
+            self.build_search_index()
+        with SearchIndex(self.search_index_path()) as index:
+            matches = list(index.search(query, regex, ignore_case, max_results))
+        self.log(f"\n{len(matches)} matches for {query!r}" + (" (limit reached)" if len(matches) >= max_results else ''))
+        for match in matches:
+            self.log(f"{match['path']}:{match['line']}:{match['column']}: {match['text'].strip()}")
+        return matches
+
+    @traced('secrets')
+    def scan_secrets(self, jobs=None):
+        """Find hard-coded keys, URLs, IPC channels and update feeds in the working tree
+
+        Results are cached next to the tree by content hash, so a rescan
+        only reads changed files. Writes secrets-report.json in the working
+        directory and returns the report.
+        """
+        from secret_scan import SecretScanner
+        root = self.extract_dir or self.output_dir
+        if not root:
+            raise Exception("Please extract ASAR first")
+        if self.memory:
+            jobs = self.memory.workers(jobs)
+
+        findings = []
+        counts = {}
+        with SecretScanner(root.rstrip(os.sep) + '.secrets.sqlite') as scanner:
+            for finding in scanner.scan(self.get_extracted_files(root), jobs=jobs, progress=self.progress):
+                if finding['category'] == 'error':
+                    self.log(f"Error scanning {finding['path']}: {finding['error']}", 'error')
+                    continue
+                findings.append(finding)
+                counts[finding['rule']] = counts.get(finding['rule'], 0) + 1
+                if finding['category'] == 'secret':
+                    self.log(f"Possible {finding['rule']} in {os.path.relpath(finding['path'], root)}:"
+                             f"{finding['line']}:{finding['column']}", 'warning')
+            stats = scanner.stats
+
+        report = {'root': root, 'stats': stats, 'counts': counts, 'findings': findings}
+        report_path = os.path.join(self.output_dir or root, 'secrets-report.json')
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.log(f"\nScanned {stats['files']} files ({stats['cached']} from cache), "
+                 f"{len(findings)} findings")
+        for rule, count in sorted(counts.items(), key=lambda item: -item[1]):
+            self.log(f"  {count:>8}  {rule}")
+        self.log(f"Full report saved to: {report_path}", 'success')
+        report['report_path'] = report_path
+        return report
+
+    @traced('source_maps')
+    def analyze_source_maps(self, jobs=None):
+        """Attribute bundle bytes to original sources across all source maps
+
+        Writes the combined report to source-map-report.json in the working
+        directory and returns it.
+        """
+        from source_maps import analyze_maps, find_map_pairs
+        if not self.output_dir:
+            raise Exception("Please extract ASAR first")
+
+        # Look for .js.map files
+        pairs = find_map_pairs(self.extract_dir or self.output_dir)
+        if not pairs:
+            self.log("No source maps found")
+            return None
+        self.log(f"\nAnalyzing {len(pairs)} source maps...")
+        if self.memory:
+            # Each worker parses one whole map at a time
+            largest = max(os.path.getsize(map_path) for _, map_path in pairs)
+            jobs = self.memory.workers(jobs, WORKER_BASE + FILE_OVERHEAD * largest)
+
+        report = analyze_maps(pairs, jobs=jobs, progress=self.progress)
+        for error in report['errors']:
+            self.log(f"Error analyzing source map {error['map']}: {error['error']}", 'error')
+
+        report_path = os.path.join(self.output_dir, 'source-map-report.json')
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.log(f"Analyzed {len(report['bundles'])} bundles, {report['total_bytes']} bytes")
+        self.log("Largest sources:")
+        for name, size in list(report['sources'].items())[:10]:
+            self.log(f"  {size:>10}  {name}")
+        self.log(f"Full report saved to: {report_path}", 'success')
+        report['report_path'] = report_path
+        return report
+
+    def setup_devtools(self):
+        """Write a development config and return its path"""
+        if not self.output_dir:
+            raise Exception("Please extract ASAR first")
+
+        # Create a development config
+        dev_config = {
+            "devTools": True,
+            "openDevTools": True,
+            "devtron": True,
+            "sourceMapSupport": True
+        }
+
+        config_path = os.path.join(self.output_dir, 'dev-config.json')
+        os.makedirs(os.path.dirname(config_path), exist_ok=True)
+
+        with open(config_path, 'w') as f:
+            json.dump(dev_config, f, indent=2)
+
+        self.log("\nDevelopment configuration created:")
+        self.log(f"Config saved to: {config_path}")
+        self.log("Add these settings to your main process file to enable DevTools")
+        return config_path
+
+    def integrity_cache(self):
+        """Verification records kept in the workspace, or None without one"""
+        from asar_integrity import VerificationCache
+        if not self.output_dir:
+            return None
+        return VerificationCache(os.path.join(self.output_dir, 'integrity-cache.json'))
+
+    @traced('verify')
+    def verify_integrity(self, archive_path=None, full=False, jobs=None):
+        """Verify an archive's integrity data and log every mismatch"""
+        from asar_integrity import verify_archive, integrity_hosts
+        archive_path = archive_path or self.source_asar or next(iter(self.find_original_asars()), None)
+        if not archive_path:
+            raise Exception("No ASAR archive to verify")
+        hosts = integrity_hosts(self.exe_path or self.app_path) if self.app_path else []
+
+        self.log(f"\nVerifying integrity of: {archive_path}")
+        report = verify_archive(archive_path, jobs=jobs, full=full, cache=self.integrity_cache(),
+                                exe_path=hosts[0] if hosts else None, progress=self.progress)
+        for mismatch in report['mismatches']:
+            where = f" (block {mismatch['block']})" if 'block' in mismatch else ''
+            self.log(f"Integrity mismatch in {mismatch['path']}: {mismatch['problem']}{where}", 'error')
+        if report['no_integrity']:
+            self.log(f"{len(report['no_integrity'])} entries have no integrity data", 'warning')
+        if report.get('exe_has_header_hash') is False:
+            self.log(f"{report['exe']} does not embed this archive's header hash "
+                     "(fine unless the app enforces asar integrity)", 'warning')
+        if report['ok']:
+            self.log(f"Verified {report['files']} files ({report['skipped']} already known good)", 'success')
+        return report
+
+    @traced('update_header_hash')
+    def update_header_hash(self, old_hash, new_hash):
+        """Point the app's embedded header hash at a repacked archive"""
+        from asar_integrity import find_hash, patch_header_hash, integrity_hosts
+        if not self.app_path or old_hash == new_hash:
+            return 0
+        patched = 0
+        for host in integrity_hosts(self.exe_path or self.app_path):
+            backup_path = host + '.backup'
+            count = 0
+            try:
+                if find_hash(host, old_hash):
+                    if not os.path.exists(backup_path):
+                        shutil.copy2(host, backup_path)
+                    count = patch_header_hash(host, old_hash, new_hash)
+            except OSError as e:
+                self.log(f"Could not update header hash in {host}: {str(e)}", 'warning')
+                continue
+            if count:
+                self.log(f"Updated header hash in {host} (backup at {backup_path})", 'success')
+                patched += count
+        if not patched:
+            self.log("No embedded header hash found; the app does not enforce asar integrity", 'debug')
+        return patched
+
+    def find_original_asars(self):
+        """Existing archives a recompiled tree can replace"""
+        if self.source_asar and os.path.exists(self.source_asar):
+            return [self.source_asar]
+        app_dir = self.app_path if os.path.isdir(self.app_path) else os.path.dirname(self.app_path)
+        asar_locations = [
+            os.path.join(app_dir, 'resources', 'app.asar'),
+            os.path.join(app_dir, 'resources', 'default_app.asar'),
+            os.path.join(app_dir, 'app.asar')
+        ]
+        return [path for path in asar_locations if os.path.exists(path)]
+
+    @traced('pack')
+    def pack(self, new_asar):
+        """Pack the working tree into new_asar and return the pack summary"""
+        self.log(f"Creating new ASAR at: {new_asar}")
+        # Pack the extracted tree in-process, computing the
+        # integrity entries while the bodies are written
+        if self.extract_dir and os.path.exists(self.extract_dir + '.manifest.json'):
+            # Only edited files are re-read; the rest are spliced
+            # straight from the archive they were extracted from
+            summary = pack_incremental(self.extract_dir, new_asar,
+                                       self.extract_dir + '.manifest.json',
+                                       progress=self.progress)
+            self.modified_files = set(summary['changed'])
+            self.log(f"Packed {summary['files']} files, {len(summary['changed'])} changed, "
+                     f"{summary['reused']} reused from the original archive")
+        else:
+            # Keep the original archive's unpacked entries in the sidecar
+            unpacked_paths = set(self.unpacked_paths)
+            if self.source_asar and os.path.exists(self.source_asar):
+                with AsarArchive(self.source_asar) as archive:
+                    unpacked_paths = archive.unpacked_paths()
+            summary = pack_directory(self.extract_dir or self.output_dir, new_asar,
+                                     progress=self.progress, unpacked_paths=unpacked_paths)
+            self.log(f"Packed {summary['files']} files ({summary['bytes']} bytes)")
+        if summary['unpacked']:
+            self.log(f"Wrote {summary['unpacked']} unpacked files to {new_asar}.unpacked")
+        self.log("Successfully created new ASAR", 'success')
+        return summary
+
+    @traced('recompile')
+    def recompile(self, targets):
+        """Pack the working tree and install it over each target archive
+
+        Returns the first archive that was replaced or written.
+        """
+        from asar_integrity import header_hash
+        if not self.output_dir or not os.path.exists(self.output_dir):
+            raise Exception("No files to recompile")
+
+        self.log("\nPreparing to recompile changes...")
+        for original_asar in targets:
+            try:
+                # Create backup
+                backup_path = original_asar + '.backup'
+                if os.path.exists(original_asar):
+                    with self.trace('backup'):
+                        shutil.copy2(original_asar, backup_path)
+                    self.log(f"Created backup at: {backup_path}")
+
+                # Remember what the app trusts now, so it can be moved over
+                old_hash = None
+                verified = {}
+                cache = self.integrity_cache()
+                if os.path.exists(original_asar):
+                    with AsarArchive(original_asar) as archive:
+                        old_hash = header_hash(archive.header_string)
+                    verified = cache.verified(original_asar) if cache else {}
+
+                # Pack modified files
+                new_asar = os.path.join(self.output_dir, 'app.asar')
+                summary = self.pack(new_asar)
+                with AsarArchive(new_asar) as archive:
+                    new_hash = header_hash(archive.header_string)
+                if summary.get('changed'):
+                    # Only a warning: the edit may target a newer runtime
+                    self.check_syntax([os.path.join(self.extract_dir, *rel_path.split('/'))
+                                       for rel_path in summary['changed']])
+
+                if not os.path.exists(original_asar):
+                    # Saving to a new location needs no replacement dance
+                    os.replace(new_asar, original_asar)
+                    self.replace_sidecar(new_asar, original_asar)
+                    self.log(f"Saved new ASAR to: {original_asar}")
+                    return original_asar
+
+                # Try to replace original ASAR with elevated privileges
+                if self.replace_asar(new_asar, original_asar):
+                    self.replace_sidecar(new_asar, original_asar)
+                    self.log("Successfully replaced original ASAR", 'success')
+                    self.update_header_hash(old_hash, new_hash)
+                    if cache and 'manifest_files' in summary:
+                        # Spliced bodies are byte-for-byte the verified originals
+                        changed = set(summary['changed'])
+                        cache.record(original_asar, {
+                            rel_path: info['integrity']['hash']
+                            for rel_path, info in summary['manifest_files'].items()
+                            if rel_path not in changed and not info.get('unpacked')
+                            and verified.get(rel_path) == info['integrity']['hash']
+                        })
+                        cache.save()
+                    if 'manifest_files' in summary:
+                        # The next repack splices from the archive just written
+                        save_manifest(self.extract_dir + '.manifest.json',
+                                      original_asar, summary['manifest_files'])
+                    return original_asar
+
+            except MemoryLimitExceeded:
+                raise
+            except Exception as e:
+                self.log(f"Error processing {original_asar}: {str(e)}", 'error')
+
+        raise Exception("Failed to replace any ASAR files")
+
+    @traced('replace')
+    def replace_asar(self, new_asar, original_asar):
+        """Try multiple methods to replace the original ASAR file"""
+        methods = [
+            # Method 1: Direct replacement
+            lambda: os.replace(new_asar, original_asar),
+
+            # Method 2: Take ownership and set permissions
+            lambda: self.take_ownership_and_replace(new_asar, original_asar),
+
+            # Method 3: PowerShell elevated copy
+            lambda: self.run_process(
+                'powershell copy',
+                f'powershell Start-Process cmd -Verb RunAs -ArgumentList "/c copy /Y \\"{new_asar}\\" \\"{original_asar}\\""',
+                shell=True
+            )
+        ]
+
+        for method in methods:
+            try:
+                method()
+                if os.path.exists(original_asar):
+                    return True
+            except Exception as e:
+                self.log(f"Replacement method failed: {str(e)}", 'warning')
+                continue
+
+        return False
+
+    @traced('replace_sidecar')
+    def replace_sidecar(self, new_asar, original_asar):
+        """Install the unpacked directory written next to new_asar
+
+        The previous sidecar is kept as a backup, like the archive itself.
+        """
+        new_sidecar = new_asar + '.unpacked'
+        old_sidecar = original_asar + '.unpacked'
+        if not os.path.isdir(new_sidecar):
+            return
+        if os.path.isdir(old_sidecar):
+            backup_path = old_sidecar + '.backup'
+            if os.path.isdir(backup_path):
+                shutil.rmtree(backup_path)
+            os.rename(old_sidecar, backup_path)
+            self.log(f"Moved previous unpacked files to: {backup_path}")
+        # May cross drives, so move rather than rename
+        shutil.move(new_sidecar, old_sidecar)
+        self.log(f"Installed unpacked files at: {old_sidecar}")
+
+    def take_ownership_and_replace(self, new_asar, original_asar):
+        """Take ownership of file and replace it"""
+        self.run_process('takeown', ['takeown', '/F', original_asar], shell=True, check=True)
+        self.run_process('icacls', ['icacls', original_asar, '/grant', 'administrators:F'], shell=True, check=True)
+        os.replace(new_asar, original_asar)
+
+
+def process_app(target, workspace, options):
+    """Extract (and optionally analyze) one app; returns a JSON-ready result
+
+    Runs in a worker process, so everything it needs comes in as arguments
+    and the log lines travel back in the result.
+    """
+    from extract_cache import ExtractionCache, DEFAULT_BUDGET
+    messages = []
+    engine = AnalyzerEngine(log=lambda message, level='info': messages.append(message))
+    if options.get('cache_dir'):
+        engine.cache = ExtractionCache(options['cache_dir'], options.get('cache_budget', DEFAULT_BUDGET),
+                                       options.get('link_mode', 'auto'))
+    if options.get('trace'):
+        engine.tracer = Tracer()
+    if options.get('memory_limit'):
+        engine.memory = MemoryBudget(options['memory_limit'])
+    result = {'target': target, 'status': 'error', 'extract_dir': None, 'files': 0}
+    start = time.perf_counter()
+    try:
+        if options.get('inspect_only'):
+            engine.select_app(target, None)
+            info = engine.inspect_app()
+            result.update(status='inspected' if info else 'not_found', package=info,
+                          source_asar=engine.source_asar)
+        else:
+            engine.select_app(target, workspace)
+            method = engine.extract_asar()
+            result.update(
+                status=method or 'not_found',
+                extract_dir=engine.extract_dir,
+                source_asar=engine.source_asar,
+                files=len(engine.extracted_files)
+            )
+            if method and options.get('index'):
+                engine.build_search_index(jobs=1)
+                result['search_index'] = engine.search_index_path()
+            if method and options.get('source_maps'):
+                # Already inside a pool worker, so analyze this app's maps serially
+                report = engine.analyze_source_maps(jobs=1)
+                result['source_maps'] = report and report['report_path']
+            if method and options.get('secrets'):
+                result['secrets'] = engine.scan_secrets(jobs=1)['report_path']
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed'] = round(time.perf_counter() - start, 3)
+    if options.get('verbose'):
+        result['log'] = messages
+    if engine.tracer:
+        result['trace'] = engine.tracer.events
+    return result
+
+
+def resolve_archive(target):
+    """The archive for a target: itself if it is one, else the best one found for the app"""
+    engine = AnalyzerEngine()
+    engine.select_app(target, None)
+    archive = next(engine.find_asar_files(), None)
+    if not archive:
+        raise Exception(f"No ASAR archive found for {target}")
+    return archive
+
+
+def workspace_names(targets, output_root):
+    """Give every target its own workspace, even when app names collide"""
+    used = {}
+    workspaces = []
+    for target in targets:
+        name = app_name(target)
+        count = used.get(name.lower(), 0) + 1
+        used[name.lower()] = count
+        if count > 1:
+            name = f"{name}_{count}"
+        workspaces.append(os.path.join(output_root, name))
+    return workspaces
+
+
+def run_batch(targets, output_root, jobs=None, options=None):
+    """Process targets across a pool of worker processes
+
+    Yields one result dict per app as soon as it finishes.
+    """
+    options = options or {}
+    workspaces = workspace_names(targets, output_root)
+    if options.get('memory_limit') and jobs != 1 and len(targets) > 1:
+        # Fewer workers rather than workers too small to hold an archive header
+        budget = MemoryBudget(options['memory_limit'])
+        jobs = budget.workers(jobs, MIN_APP_MEMORY)
+        options = dict(options, memory_limit=budget.share(jobs))
+    if jobs == 1 or len(targets) <= 1:
+        for target, workspace in zip(targets, workspaces):
+            yield process_app(target, workspace, options)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(process_app, target, workspace, options)
+                   for target, workspace in zip(targets, workspaces)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def build_parser():
+    """Command-line interface for headless runs"""
+    from extract_cache import DEFAULT_BUDGET, LINK_MODES
+    from secret_scan import RULES as SECRET_RULES
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='electron-decompiler',
+        description="Extract, analyze and repack Electron applications without the GUI"
+    )
+    parser.add_argument('--trace', help="Write a Chrome trace-event JSON of the run here")
+    parser.add_argument('--metrics', help="Write per-phase time, CPU, I/O and file counts as JSON here")
+    parser.add_argument('--memory-limit', type=int, metavar='MB',
+                        help="Keep memory under this many MB: smaller worker pools, and a clean "
+                             "failure instead of an OOM kill if it is reached anyway")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    extract = commands.add_parser('extract', help="Extract one or more apps, one JSON result per line")
+    extract.add_argument('targets', nargs='+', help="Executables, app directories or .asar files")
+    extract.add_argument('-o', '--output', default=os.getcwd(), help="Directory for the per-app workspaces")
+    extract.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Apps to process in parallel")
+    extract.add_argument('--source-maps', action='store_true', help="Also analyze source maps")
+    extract.add_argument('-v', '--verbose', action='store_true', help="Include log lines in each result")
+    extract.add_argument('--index', action='store_true', help="Also build the code search index")
+    extract.add_argument('--secrets', action='store_true', help="Also scan for secrets, URLs and IPC channels")
+    extract.add_argument('--cache-dir', help="Reuse extractions of archives seen before from this cache")
+    extract.add_argument('--cache-budget', type=int, default=DEFAULT_BUDGET // (1024 * 1024),
+                         help="Cache size limit in MB; least recently used trees are evicted")
+    extract.add_argument('--link-mode', choices=LINK_MODES, default='auto',
+                         help="How cached trees reach the workspace ('direct' uses the cache in place)")
+
+    cache = commands.add_parser('cache-stats', help="Show extraction cache hits, misses and bytes saved")
+    cache.add_argument('cache_dir', help="Cache directory")
+
+    inspect = commands.add_parser('inspect', help="Read package.json of one or more apps without extracting")
+    inspect.add_argument('targets', nargs='+', help="Executables, app directories or .asar files")
+    inspect.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Apps to process in parallel")
+
+    ls = commands.add_parser('ls', help="List a directory inside an archive")
+    ls.add_argument('archive', help="ASAR archive")
+    ls.add_argument('path', nargs='?', default='', help="Directory inside the archive")
+
+    find = commands.add_parser('discover', help="List archive and resource candidates around an app, best first")
+    find.add_argument('target', help="Executable or app directory")
+    find.add_argument('--depth', type=int, default=4, help="Directory levels to descend below each root")
+    find.add_argument('--parents', type=int, default=2, help="Parent directories to widen the search to")
+    find.add_argument('--all', action='store_true', help="Keep searching parents after an archive is found")
+
+    cat = commands.add_parser('cat', help="Write one archive entry to stdout")
+    cat.add_argument('archive', help="ASAR archive")
+    cat.add_argument('path', help="File inside the archive")
+
+    pack = commands.add_parser('pack', help="Pack a directory into an ASAR archive")
+    pack.add_argument('source', help="Directory to pack")
+    pack.add_argument('dest', help="Archive to write")
+    pack.add_argument('--manifest', help="Extraction manifest for an incremental repack")
+    pack.add_argument('--unpack', action='append', default=[],
+                      help="Glob of files to keep outside the archive, e.g. '*.node' (repeatable)")
+
+    verify = commands.add_parser('verify', help="Check an archive's integrity hashes, exit 1 on any mismatch")
+    verify.add_argument('archive', help="ASAR archive")
+    verify.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Threads hashing in parallel")
+    verify.add_argument('--full', action='store_true', help="Also check whole-file hashes of large files")
+    verify.add_argument('--exe', help="Executable or Info.plist that should embed the header hash")
+    verify.add_argument('--cache', help="File recording verified entries, to skip them next time")
+
+    rehash = commands.add_parser('update-hash', help="Replace an archive's header hash embedded in an executable")
+    rehash.add_argument('exe', help="Executable or Info.plist to patch in place")
+    rehash.add_argument('old_archive', help="Archive the executable currently trusts (e.g. the .backup)")
+    rehash.add_argument('new_archive', help="Repacked archive")
+
+    compare = commands.add_parser('diff', help="Compare two archives or app versions by header")
+    compare.add_argument('old', help="Old archive, executable or app directory")
+    compare.add_argument('new', help="New archive, executable or app directory")
+    compare.add_argument('-p', '--patch', action='store_true', help="Print unified diffs of changed text files")
+    compare.add_argument('-U', '--context', type=int, default=3, help="Context lines in unified diffs")
+
+    grep = commands.add_parser('search', help="Search an extracted tree through its trigram index")
+    grep.add_argument('root', help="Extracted directory; its index is kept next to it")
+    grep.add_argument('query', help="Substring, or a regular expression with --regex")
+    grep.add_argument('-e', '--regex', action='store_true', help="Treat the query as a regular expression")
+    grep.add_argument('-i', '--ignore-case', action='store_true', help="Ignore ASCII case")
+    grep.add_argument('-m', '--max', type=int, default=1000, help="Stop after this many matches")
+    grep.add_argument('--no-update', action='store_true', help="Search the index as it is, without refreshing it")
+
+    secrets = commands.add_parser('secrets', help="Scan files for secrets, URLs, IPC channels and update "
+                                                  "feeds, one JSON finding per line; exit 1 on any secret")
+    secrets.add_argument('root', help="Extracted directory or a single file")
+    secrets.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="Worker processes")
+    secrets.add_argument('--cache', help="Results cache (default: next to the directory)")
+    secrets.add_argument('--category', action='append', choices=sorted({rule.category for rule in SECRET_RULES}),
+                         help="Only report these categories (repeatable)")
+
+    carve = commands.add_parser('carve', help="Find archives and runtime versions inside an executable")
+    carve.add_argument('path', help="Executable or any other file to scan")
+
+    syntax = commands.add_parser('check-syntax', help="Parse JavaScript files in one Node process, exit 1 on errors")
+    syntax.add_argument('paths', nargs='+', help="Files, or directories to check every script in")
+    syntax.add_argument('--stub', action='store_true', help="Use the Python stub worker instead of Node")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for the command-line interface"""
+    args = build_parser().parse_args(argv)
+    tracer = Tracer() if args.trace or args.metrics else None
+    try:
+        if not tracer:
+            return run_command(args)
+        with tracer.span('run', 'command', command=args.command):
+            return run_command(args, tracer)
+    except MemoryLimitExceeded as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    finally:
+        if tracer:
+            tracer.save(args.trace, args.metrics)
+
+
+def run_command(args, tracer=None):
+    """Run one parsed command and return its exit status"""
+    progress = tracer.progress() if tracer else None
+    memory_limit = args.memory_limit and args.memory_limit * 1024 * 1024
+    if memory_limit:
+        progress = MemoryBudget(memory_limit).progress(progress)
+
+    if args.command in ('extract', 'inspect'):
+        if args.command == 'inspect':
+            options = {'inspect_only': True}
+        else:
+            options = {
+                'source_maps': args.source_maps,
+                'index': args.index,
+                'secrets': args.secrets,
+                'verbose': args.verbose,
+                'cache_dir': args.cache_dir and os.path.abspath(args.cache_dir),
+                'cache_budget': args.cache_budget * 1024 * 1024,
+                'link_mode': args.link_mode
+            }
+        options['trace'] = bool(tracer)
+        options['memory_limit'] = memory_limit
+        failed = 0
+        output = getattr(args, 'output', os.getcwd())
+        for result in run_batch(args.targets, output, args.jobs, options):
+            if tracer:
+                # Worker processes trace themselves; gather their spans here
+                tracer.merge(result.pop('trace', []))
+            if result['status'] in ('error', 'not_found'):
+                failed += 1
+            print(json.dumps(result), flush=True)
+        return 1 if failed else 0
+
+    if args.command == 'cache-stats':
+        from extract_cache import ExtractionCache
+        print(json.dumps(ExtractionCache(args.cache_dir).stats()))
+        return 0
+
+    if args.command == 'verify':
+        from asar_integrity import VerificationCache, verify_archive
+        cache = VerificationCache(args.cache) if args.cache else None
+        report = verify_archive(args.archive, jobs=args.jobs, full=args.full, cache=cache, exe_path=args.exe,
+                                progress=progress)
+        print(json.dumps(report))
+        return 0 if report['ok'] and report.get('exe_has_header_hash', True) else 1
+
+    if args.command == 'update-hash':
+        from asar_integrity import header_hash, patch_header_hash
+        with AsarArchive(args.old_archive) as old, AsarArchive(args.new_archive) as new:
+            old_hash, new_hash = header_hash(old.header_string), header_hash(new.header_string)
+        count = patch_header_hash(args.exe, old_hash, new_hash)
+        print(json.dumps({'exe': args.exe, 'old_hash': old_hash, 'new_hash': new_hash, 'replaced': count}))
+        return 0 if count or old_hash == new_hash else 1
+
+    if args.command == 'diff':
+        from asar_diff import iter_diff
+        counts = {'added': 0, 'removed': 0, 'changed': 0}
+        with AsarArchive(resolve_archive(args.old)) as old, AsarArchive(resolve_archive(args.new)) as new:
+            for change in iter_diff(old, new, text=args.patch, context=args.context):
+                counts[change['status']] += 1
+                if not args.patch:
+                    print(json.dumps(change))
+                    continue
+                marker = {'added': 'A', 'removed': 'D', 'changed': 'M'}[change['status']]
+                reason = f" ({change['reason']})" if 'reason' in change and 'diff' not in change else ''
+                print(f"{marker} {change['path']}{reason}")
+                sys.stdout.writelines(change.get('diff', []))
+        if not args.patch:
+            print(json.dumps(counts))
+        return 1 if any(counts.values()) else 0
+
+    if args.command == 'search':
+        from search_index import SearchIndex
+        root = os.path.abspath(args.root)
+        with SearchIndex(root + '.search.sqlite') as index:
+            if not args.no_update or index.root is None:
+                engine = AnalyzerEngine()
+                index.update(root, engine.get_extracted_files(root))
+            for match in index.search(args.query, args.regex, args.ignore_case, args.max):
+                print(json.dumps(match))
+        return 0
+
+    if args.command == 'secrets':
+        from secret_scan import SecretScanner
+        root = os.path.abspath(args.root)
+        if os.path.isdir(root):
+            paths = AnalyzerEngine().get_extracted_files(root)
+            cache_path = args.cache or root + '.secrets.sqlite'
+        else:
+            paths = [root]
+            cache_path = args.cache
+        jobs = args.jobs
+        if memory_limit:
+            jobs = MemoryBudget(memory_limit).workers(jobs)
+        # Filtered here rather than by rule, so the cached results stay valid
+        categories = set(args.category or ()) | {'error'}
+        with SecretScanner(cache_path) as scanner:
+            secrets_found = 0
+            for finding in scanner.scan(paths, jobs=jobs, progress=progress):
+                secrets_found += finding['category'] == 'secret'
+                if not args.category or finding['category'] in categories:
+                    print(json.dumps(finding))
+            print(json.dumps({'summary': scanner.stats}))
+        return 1 if secrets_found else 0
+
+    if args.command == 'carve':
+        from carve import scan as carve_scan
+        found = carve_scan(args.path)
+        found['regions'] = [region._asdict() for region in found['regions']]
+        print(json.dumps(found))
+        return 0
+
+    if args.command == 'check-syntax':
+        engine = AnalyzerEngine(log=lambda message, level='info': sys.stderr.write(message + '\n'))
+        if args.stub:
+            from node_worker import NodeWorker
+            engine.node = NodeWorker.stub()
+        paths = []
+        for path in args.paths:
+            if os.path.isdir(path):
+                paths.extend(found for found, _, _ in iter_files(path, JS_PATTERNS))
+            else:
+                paths.append(path)
+        try:
+            errors = engine.check_syntax(paths)
+        finally:
+            if engine.node:
+                engine.node.close()
+        for path, message in sorted(errors.items()):
+            print(json.dumps({'path': path, 'error': message}))
+        return 1 if errors else 0
+
+    if args.command == 'ls':
+        with AsarArchive(args.archive) as archive:
+            for name in archive.listdir(args.path):
+                st = archive.stat(AsarArchive.normalize(f"{args.path}/{name}"), follow_links=False)
+                kind = 'd' if st.is_dir else 'l' if st.is_link else 'u' if st.unpacked else '-'
+                print(f"{kind} {st.size:>12} {name}")
+        return 0
+
+    if args.command == 'discover':
+        target = os.path.abspath(args.target)
+        app_dir = target if os.path.isdir(target) else os.path.dirname(target)
+        for candidate in discover(app_dir, args.depth, args.parents, stop_at_first_asar=not args.all):
+            print(json.dumps(candidate._asdict()))
+        return 0
+
+    if args.command == 'cat':
+        with AsarArchive(args.archive) as archive, archive.open(args.path) as f:
+            shutil.copyfileobj(f, sys.stdout.buffer)
+        return 0
+
+    if args.command == 'pack':
+        if args.manifest:
+            summary = pack_incremental(args.source, args.dest, args.manifest, unpack=args.unpack,
+                                       progress=progress)
+            summary.pop('manifest_files')
+        else:
+            summary = pack_directory(args.source, args.dest, unpack=args.unpack, progress=progress)
+        print(json.dumps(summary))
+        return 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,823 @@
+import io
+import os
+import json
+import mmap
+import fnmatch
+import posixpath
+import shutil
+import errno
+import struct
+import hashlib
+from array import array
+from collections import namedtuple
+
+# Size of the slices copied from the mapped archive into output files
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Fixed buffer used to stream file bodies into a new archive
+PACK_BUFFER_SIZE = 1024 * 1024
+
+# Electron hashes archive entries in 4 MiB blocks
+INTEGRITY_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class AsarError(Exception):
+    """Raised when an archive is malformed or an entry can't be resolved"""
+
+
+def read_header(f):
+    """Read the Pickle-framed JSON header from an open archive file
+
+    Returns (header, header_size, header_string) where header_size is the
+    size of the header pickle, so file data starts at 8 + header_size.
+    """
+    size_pickle = f.read(8)
+    if len(size_pickle) != 8:
+        raise AsarError("File is too small to be an ASAR archive")
+    payload_size, header_size = struct.unpack('<II', size_pickle)
+    if payload_size != 4:
+        raise AsarError("Invalid ASAR size pickle")
+
+    header_pickle = f.read(header_size)
+    if len(header_pickle) != header_size or header_size < 8:
+        raise AsarError("Truncated ASAR header")
+    _, string_size = struct.unpack_from('<II', header_pickle)
+    if 8 + string_size > header_size:
+        raise AsarError("Invalid ASAR header string size")
+
+    header_string = header_pickle[8:8 + string_size].decode('utf-8')
+    try:
+        header = json.loads(header_string)
+    except ValueError as e:
+        raise AsarError(f"Invalid ASAR header JSON: {str(e)}")
+    if not isinstance(header, dict) or 'files' not in header:
+        raise AsarError("ASAR header has no file table")
+    return header, header_size, header_string
+
+
+def encode_header(header):
+    """Serialize a header the way asar does and return (bytes, header_string)"""
+    header_string = json.dumps(header, separators=(',', ':'), ensure_ascii=False)
+    data = header_string.encode('utf-8')
+    padding = (-len(data)) % 4
+    header_pickle = struct.pack('<II', 4 + len(data) + padding, len(data)) + data + b'\0' * padding
+    return struct.pack('<II', 4, len(header_pickle)) + header_pickle, header_string
+
+
+def safe_join(root, rel_path):
+    """Join an archive path onto root, refusing anything that escapes it"""
+    parts = rel_path.replace('\\', '/').split('/')
+    if any(part in ('', '.', '..') for part in parts) or ':' in parts[0]:
+        raise AsarError(f"Unsafe path in archive: {rel_path}")
+    return os.path.join(root, *parts)
+
+
+class PathList:
+    """Compact, append-only list of file paths under one root
+
+    Paths are kept relative to root as UTF-8 in one bytearray, with an
+    array of end offsets: a few bytes of overhead per path instead of a
+    str object and a list slot each, which matters at hundreds of
+    thousands of entries. Indexing and iteration give full paths back.
+    """
+
+    __slots__ = ('root', '_prefix', '_data', '_ends')
+
+    def __init__(self, root, paths=()):
+        self.root = root
+        self._prefix = os.path.join(root, '')
+        self._data = bytearray()
+        self._ends = array('Q')
+        self.extend(paths)
+
+    def append(self, path):
+        """Add a path under root (or any other path, which is kept whole)"""
+        if path.startswith(self._prefix):
+            path = path[len(self._prefix):]
+        self._data += path.encode('utf-8', 'surrogateescape')
+        self._ends.append(len(self._data))
+
+    def extend(self, paths):
+        for path in paths:
+            self.append(path)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._ends)
+        if not 0 <= index < len(self._ends):
+            raise IndexError("PathList index out of range")
+        start = self._ends[index - 1] if index else 0
+        # join keeps a path that was stored whole as it is
+        return os.path.join(self.root, self._data[start:self._ends[index]].decode('utf-8', 'surrogateescape'))
+
+    def __iter__(self):
+        root, data, start = self.root, self._data, 0
+        for end in self._ends:
+            yield os.path.join(root, data[start:end].decode('utf-8', 'surrogateescape'))
+            start = end
+
+
+# What AsarArchive.stat reports about an entry
+AsarStat = namedtuple('AsarStat', 'size offset is_dir is_link executable unpacked')
+
+# Links are followed at most this many times before giving up
+MAX_LINK_DEPTH = 32
+
+
+class AsarEntryFile(io.RawIOBase):
+    """Seekable read-only stream over one entry's slice of the archive map"""
+
+    def __init__(self, buffer, start, size):
+        super().__init__()
+        self._buffer = buffer
+        self._start = start
+        self._size = size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        count = max(0, min(len(b), self._size - self._pos))
+        if count:
+            start = self._start + self._pos
+            with memoryview(self._buffer) as view:
+                b[:count] = view[start:start + count]
+            self._pos += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._pos = offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class AsarArchive:
+    """Read-only view of an ASAR archive backed by a memory map
+
+    offset is where the archive starts inside path, for archives embedded
+    in an executable or another file (see carve.py).
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self._file = open(path, 'rb')
+        try:
+            self._file.seek(offset)
+            self.header, self.header_size, self.header_string = read_header(self._file)
+            self.data_offset = offset + 8 + self.header_size
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self):
+        """Release the memory map and file handle"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def unpacked_dir(self):
+        """Directory holding bodies of entries flagged as unpacked"""
+        return self.path + '.unpacked'
+
+    def iter_entries(self, node=None, prefix=''):
+        """Yield (path, node) for every entry, parents before children"""
+        if node is None:
+            node = self.header
+        for name, child in node.get('files', {}).items():
+            rel_path = f"{prefix}/{name}" if prefix else name
+            yield rel_path, child
+            if 'files' in child:
+                yield from self.iter_entries(child, rel_path)
+
+    def unpacked_paths(self):
+        """Paths of the file entries whose bodies live in the sidecar"""
+        return {rel_path for rel_path, node in self.iter_entries()
+                if node.get('unpacked') and 'files' not in node and 'link' not in node}
+
+    def entry_range(self, node):
+        """Absolute (start, size) of a packed file entry inside the archive"""
+        size = int(node.get('size', 0))
+        start = self.data_offset + int(node.get('offset', 0))
+        if start + size > len(self._map):
+            raise AsarError("Entry extends past the end of the archive")
+        return start, size
+
+    @staticmethod
+    def normalize(path):
+        """Archive-relative form of a path: forward slashes, no leading './' or '/'"""
+        return posixpath.normpath('/' + path.replace('\\', '/')).lstrip('/')
+
+    def _lookup(self, path, follow_links=True, depth=0):
+        """Find the header node for an archive path like 'dist/main.js'"""
+        path = self.normalize(path)
+        node = self.header
+        walked = []
+        for part in path.split('/') if path else []:
+            children = node.get('files')
+            if children is None or part not in children:
+                raise FileNotFoundError(f"No such entry in archive: {path}")
+            node = children[part]
+            walked.append(part)
+            is_last = len(walked) == len(path.split('/'))
+            if 'link' in node and (follow_links or not is_last):
+                if depth >= MAX_LINK_DEPTH:
+                    raise AsarError(f"Too many levels of links: {path}")
+                node = self._lookup(node['link'], True, depth + 1)
+        return node
+
+    def exists(self, path):
+        """Whether path names an entry in the archive"""
+        try:
+            self._lookup(path)
+            return True
+        except (FileNotFoundError, AsarError):
+            return False
+
+    def listdir(self, path=''):
+        """Names of the entries in an archive directory"""
+        node = self._lookup(path)
+        if 'files' not in node:
+            raise NotADirectoryError(f"Not a directory in archive: {path}")
+        return list(node['files'])
+
+    def stat(self, path, follow_links=True):
+        """Size, location and flags of an entry, without reading it"""
+        node = self._lookup(path, follow_links)
+        is_dir = 'files' in node
+        is_link = 'link' in node
+        unpacked = bool(node.get('unpacked'))
+        offset = None
+        if not (is_dir or is_link or unpacked):
+            offset = self.data_offset + int(node.get('offset', 0))
+        return AsarStat(
+            size=int(node.get('size', 0)),
+            offset=offset,
+            is_dir=is_dir,
+            is_link=is_link,
+            executable=bool(node.get('executable')),
+            unpacked=unpacked
+        )
+
+    def open(self, path, mode='rb', encoding='utf-8'):
+        """Open an entry for reading; only the bytes actually read are touched"""
+        if mode not in ('r', 'rb'):
+            raise ValueError("Archive entries are read-only")
+        node = self._lookup(path)
+        if 'files' in node:
+            raise IsADirectoryError(f"Is a directory in archive: {path}")
+        if node.get('unpacked'):
+            raw = open(safe_join(self.unpacked_dir, self.normalize(path)), 'rb', buffering=0)
+        else:
+            start, size = self.entry_range(node)
+            raw = AsarEntryFile(self._map, start, size)
+        stream = io.BufferedReader(raw)
+        if mode == 'r':
+            return io.TextIOWrapper(stream, encoding=encoding)
+        return stream
+
+    def read(self, path, offset=0, size=-1):
+        """Read an entry (or a slice of it) straight from the mapped archive"""
+        node = self._lookup(path)
+        if 'files' in node or node.get('unpacked'):
+            with self.open(path) as f:
+                f.seek(offset)
+                return f.read(size)
+        start, length = self.entry_range(node)
+        end = start + length
+        start = min(start + offset, end)
+        if size >= 0:
+            end = min(end, start + size)
+        return self._map[start:end]
+
+    def extract(self, dest_dir, manifest_path=None, progress=None, store=None):
+        """Extract every entry into dest_dir and return the written file paths as a PathList
+
+        When manifest_path is given, a content manifest is saved there so a
+        later pack_incremental can splice unchanged entries from this archive.
+        progress(files, bytes) is called after each file is written. With a
+        ContentStore, file bodies go into the store (only if new) and are
+        hardlinked into dest_dir.
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        view = memoryview(self._map)
+        written = PathList(dest_dir)
+        manifest_files = {}
+        try:
+            for rel_path, node in self.iter_entries():
+                target = safe_join(dest_dir, rel_path)
+                if 'files' in node:
+                    os.makedirs(target, exist_ok=True)
+                elif 'link' in node:
+                    self._extract_link(dest_dir, target, node['link'])
+                elif node.get('unpacked'):
+                    # The body lives in the sidecar; copy it kernel-side
+                    source = safe_join(self.unpacked_dir, rel_path)
+                    if os.path.exists(source):
+                        if store:
+                            store.link(store.add_file(source, node.get('executable')), target)
+                        else:
+                            copy_file(source, target)
+                            if node.get('executable') and os.name != 'nt':
+                                os.chmod(target, 0o755)
+                        written.append(target)
+                        st = os.stat(target)
+                        if manifest_path:
+                            manifest_files[rel_path] = {
+                                'size': st.st_size,
+                                'mtime_ns': st.st_mtime_ns,
+                                'offset': 0,
+                                'integrity': node.get('integrity') or file_integrity(target),
+                                'unpacked': True
+                            }
+                        if progress:
+                            progress(1, st.st_size)
+                else:
+                    start, size = self.entry_range(node)
+                    # Hash on the way out only when the header has no integrity
+                    hasher = None
+                    if manifest_path and 'integrity' not in node:
+                        hasher = IntegrityHasher()
+                    if store:
+                        body = view[start:start + size]
+                        if hasher:
+                            hasher.update(body)
+                        digest = hasher.result()['hash'] if hasher else None
+                        digest = store.add_buffer(body, digest, node.get('executable'))
+                        body.release()
+                        store.link(digest, target)
+                    else:
+                        with open(target, 'wb') as out:
+                            for pos in range(start, start + size, COPY_CHUNK_SIZE):
+                                chunk = view[pos:min(pos + COPY_CHUNK_SIZE, start + size)]
+                                if hasher:
+                                    hasher.update(chunk)
+                                out.write(chunk)
+                        if node.get('executable') and os.name != 'nt':
+                            os.chmod(target, 0o755)
+                    written.append(target)
+                    if manifest_path:
+                        manifest_files[rel_path] = {
+                            'size': size,
+                            'mtime_ns': os.stat(target).st_mtime_ns,
+                            'offset': int(node.get('offset', 0)),
+                            'integrity': hasher.result() if hasher else node['integrity']
+                        }
+                    if progress:
+                        progress(1, size)
+        finally:
+            view.release()
+        if manifest_path:
+            save_manifest(manifest_path, self.path, manifest_files, self.offset)
+        return written
+
+    @staticmethod
+    def _extract_link(dest_dir, target, link):
+        """Recreate a symlink entry; link targets are relative to the archive root"""
+        link_target = safe_join(dest_dir, link)
+        if os.path.lexists(target):
+            os.remove(target)
+        try:
+            os.symlink(os.path.relpath(link_target, os.path.dirname(target)), target)
+        except OSError:
+            # Creating symlinks needs extra privileges on Windows
+            pass
+
+
+def extract_stream(f, dest_dir, progress=None):
+    """Extract an archive read front to back from a stream; returns the written paths as a PathList
+
+    For archives inside compressed containers, where seeking means
+    decompressing again. Bodies are copied in offset order through one
+    fixed buffer and gaps between them are read past, so memory use stays
+    flat however large the archive is. Unpacked entries have no body in
+    the archive and are left to the caller.
+    """
+    header, _, _ = read_header(f)
+    os.makedirs(dest_dir, exist_ok=True)
+    bodies = []
+    links = []
+    stack = [('', header)]
+    while stack:
+        prefix, node = stack.pop()
+        for name, child in node.get('files', {}).items():
+            rel_path = f"{prefix}/{name}" if prefix else name
+            target = safe_join(dest_dir, rel_path)
+            if 'files' in child:
+                os.makedirs(target, exist_ok=True)
+                stack.append((rel_path, child))
+            elif 'link' in child:
+                links.append((target, child['link']))
+            elif not child.get('unpacked'):
+                bodies.append((int(child.get('offset', 0)), int(child.get('size', 0)), target, child))
+    bodies.sort(key=lambda body: body[0])
+
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    written = PathList(dest_dir)
+    position = 0
+    for offset, size, target, node in bodies:
+        if offset < position:
+            raise AsarError(f"Entries overlap at {target}; the archive needs random access")
+        copy_stream(f, None, offset - position, buffer)
+        with open(target, 'wb', buffering=0) as out:
+            copy_stream(f, out, size, buffer)
+        position = offset + size
+        if node.get('executable') and os.name != 'nt':
+            os.chmod(target, 0o755)
+        written.append(target)
+        if progress:
+            progress(1, size)
+    for target, link in links:
+        AsarArchive._extract_link(dest_dir, target, link)
+    return written
+
+
+def copy_stream(src, out, count, buffer):
+    """Copy count bytes from src to out through buffer; out=None skips them"""
+    view = memoryview(buffer)
+    while count:
+        read = src.readinto(view[:min(count, len(buffer))])
+        if not read:
+            raise AsarError("Unexpected end of archive stream")
+        if out is not None:
+            write_all(out, view[:read])
+        count -= read
+
+
+class IntegrityHasher:
+    """Compute Electron's whole-file and per-block SHA-256 while data streams past"""
+
+    def __init__(self):
+        self._file_hash = hashlib.sha256()
+        self._block_hash = hashlib.sha256()
+        self._block_fill = 0
+        self.blocks = []
+
+    def update(self, data):
+        """Feed the next chunk of the file body"""
+        self._file_hash.update(data)
+        data = memoryview(data)
+        while len(data):
+            take = min(INTEGRITY_BLOCK_SIZE - self._block_fill, len(data))
+            self._block_hash.update(data[:take])
+            self._block_fill += take
+            data = data[take:]
+            if self._block_fill == INTEGRITY_BLOCK_SIZE:
+                self.blocks.append(self._block_hash.hexdigest())
+                self._block_hash = hashlib.sha256()
+                self._block_fill = 0
+
+    def result(self):
+        """Integrity entry for the header; asar always emits a trailing block"""
+        return {
+            'algorithm': 'SHA256',
+            'hash': self._file_hash.hexdigest(),
+            'blockSize': INTEGRITY_BLOCK_SIZE,
+            'blocks': self.blocks + [self._block_hash.hexdigest()]
+        }
+
+
+def placeholder_integrity(size):
+    """Integrity entry with the same serialized length as the real one"""
+    return {
+        'algorithm': 'SHA256',
+        'hash': '0' * 64,
+        'blockSize': INTEGRITY_BLOCK_SIZE,
+        'blocks': ['0' * 64] * (size // INTEGRITY_BLOCK_SIZE + 1)
+    }
+
+
+def write_all(fd_file, data):
+    """Write a whole buffer to an unbuffered file object"""
+    view = memoryview(data)
+    while len(view):
+        written = fd_file.write(view)
+        view = view[written:]
+
+
+def save_manifest(manifest_path, archive_path, files, archive_offset=0):
+    """Record the archive an extracted tree came from and each file's state"""
+    st = os.stat(archive_path)
+    manifest = {
+        'archive': os.path.abspath(archive_path),
+        'archive_size': st.st_size,
+        'archive_mtime_ns': st.st_mtime_ns,
+        'files': files
+    }
+    if archive_offset:
+        manifest['archive_offset'] = archive_offset
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def load_manifest(manifest_path):
+    """Load an extraction manifest, or None if it is missing or stale"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        st = os.stat(manifest['archive'])
+    except (OSError, ValueError, KeyError):
+        return None
+    if st.st_size != manifest['archive_size'] or st.st_mtime_ns != manifest['archive_mtime_ns']:
+        return None
+    return manifest
+
+
+def file_sha256(path):
+    """SHA-256 of a file read through a fixed-size buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(PACK_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+def file_integrity(path):
+    """Integrity entry for a file on disk"""
+    hasher = IntegrityHasher()
+    buffer = bytearray(PACK_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            hasher.update(view[:count])
+    return hasher.result()
+
+
+def copy_file(source, target):
+    """Copy a whole file through copy_range"""
+    with open(source, 'rb', buffering=0) as src, open(target, 'wb', buffering=0) as out:
+        copy_range(src, 0, out, os.fstat(src.fileno()).st_size)
+
+
+def copy_range(src, offset, out, count):
+    """Copy count bytes at offset in src to the current position of out
+
+    Both arguments are unbuffered file objects. The kernel does the copy with
+    copy_file_range or sendfile where available, otherwise it falls back to a
+    buffered read/write loop.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count:
+                copied = os.copy_file_range(src.fileno(), out.fileno(), count, offset)
+                if not copied:
+                    raise AsarError("Unexpected end of source archive")
+                offset += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                raise
+    if hasattr(os, 'sendfile') and count:
+        try:
+            while count:
+                copied = os.sendfile(out.fileno(), src.fileno(), offset, count)
+                if not copied:
+                    raise AsarError("Unexpected end of source archive")
+                offset += copied
+                count -= copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+    buffer = bytearray(min(PACK_BUFFER_SIZE, max(count, 1)))
+    view = memoryview(buffer)
+    src.seek(offset)
+    while count:
+        read = src.readinto(view[:min(count, len(buffer))])
+        if not read:
+            raise AsarError("Unexpected end of source archive")
+        write_all(out, view[:read])
+        count -= read
+
+
+def scan_tree(src_dir, exclude=(), unpack=(), unpacked_paths=()):
+    """Build an asar header for src_dir and list the files to pack in order
+
+    Files matching an unpack glob (by name or relative path, e.g. '*.node')
+    or listed in unpacked_paths are flagged unpacked; their bodies go to
+    the sidecar directory instead of the archive.
+    """
+    src_dir = os.path.abspath(src_dir)
+    real_root = os.path.realpath(src_dir)
+    exclude = {os.path.abspath(path) for path in exclude}
+    header = {'files': {}}
+    files = []
+    offset = 0
+
+    def visit(directory, node, prefix):
+        nonlocal offset
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if entry.path in exclude:
+                continue
+            rel_path = f"{prefix}/{entry.name}" if prefix else entry.name
+            if entry.is_symlink():
+                target = os.path.realpath(entry.path)
+                if os.path.commonpath([real_root, target]) == real_root:
+                    node['files'][entry.name] = {'link': os.path.relpath(target, real_root).replace(os.sep, '/')}
+                    continue
+            if entry.is_dir():
+                child = {'files': {}}
+                node['files'][entry.name] = child
+                visit(entry.path, child, rel_path)
+            elif entry.is_file():
+                st = entry.stat()
+                if rel_path in unpacked_paths or any(
+                        fnmatch.fnmatch(entry.name, pattern) or fnmatch.fnmatch(rel_path, pattern)
+                        for pattern in unpack):
+                    child = {'size': st.st_size, 'unpacked': True}
+                else:
+                    child = {'size': st.st_size, 'offset': str(offset)}
+                    offset += st.st_size
+                if os.name != 'nt' and st.st_mode & 0o100:
+                    child['executable'] = True
+                child['integrity'] = placeholder_integrity(st.st_size)
+                node['files'][entry.name] = child
+                files.append((rel_path, child, entry.path, st))
+
+    visit(src_dir, header, '')
+    return header, files
+
+
+def _stream_file(source, out, buffer, node, rel_path):
+    """Copy one file body from disk into out and return its integrity entry"""
+    view = memoryview(buffer)
+    hasher = IntegrityHasher()
+    copied = 0
+    with open(source, 'rb', buffering=0) as src:
+        while True:
+            count = src.readinto(buffer)
+            if not count:
+                break
+            hasher.update(view[:count])
+            write_all(out, view[:count])
+            copied += count
+    if copied != node['size']:
+        raise AsarError(f"File changed while packing: {rel_path}")
+    return hasher.result()
+
+
+def _write_archive(dest_path, header, files, reuse=None, original=None, progress=None):
+    """Write header and bodies sequentially, then patch in the real hashes
+
+    reuse maps a file's position in files to (offset, integrity) of an
+    identical body in the original archive; those bodies are copied as raw
+    byte ranges instead of being read back from disk. Unpacked entries are
+    copied into dest_path + '.unpacked', which is rebuilt from scratch.
+    """
+    reuse = reuse or {}
+    header_bytes, _ = encode_header(header)
+    buffer = bytearray(PACK_BUFFER_SIZE)
+    total = 0
+    unpacked = 0
+    sidecar = dest_path + '.unpacked'
+    if os.path.isdir(sidecar):
+        shutil.rmtree(sidecar)
+
+    try:
+        with open(dest_path, 'wb', buffering=0) as out:
+            write_all(out, header_bytes)
+            for index, (rel_path, node, source, _) in enumerate(files):
+                if node.get('unpacked'):
+                    target = safe_join(sidecar, rel_path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    if index in reuse:
+                        # Unchanged, so the recorded hashes still hold
+                        copy_file(source, target)
+                        node['integrity'] = reuse[index][1]
+                    else:
+                        with open(target, 'wb', buffering=0) as body:
+                            node['integrity'] = _stream_file(source, body, buffer, node, rel_path)
+                    if node.get('executable'):
+                        os.chmod(target, 0o755)
+                    unpacked += 1
+                elif index in reuse:
+                    offset, integrity = reuse[index]
+                    copy_range(original, offset, out, node['size'])
+                    node['integrity'] = integrity
+                else:
+                    node['integrity'] = _stream_file(source, out, buffer, node, rel_path)
+                total += node['size']
+                if progress:
+                    progress(1, node['size'])
+
+            final_header, _ = encode_header(header)
+            if len(final_header) != len(header_bytes):
+                raise AsarError("Header size changed while packing")
+            out.seek(0)
+            write_all(out, final_header)
+    except BaseException:
+        # Also covers cancellation, which must not leave a half-written archive
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        if os.path.isdir(sidecar):
+            shutil.rmtree(sidecar)
+        raise
+
+    return {'files': len(files), 'bytes': total, 'header_size': len(header_bytes), 'unpacked': unpacked}
+
+
+def pack_directory(src_dir, dest_path, exclude=(), progress=None, unpack=(), unpacked_paths=()):
+    """Pack src_dir into an archive at dest_path in a single sequential write
+
+    File bodies stream through one fixed-size buffer while their integrity
+    hashes are computed; the header is written with same-length placeholder
+    hashes first and patched in place once every body has been written.
+    Returns a summary dict with file and byte counts.
+    """
+    header, files = scan_tree(src_dir, tuple(exclude) + (dest_path, dest_path + '.unpacked'),
+                              unpack, unpacked_paths)
+    return _write_archive(dest_path, header, files, progress=progress)
+
+
+def pack_incremental(src_dir, dest_path, manifest_path, exclude=(), progress=None, unpack=()):
+    """Repack src_dir, splicing unchanged entries from the original archive
+
+    Files whose size and mtime still match the extraction manifest (or whose
+    content hash does) are copied as raw byte ranges from the archive they
+    were extracted from; only edited files are read from disk. Falls back to
+    a full pack when the manifest or original archive is gone or changed.
+    The summary lists the changed paths and the manifest entries for the
+    new archive, ready for save_manifest once it replaces the original.
+    Entries that were unpacked in the original archive stay unpacked.
+    """
+    manifest = load_manifest(manifest_path)
+    unpacked_paths = set()
+    if manifest:
+        unpacked_paths = {rel for rel, known in manifest['files'].items() if known.get('unpacked')}
+    header, files = scan_tree(src_dir, tuple(exclude) + (dest_path, dest_path + '.unpacked'),
+                              unpack, unpacked_paths)
+    if manifest is None:
+        summary = _write_archive(dest_path, header, files, progress=progress)
+        summary.update(reused=0, reused_bytes=0, changed=[rel for rel, _, _, _ in files])
+    else:
+        with open(manifest['archive'], 'rb', buffering=0) as original:
+            archive_offset = manifest.get('archive_offset', 0)
+            original.seek(archive_offset)
+            _, header_size, _ = read_header(original)
+            data_offset = archive_offset + 8 + header_size
+            reuse = {}
+            changed = []
+            for index, (rel_path, node, source, st) in enumerate(files):
+                known = manifest['files'].get(rel_path)
+                if known and known['size'] == node['size']:
+                    same = known['mtime_ns'] == st.st_mtime_ns
+                    if not same:
+                        same = file_sha256(source) == known['integrity']['hash']
+                    if same:
+                        reuse[index] = (data_offset + known['offset'], known['integrity'])
+                        continue
+                changed.append(rel_path)
+            summary = _write_archive(dest_path, header, files, reuse, original, progress)
+        summary.update(
+            reused=len(reuse),
+            reused_bytes=sum(files[index][1]['size'] for index in reuse),
+            changed=changed
+        )
+
+    summary['manifest_files'] = {}
+    for rel_path, node, source, _ in files:
+        entry = {
+            'size': node['size'],
+            'mtime_ns': os.stat(source).st_mtime_ns,
+            'offset': int(node.get('offset', 0)),
+            'integrity': node['integrity']
+        }
+        if node.get('unpacked'):
+            entry['unpacked'] = True
+        summary['manifest_files'][rel_path] = entry
+    return summary
@@ -0,0 +1,114 @@
+import difflib
+
+from asar_archive import AsarArchive
+
+# Bodies larger than this are reported as changed without a text diff
+MAX_TEXT_DIFF_SIZE = 2 * 1024 * 1024
+
+
+def _flatten(archive):
+    """{path: node} for every file and link entry"""
+    return {rel_path: node for rel_path, node in archive.iter_entries() if 'files' not in node}
+
+
+def _kind(node):
+    return 'link' if 'link' in node else 'file'
+
+
+def _digest(node):
+    integrity = node.get('integrity')
+    return integrity.get('hash') if integrity else None
+
+
+def _change_reason(old_archive, old_node, new_archive, new_node, rel_path):
+    """Why two entries differ, or None if they are the same
+
+    Headers decide almost every case; bodies are only compared when
+    neither side carries an integrity hash to compare instead.
+    """
+    if _kind(old_node) != _kind(new_node):
+        return 'type'
+    if 'link' in old_node:
+        return 'link' if old_node['link'] != new_node['link'] else None
+    if int(old_node.get('size', 0)) != int(new_node.get('size', 0)):
+        return 'size'
+    old_digest, new_digest = _digest(old_node), _digest(new_node)
+    if old_digest and new_digest:
+        if old_digest != new_digest:
+            return 'content'
+    elif old_archive.read(rel_path) != new_archive.read(rel_path):
+        return 'content'
+    if bool(old_node.get('executable')) != bool(new_node.get('executable')):
+        return 'executable'
+    return None
+
+
+def _as_text(data):
+    """Decoded text, or None for binary data"""
+    if b'\0' in data[:8192]:
+        return None
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def text_diff(old_archive, new_archive, rel_path, context=3):
+    """Unified diff lines for a changed text entry, or None for binary or huge files"""
+    old_size = old_archive.stat(rel_path).size
+    new_size = new_archive.stat(rel_path).size
+    if max(old_size, new_size) > MAX_TEXT_DIFF_SIZE:
+        return None
+    old_text = _as_text(bytes(old_archive.read(rel_path)))
+    new_text = _as_text(bytes(new_archive.read(rel_path)))
+    if old_text is None or new_text is None:
+        return None
+    lines = []
+    for line in difflib.unified_diff(old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+                                     fromfile=f"a/{rel_path}", tofile=f"b/{rel_path}", n=context):
+        if line.endswith('\n'):
+            lines.append(line)
+        else:
+            lines.extend([line + '\n', '\\ No newline at end of file\n'])
+    return lines
+
+
+def iter_diff(old_archive, new_archive, text=False, context=3):
+    """Yield one change dict per added, removed or changed entry, in path order"""
+    old_entries = _flatten(old_archive)
+    new_entries = _flatten(new_archive)
+    for rel_path in sorted(old_entries.keys() | new_entries.keys()):
+        old_node = old_entries.get(rel_path)
+        new_node = new_entries.get(rel_path)
+        if old_node is None:
+            yield {'path': rel_path, 'status': 'added', 'new_size': int(new_node.get('size', 0))}
+        elif new_node is None:
+            yield {'path': rel_path, 'status': 'removed', 'old_size': int(old_node.get('size', 0))}
+        else:
+            reason = _change_reason(old_archive, old_node, new_archive, new_node, rel_path)
+            if reason is None:
+                continue
+            change = {
+                'path': rel_path,
+                'status': 'changed',
+                'reason': reason,
+                'old_size': int(old_node.get('size', 0)),
+                'new_size': int(new_node.get('size', 0))
+            }
+            if text and reason in ('size', 'content'):
+                lines = text_diff(old_archive, new_archive, rel_path, context)
+                if lines is not None:
+                    change['diff'] = lines
+            yield change
+
+
+def diff_archives(old_path, new_path, text=False, context=3):
+    """Compare two archives by header and return a summary with every change"""
+    with AsarArchive(old_path) as old_archive, AsarArchive(new_path) as new_archive:
+        changes = list(iter_diff(old_archive, new_archive, text, context))
+        total = len(_flatten(old_archive).keys() | _flatten(new_archive).keys())
+    summary = {'old': old_path, 'new': new_path, 'added': [], 'removed': [], 'changed': []}
+    for change in changes:
+        summary[change['status']].append(change)
+    summary['unchanged'] = total - len(changes)
+    return summary
@@ -0,0 +1,270 @@
+import os
+import json
+import mmap
+import hashlib
+
+from asar_archive import AsarArchive, INTEGRITY_BLOCK_SIZE, safe_join, file_integrity
+
+# Work handed to one thread at a time; small files are batched up to this
+BATCH_BYTES = 16 * 1024 * 1024
+BATCH_ITEMS = 512
+
+
+def header_hash(header_string):
+    """SHA-256 of an archive header, as Electron embeds it in the executable"""
+    return hashlib.sha256(header_string.encode('utf-8')).hexdigest()
+
+
+def _hash_batch(view, items):
+    """Hash each (path, kind, index, start, end, expected) item; return failures"""
+    failed = []
+    for path, kind, index, start, end, expected in items:
+        if hashlib.sha256(view[start:end]).hexdigest() != expected:
+            failed.append((path, kind, index))
+    return failed
+
+
+def _hash_sidecar(path, source, integrity):
+    """Verify one unpacked file against its integrity entry"""
+    if not os.path.exists(source):
+        return [(path, 'missing', None)]
+    actual = file_integrity(source)
+    failed = []
+    if actual['hash'] != integrity.get('hash'):
+        failed.append((path, 'hash', None))
+    expected_blocks = integrity.get('blocks', [])
+    if len(expected_blocks) != len(actual['blocks']):
+        failed.append((path, 'blocks', None))
+    else:
+        failed.extend((path, 'block', index)
+                      for index, (want, got) in enumerate(zip(expected_blocks, actual['blocks']))
+                      if want != got)
+    return failed
+
+
+class VerificationCache:
+    """Remembers which entries of which archive files have been verified
+
+    A record only counts while the archive's size and mtime are unchanged,
+    and an entry only while its integrity hash in the header is unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.archives = json.load(f)
+        except (OSError, ValueError):
+            self.archives = {}
+
+    def verified(self, archive_path):
+        """{rel_path: hash} known good for the archive as it is on disk now"""
+        record = self.archives.get(os.path.abspath(archive_path))
+        try:
+            st = os.stat(archive_path)
+        except OSError:
+            return {}
+        if not record or record['size'] != st.st_size or record['mtime_ns'] != st.st_mtime_ns:
+            return {}
+        return record['verified']
+
+    def record(self, archive_path, verified):
+        st = os.stat(archive_path)
+        self.archives[os.path.abspath(archive_path)] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'verified': verified
+        }
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.archives, f)
+
+
+def verify_archive(archive_path, jobs=None, full=False, cache=None, exe_path=None, progress=None):
+    """Check every entry's integrity blocks against the archive contents
+
+    Blocks are hashed in parallel straight out of the memory map (hashlib
+    releases the GIL), so large archives verify at close to disk speed.
+    Electron checks blocks, so whole-file hashes of multi-block files are
+    only checked when full is set. Entries already verified in cache are
+    skipped. With exe_path, also reports whether the executable embeds the
+    current header hash. Returns a report dict listing every mismatch.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    jobs = jobs or os.cpu_count() or 1
+    known = cache.verified(archive_path) if cache else {}
+    report = {
+        'archive': archive_path,
+        'files': 0,
+        'bytes': 0,
+        'skipped': 0,
+        'no_integrity': [],
+        'mismatches': []
+    }
+
+    with AsarArchive(archive_path) as archive:
+        report['header_hash'] = header_hash(archive.header_string)
+        if exe_path:
+            report['exe'] = exe_path
+            report['exe_has_header_hash'] = find_hash(exe_path, report['header_hash']) > 0
+
+        view = memoryview(archive._map)
+        checked = {}
+        failures = []
+        pending = {}
+
+        def harvest(futures):
+            for future in futures:
+                files, nbytes = pending.pop(future)
+                failures.extend(future.result())
+                if progress:
+                    progress(files, nbytes)
+
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                def submit(func, *args, files=0, nbytes=0):
+                    # Bound the work in flight so huge archives don't queue millions of tasks
+                    while len(pending) >= jobs * 4:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        harvest(done)
+                    pending[pool.submit(func, *args)] = (files, nbytes)
+
+                try:
+                    batch, batch_bytes, batch_files = [], 0, 0
+                    for rel_path, node in archive.iter_entries():
+                        if 'files' in node or 'link' in node:
+                            continue
+                        integrity = node.get('integrity')
+                        if not integrity:
+                            report['no_integrity'].append(rel_path)
+                            continue
+                        size = int(node.get('size', 0))
+                        report['files'] += 1
+                        report['bytes'] += size
+                        checked[rel_path] = integrity.get('hash')
+                        if known.get(rel_path) == integrity.get('hash'):
+                            report['skipped'] += 1
+                            continue
+
+                        if node.get('unpacked'):
+                            submit(_hash_sidecar, rel_path, safe_join(archive.unpacked_dir, rel_path), integrity,
+                                   files=1, nbytes=size)
+                            continue
+
+                        start, size = archive.entry_range(node)
+                        block_size = integrity.get('blockSize', INTEGRITY_BLOCK_SIZE)
+                        blocks = integrity.get('blocks', [])
+                        if len(blocks) != size // block_size + 1:
+                            failures.append((rel_path, 'blocks', None))
+                            continue
+                        items = [(rel_path, 'block', index, start + index * block_size,
+                                  start + min((index + 1) * block_size, size), expected)
+                                 for index, expected in enumerate(blocks)]
+                        if len(blocks) == 1:
+                            # The only block is the whole file, so the two hashes must agree
+                            if blocks[0] != integrity.get('hash'):
+                                failures.append((rel_path, 'hash', None))
+                        elif full:
+                            items.append((rel_path, 'hash', None, start, start + size, integrity.get('hash')))
+
+                        batch_files += 1
+                        for item in items:
+                            batch.append(item)
+                            batch_bytes += item[4] - item[3]
+                            if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_ITEMS:
+                                submit(_hash_batch, view, batch, files=batch_files, nbytes=batch_bytes)
+                                batch, batch_bytes, batch_files = [], 0, 0
+                    if batch:
+                        submit(_hash_batch, view, batch, files=batch_files, nbytes=batch_bytes)
+                    harvest(list(pending))
+                except BaseException:
+                    # Don't let queued batches run on after a failure or cancel
+                    for future in pending:
+                        future.cancel()
+                    raise
+        finally:
+            view.release()
+
+    seen = set()
+    for rel_path, problem, index in failures:
+        if (rel_path, problem, index) in seen:
+            continue
+        seen.add((rel_path, problem, index))
+        mismatch = {'path': rel_path, 'problem': problem}
+        if index is not None:
+            mismatch['block'] = index
+        report['mismatches'].append(mismatch)
+        checked.pop(rel_path, None)
+    report['mismatches'].sort(key=lambda item: (item['path'], item.get('block') or 0))
+    report['ok'] = not report['mismatches']
+
+    if cache:
+        cache.record(archive_path, checked)
+        cache.save()
+    return report
+
+
+def find_hash(path, digest):
+    """How many times a hex digest appears in a file"""
+    needle = digest.encode('ascii')
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            count = 0
+            position = data.find(needle)
+            while position != -1:
+                count += 1
+                position = data.find(needle, position + len(needle))
+            return count
+
+
+def patch_header_hash(exe_path, old_hash, new_hash):
+    """Replace the embedded header hash in an executable or Info.plist in place
+
+    Electron stores the hash as hex text (a JSON resource on Windows, a
+    plist entry on macOS), so the new value has the same length and the
+    file layout is untouched. Code signatures over the file are invalidated.
+    Returns the number of occurrences replaced.
+    """
+    old, new = old_hash.encode('ascii'), new_hash.encode('ascii')
+    if len(old) != len(new):
+        raise ValueError("Header hashes must have the same length")
+    if old == new:
+        return 0
+    count = 0
+    with open(exe_path, 'r+b') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0) as data:
+            position = data.find(old)
+            while position != -1:
+                data[position:position + len(new)] = new
+                count += 1
+                position = data.find(old, position + len(new))
+            data.flush()
+    return count
+
+
+def integrity_hosts(app_path):
+    """Files that may embed an archive header hash for an app"""
+    hosts = []
+    if os.path.isfile(app_path) and not app_path.lower().endswith('.asar'):
+        hosts.append(app_path)
+    elif os.path.isdir(app_path):
+        # Only files that contain the old hash get patched, so take every exe
+        hosts.extend(sorted(entry.path for entry in os.scandir(app_path)
+                            if entry.is_file() and entry.name.lower().endswith('.exe')))
+    bundle_plist = os.path.join(app_path, 'Contents', 'Info.plist')
+    if os.path.exists(bundle_plist):
+        return hosts + [bundle_plist]
+    # macOS keeps it in the bundle's Info.plist
+    directory = app_path if os.path.isdir(app_path) else os.path.dirname(app_path)
+    while directory and os.path.dirname(directory) != directory:
+        plist = os.path.join(directory, 'Info.plist')
+        if os.path.basename(directory) == 'Contents' and os.path.exists(plist):
+            hosts.append(plist)
+            break
+        directory = os.path.dirname(directory)
+    return hosts
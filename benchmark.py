@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import platform
+import statistics
+import subprocess
+
+from asar_archive import pack_directory, pack_incremental
+from analyzer_engine import AnalyzerEngine
+from source_maps import analyze_maps, find_map_pairs
+
+# Bump when the generator changes so cached fixtures are rebuilt
+FIXTURE_VERSION = 1
+
+# Fixtures and scratch output live outside the checkout and are reused between runs
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), 'electron-decompiler-benchmark')
+
+# Fixed seed so every machine generates byte-identical apps
+SEED = 20240501
+
+# Allowed slowdown against the baseline before a phase counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Shapes of the generated apps
+PROFILES = {
+    'small': {
+        'tiny_files': 2000,
+        'packages': 60,
+        'package_depth': 6,
+        'blobs': 2,
+        'blob_size': 8 * 1024 * 1024,
+        'sidecars': 4,
+        'sidecar_size': 1024 * 1024,
+        'bundles': 4,
+        'bundle_modules': 200
+    },
+    'large': {
+        'tiny_files': 40000,
+        'packages': 1500,
+        'package_depth': 12,
+        'blobs': 4,
+        'blob_size': 256 * 1024 * 1024,
+        'sidecars': 16,
+        'sidecar_size': 16 * 1024 * 1024,
+        'bundles': 20,
+        'bundle_modules': 1000
+    }
+}
+
+# Phases in the order they run; later phases use what earlier ones produced
+PHASES = ('discover', 'extract', 'pack', 'repack', 'source_maps', 'resources', 'resources_resync')
+
+BASE64_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+WORDS = ('const', 'let', 'return', 'function', 'require', 'module', 'exports', 'window', 'ipcRenderer',
+         'electron', 'value', 'options', 'callback', 'promise', 'await', 'async', 'this', 'state')
+
+
+def _vlq(value):
+    """Base64 VLQ encoding of one source map field"""
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        encoded += BASE64_CHARS[digit]
+        if not value:
+            return encoded
+
+
+def _random_bytes(rng, size):
+    if hasattr(rng, 'randbytes'):
+        return rng.randbytes(size)
+    return rng.getrandbits(size * 8).to_bytes(size, 'little')
+
+
+def _source_line(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) + ';\n'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _write_bundle(rng, directory, name, modules):
+    """A bundle and its source map, one original source per module"""
+    lines = []
+    mappings = []
+    sources = []
+    previous_source = previous_line = 0
+    for module in range(modules):
+        sources.append(f"webpack:///src/{name}/module{module}.js")
+        for source_line in range(rng.randint(5, 30)):
+            lines.append(_source_line(rng))
+            # One segment per generated line, at column 0 of the original line
+            mappings.append(_vlq(0) + _vlq(module - previous_source) + _vlq(source_line - previous_line) + _vlq(0))
+            previous_source, previous_line = module, source_line
+    js_path = os.path.join(directory, f"{name}.js")
+    _write(js_path, ''.join(lines).encode('utf-8') + f"//# sourceMappingURL={name}.js.map\n".encode('utf-8'))
+    source_map = {'version': 3, 'file': f"{name}.js", 'sources': sources, 'names': [],
+                  'mappings': ';'.join(mappings)}
+    _write(js_path + '.map', json.dumps(source_map).encode('utf-8'))
+
+
+def generate_app(root, profile):
+    """Generate a synthetic unpacked app tree under root/resources from a profile"""
+    rng = random.Random(SEED)
+    resources = os.path.join(root, 'resources')
+    _write(os.path.join(resources, 'package.json'),
+           json.dumps({'name': 'bench-app', 'version': '1.0.0', 'main': 'main.js'}).encode('utf-8'))
+    _write(os.path.join(resources, 'main.js'), b"require('./dist/bundle0.js');\n")
+
+    # Many tiny files
+    for index in range(profile['tiny_files']):
+        directory = os.path.join(resources, 'src', f"feature{index % 50}", f"part{index % 7}")
+        body = ''.join(_source_line(rng) for _ in range(rng.randint(1, 40)))
+        _write(os.path.join(directory, f"file{index}.js"), body.encode('utf-8'))
+
+    # Deep node_modules chains; every package has the same boilerplate files
+    for index in range(profile['packages']):
+        directory = resources
+        for depth in range(index % profile['package_depth'] + 1):
+            directory = os.path.join(directory, 'node_modules', f"pkg{index}-{depth}")
+        _write(os.path.join(directory, 'package.json'),
+               json.dumps({'name': f"pkg{index}", 'version': '1.0.0'}).encode('utf-8'))
+        _write(os.path.join(directory, 'index.js'), b"module.exports = require('./lib');\n")
+        _write(os.path.join(directory, 'lib', 'index.js'),
+               ''.join(_source_line(rng) for _ in range(rng.randint(10, 200))).encode('utf-8'))
+        _write(os.path.join(directory, 'LICENSE'), b"MIT License\n" * 20)
+
+    # A few huge blobs
+    for index in range(profile['blobs']):
+        _write(os.path.join(resources, 'assets', f"blob{index}.bin"), _random_bytes(rng, profile['blob_size']))
+
+    # Native modules that belong in the unpacked sidecar
+    for index in range(profile['sidecars']):
+        _write(os.path.join(resources, 'node_modules', f"native{index}", 'build', 'Release', f"native{index}.node"),
+               _random_bytes(rng, profile['sidecar_size']))
+
+    # Bundles with source maps
+    for index in range(profile['bundles']):
+        _write_bundle(rng, os.path.join(resources, 'dist'), f"bundle{index}", profile['bundle_modules'])
+
+
+def build_fixture(fixture_dir, profile_name):
+    """Generate the apps for a profile once; later runs reuse them
+
+    loose/ is an app shipped without an archive, for the resource sync.
+    packed/ has the same files packed, with *.node unpacked, three levels
+    down where only the deep search finds it.
+    """
+    marker = os.path.join(fixture_dir, 'fixture.json')
+    try:
+        with open(marker, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info['version'] == FIXTURE_VERSION and info['profile'] == profile_name:
+            return info
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if os.path.exists(fixture_dir):
+        shutil.rmtree(fixture_dir)
+    loose = os.path.join(fixture_dir, 'loose')
+    generate_app(loose, PROFILES[profile_name])
+    archive = os.path.join(fixture_dir, 'packed', 'versions', '1.0.0', 'resources', 'app.asar')
+    os.makedirs(os.path.dirname(archive))
+    summary = pack_directory(os.path.join(loose, 'resources'), archive, unpack=['*.node'])
+    # Decoys for the deep search to walk past
+    for index in range(200):
+        _write(os.path.join(fixture_dir, 'packed', 'locales', f"locale{index}.pak"), b'\0' * 64)
+
+    info = {'version': FIXTURE_VERSION, 'profile': profile_name, 'files': summary['files'],
+            'bytes': summary['bytes'], 'unpacked': summary['unpacked']}
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return info
+
+
+def peak_rss():
+    """Peak resident set size of this process and its children in bytes, None on Windows"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _tree_size(paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+
+
+def run_phase(phase, fixture_dir, work_dir):
+    """Run one phase in this process and return its measurements"""
+    packed = os.path.join(fixture_dir, 'packed')
+    loose = os.path.join(fixture_dir, 'loose')
+    engine = AnalyzerEngine()
+    extracted = os.path.join(work_dir, 'extracted_app')
+
+    # Start extract and the first resource copy from nothing, outside the timing
+    if phase == 'extract' and os.path.exists(work_dir):
+        shutil.rmtree(work_dir)
+    if phase == 'resources':
+        for path in (os.path.join(work_dir, 'resources'), os.path.join(work_dir, 'resources.sync.json')):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    start = time.perf_counter()
+    if phase == 'discover':
+        engine.select_app(packed, None)
+        found = list(engine.find_asar_files())
+        files, nbytes = len(engine.candidates), 0
+        if not found:
+            raise Exception("The deep search found no archive")
+    elif phase == 'extract':
+        engine.select_app(packed, work_dir)
+        if engine.extract_asar() != 'asar':
+            raise Exception("Extraction failed")
+        files, nbytes = len(engine.extracted_files), None
+    elif phase == 'pack':
+        summary = pack_directory(extracted, os.path.join(work_dir, 'full.asar'))
+        files, nbytes = summary['files'], summary['bytes']
+    elif phase == 'repack':
+        # One edited file; the rest is spliced from the original archive
+        with open(os.path.join(extracted, 'main.js'), 'a', encoding='utf-8') as f:
+            f.write('// edited\n')
+        summary = pack_incremental(extracted, os.path.join(work_dir, 'incremental.asar'),
+                                   extracted + '.manifest.json')
+        files, nbytes = len(summary['manifest_files']), summary['bytes']
+    elif phase == 'source_maps':
+        report = analyze_maps(find_map_pairs(extracted))
+        files, nbytes = len(report['bundles']), sum(bundle['total_bytes'] for bundle in report['bundles'])
+    elif phase in ('resources', 'resources_resync'):
+        engine.output_dir = work_dir
+        if not engine.handle_unpacked_resources(loose):
+            raise Exception("No resources were copied")
+        files, nbytes = len(engine.extracted_files), None
+    else:
+        raise Exception(f"Unknown phase: {phase}")
+    seconds = time.perf_counter() - start
+
+    if nbytes is None:
+        nbytes = _tree_size(engine.extracted_files)
+    return {'seconds': seconds, 'files': files, 'bytes': nbytes, 'peak_rss': peak_rss()}
+
+
+def measure(phase, fixture_dir, work_dir):
+    """Run a phase in a fresh interpreter, so peak RSS belongs to that phase alone"""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--phase', phase,
+                             '--fixture', fixture_dir, '--work', work_dir],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise Exception(f"Phase {phase} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def run_suite(profile_name, root, phases=PHASES, repeat=3, progress=None):
+    """Run each phase repeat times and report the median time of each"""
+    fixture_dir = os.path.join(root, f"fixture-{profile_name}")
+    fixture = build_fixture(fixture_dir, profile_name)
+    work_dir = os.path.join(root, 'work')
+    results = {
+        'profile': profile_name,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'fixture': fixture,
+        'phases': {}
+    }
+    runs = {phase: [] for phase in phases}
+    if 'extract' not in phases and not os.path.isdir(os.path.join(work_dir, 'extracted_app')):
+        # pack, repack and source_maps work on an extracted tree
+        measure('extract', fixture_dir, work_dir)
+    for _ in range(repeat):
+        # Each round runs every phase in order, since later phases use earlier output
+        for phase in phases:
+            runs[phase].append(measure(phase, fixture_dir, work_dir))
+            if progress:
+                progress(phase, runs[phase][-1])
+
+    for phase, measurements in runs.items():
+        seconds = statistics.median(run['seconds'] for run in measurements)
+        files, nbytes = measurements[-1]['files'], measurements[-1]['bytes']
+        rss = [run['peak_rss'] for run in measurements if run['peak_rss'] is not None]
+        results['phases'][phase] = {
+            'seconds': round(seconds, 4),
+            'files': files,
+            'bytes': nbytes,
+            'files_per_s': round(files / seconds, 1) if seconds else None,
+            'mb_per_s': round(nbytes / 1048576 / seconds, 1) if seconds else None,
+            'peak_rss_mb': round(max(rss) / 1048576, 1) if rss else None,
+            'runs': [round(run['seconds'], 4) for run in measurements]
+        }
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Phases that got slower than baseline by more than threshold (0.25 = 25%)"""
+    regressions = []
+    for phase, current in results['phases'].items():
+        before = baseline.get('phases', {}).get(phase)
+        if not before or not before.get('seconds'):
+            continue
+        change = current['seconds'] / before['seconds'] - 1
+        current['change'] = round(change, 3)
+        if change > threshold:
+            regressions.append({'phase': phase, 'baseline': before['seconds'],
+                                'seconds': current['seconds'], 'change': round(change, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time discovery, extraction, packing, source-map "
+                                                 "analysis and resource syncing on generated apps")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='small', help="Size of the generated apps")
+    parser.add_argument('--root', default=DEFAULT_ROOT,
+                        help="Where fixtures and scratch output are kept (default: %(default)s)")
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES), help="Phases to run")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="Runs per phase; the median is reported")
+    parser.add_argument('-o', '--output', help="Write the results JSON here as well as to stdout")
+    parser.add_argument('--baseline', help="Results JSON to compare against; exit 1 on any regression")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown against the baseline, e.g. 0.25 for 25%%")
+    parser.add_argument('--phase', help=argparse.SUPPRESS)
+    parser.add_argument('--fixture', help=argparse.SUPPRESS)
+    parser.add_argument('--work', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.phase:
+        # Child process started by measure()
+        print(json.dumps(run_phase(args.phase, args.fixture, args.work)))
+        return 0
+
+    def progress(phase, result):
+        sys.stderr.write(f"{phase}: {result['seconds']:.3f}s\n")
+
+    phases = [phase for phase in PHASES if phase in args.phases]
+    results = run_suite(args.profile, os.path.abspath(args.root), phases, args.repeat, progress)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('profile') != args.profile:
+            raise SystemExit(f"Baseline is for the {baseline.get('profile')} profile, not {args.profile}")
+        results['regressions'] = compare(results, baseline, args.threshold)
+        for regression in results['regressions']:
+            sys.stderr.write(f"Regression in {regression['phase']}: {regression['baseline']:.3f}s -> "
+                             f"{regression['seconds']:.3f}s (+{regression['change']:.0%})\n")
+        status = 1 if results['regressions'] else 0
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
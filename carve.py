@@ -0,0 +1,256 @@
+import os
+import re
+import mmap
+import zlib
+import struct
+from collections import namedtuple
+
+from asar_archive import read_header, AsarError
+
+# An asar header's JSON always opens with the file table
+ASAR_JSON_START = b'{"files":'
+
+# Zip end-of-central-directory record and the headers it must point at
+ZIP_END = b'PK\x05\x06'
+ZIP_LOCAL = b'PK\x03\x04'
+ZIP_CENTRAL = b'PK\x01\x02'
+
+SEVEN_ZIP = b"7z\xbc\xaf\x27\x1c"
+
+# Section table bits that tell code and read-only data apart
+ELF_MAGIC = b'\x7fELF'
+ELF_NOBITS = 8
+ELF_WRITE, ELF_ALLOC, ELF_EXECUTE = 0x1, 0x2, 0x4
+PE_CODE, PE_DATA = 0x20, 0x40
+PE_EXECUTE, PE_WRITE = 0x20000000, 0x80000000
+
+# Where each runtime leaves its version in an Electron binary
+VERSION_MARKERS = {
+    'electron': (b'Electron/', re.compile(rb'(\d+\.\d+\.\d+(?:-[0-9A-Za-z.]+)?)')),
+    'chromium': (b'Chrome/', re.compile(rb'(\d+\.\d+\.\d+\.\d+)')),
+    'node': (b'/node-v', re.compile(rb'(\d+\.\d+\.\d+)-headers'))
+}
+
+# Bytes after a marker that may hold the version
+VERSION_WINDOW = 48
+
+Region = namedtuple('Region', 'kind offset length detail')
+
+
+def _find_all(data, needle, ranges=None):
+    """Offsets of every occurrence of needle in data, within ranges if given"""
+    for start, end in ranges or [(0, len(data))]:
+        position = data.find(needle, start, end)
+        while position != -1:
+            yield position
+            position = data.find(needle, position + 1, end)
+
+
+def _sections(data):
+    """(offset, size, flags) of each section of a PE or ELF image, or [] for anything else
+
+    flags holds 'code' for executable sections and 'rodata' for initialised
+    read-only data, which is where compiled-in version strings live.
+    """
+    sections = []
+    if data[:2] == b'MZ' and len(data) >= 64:
+        header = struct.unpack_from('<I', data, 0x3C)[0]
+        if data[header:header + 4] != b'PE\0\0' or header + 24 > len(data):
+            return []
+        count, _, _, _, optional_size = struct.unpack_from('<HIIIH', data, header + 6)
+        table = header + 24 + optional_size
+        for index in range(count):
+            entry = table + index * 40
+            if entry + 40 > len(data):
+                return []
+            raw_size, raw_offset = struct.unpack_from('<II', data, entry + 16)
+            characteristics = struct.unpack_from('<I', data, entry + 36)[0]
+            flags = set()
+            if characteristics & (PE_EXECUTE | PE_CODE):
+                flags.add('code')
+            elif characteristics & PE_DATA and not characteristics & PE_WRITE:
+                flags.add('rodata')
+            sections.append((raw_offset, raw_size, flags))
+    elif data[:4] == ELF_MAGIC and len(data) >= 64 and data[4] in (1, 2) and data[5] in (1, 2):
+        order = '<' if data[5] == 1 else '>'
+        if data[4] == 2:
+            table, = struct.unpack_from(order + 'Q', data, 0x28)
+            entry_size, count = struct.unpack_from(order + 'HH', data, 0x3A)
+            layout = order + 'IIQQQQ'
+        else:
+            table, = struct.unpack_from(order + 'I', data, 0x20)
+            entry_size, count = struct.unpack_from(order + 'HH', data, 0x2E)
+            layout = order + 'IIIIII'
+        for index in range(count):
+            entry = table + index * entry_size
+            if entry + struct.calcsize(layout) > len(data):
+                return []
+            _, kind, section_flags, _, offset, size = struct.unpack_from(layout, data, entry)
+            if kind == ELF_NOBITS:
+                continue
+            flags = set()
+            if section_flags & ELF_EXECUTE:
+                flags.add('code')
+            elif section_flags & ELF_ALLOC and not section_flags & ELF_WRITE:
+                flags.add('rodata')
+            sections.append((offset, size, flags))
+    # Clamp to the file, since a damaged table may point past its end
+    return [(offset, min(size, len(data) - offset), flags)
+            for offset, size, flags in sections if size and offset < len(data)]
+
+
+def _without(ranges, holes):
+    """ranges as (start, end) pairs with every hole cut out of them"""
+    for hole_start, hole_end in sorted(holes):
+        kept = []
+        for start, end in ranges:
+            if hole_end <= start or hole_start >= end:
+                kept.append((start, end))
+                continue
+            if start < hole_start:
+                kept.append((start, hole_start))
+            if hole_end < end:
+                kept.append((hole_end, end))
+        ranges = kept
+    return ranges
+
+
+def _asar_extent(header):
+    """Bytes of file data an asar header accounts for"""
+    end = 0
+    stack = [header]
+    while stack:
+        node = stack.pop()
+        for child in node.get('files', {}).values():
+            if 'files' in child:
+                stack.append(child)
+            elif 'link' not in child and not child.get('unpacked'):
+                end = max(end, int(child.get('offset', 0)) + int(child.get('size', 0)))
+    return end
+
+
+class _Window:
+    """Minimal file object over a memory map, so read_header can parse in place"""
+
+    def __init__(self, data, position):
+        self.data = data
+        self.position = position
+
+    def read(self, size):
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+def find_asar(data, ranges=None):
+    """Regions of embedded asar archives
+
+    The header JSON is found by its opening bytes; the 16 bytes of Pickle
+    framing before it must agree with where the JSON ends, and the JSON
+    must parse, before a match counts.
+    """
+    regions = []
+    resume = 0
+    for position in _find_all(data, ASAR_JSON_START, ranges):
+        start = position - 16
+        # Skip the archive's own contents, nested directories and asars included
+        if start < resume or start < 0:
+            continue
+        size_pickle, header_size, payload_size, string_size = struct.unpack_from('<IIII', data, start)
+        if size_pickle != 4 or payload_size != header_size - 4 or string_size + 8 > header_size:
+            continue
+        try:
+            header, header_size, _ = read_header(_Window(data, start))
+        except (AsarError, UnicodeDecodeError):
+            continue
+        length = 8 + header_size + _asar_extent(header)
+        if start + length > len(data):
+            continue
+        regions.append(Region('asar', start, length, {'files': len(header['files'])}))
+        resume = start + length
+    return regions
+
+
+def find_zip(data, ranges=None):
+    """Regions of embedded zip archives, found from their end records backwards
+
+    Zip64 archives are not recognised.
+    """
+    regions = []
+    for end_record in _find_all(data, ZIP_END, ranges):
+        if end_record + 22 > len(data):
+            continue
+        (_, _, _, entries, _, directory_size, directory_offset,
+         comment_size) = struct.unpack_from('<4sHHHHIIH', data, end_record)
+        directory_start = end_record - directory_size
+        start = directory_start - directory_offset
+        if start < 0 or directory_start < 0:
+            continue
+        if data[start:start + 4] != ZIP_LOCAL:
+            continue
+        if entries and data[directory_start:directory_start + 4] != ZIP_CENTRAL:
+            continue
+        length = end_record + 22 + comment_size - start
+        regions.append(Region('zip', start, length, {'entries': entries}))
+    return regions
+
+
+def find_7z(data, ranges=None):
+    """Regions of embedded 7z archives whose start header checksum holds"""
+    regions = []
+    for start in _find_all(data, SEVEN_ZIP, ranges):
+        if start + 32 > len(data):
+            continue
+        crc, next_offset, next_size, _ = struct.unpack_from('<IQQI', data, start + 8)
+        if zlib.crc32(data[start + 12:start + 32]) != crc:
+            continue
+        length = 32 + next_offset + next_size
+        if start + length > len(data):
+            continue
+        regions.append(Region('7z', start, length, {}))
+    return regions
+
+
+def find_versions(data, ranges=None):
+    """Most frequent Electron, Chromium and Node versions mentioned in data"""
+    versions = {}
+    for name, (marker, pattern) in VERSION_MARKERS.items():
+        counts = {}
+        for position in _find_all(data, marker, ranges):
+            start = position + len(marker)
+            match = pattern.match(data[start:start + VERSION_WINDOW])
+            if match:
+                version = match.group(1).decode('ascii')
+                counts[version] = counts.get(version, 0) + 1
+        if counts:
+            versions[name] = max(counts, key=counts.get)
+    return versions
+
+
+def scan(path):
+    """Archives and runtime versions inside an executable or any other file
+
+    The file is memory-mapped and searched with bytes.find, so nothing is
+    copied. When it is a PE or ELF image, code sections are left out of the
+    search and versions are only read from read-only data; other files are
+    searched whole. Returns a dict with the path, its size, the regions
+    found as (kind, offset, length, detail) and the versions found. An asar
+    region can be opened directly with AsarArchive(path, offset).
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {'path': path, 'size': 0, 'regions': [], 'versions': {}}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            sections = _sections(data)
+            ranges = _without([(0, size)], [(offset, offset + length)
+                                            for offset, length, flags in sections if 'code' in flags])
+            asar = find_asar(data, ranges)
+            # Zips and 7z archives stored inside an asar are its files, not separate payloads
+            inside = [(region.offset, region.offset + region.length) for region in asar]
+            ranges = _without(ranges, inside)
+            others = find_zip(data, ranges) + find_7z(data, ranges)
+            rodata = [(offset, offset + length) for offset, length, flags in sections if 'rodata' in flags]
+            versions = find_versions(data, _without(rodata, inside) if rodata else ranges)
+    regions = sorted(asar + others, key=lambda region: region.offset)
+    return {'path': path, 'size': size, 'regions': regions, 'versions': versions}
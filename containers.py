@@ -0,0 +1,285 @@
+import io
+import os
+import struct
+import posixpath
+import contextlib
+import zipfile
+
+from asar_archive import (AsarArchive, AsarError, PathList, extract_stream, copy_stream, safe_join,
+                          COPY_CHUNK_SIZE)
+
+# The archive an Electron app is packed into
+APP_ASAR = 'app.asar'
+
+# Debian packages are ar archives with the file tree in data.tar.*
+AR_MAGIC = b'!<arch>\n'
+AR_HEADER_SIZE = 60
+
+# AppImages are ELF executables with this marker at offset 8
+APPIMAGE_MAGIC = b'AI\x02'
+
+
+class _Slice(io.RawIOBase):
+    """Read-only file object over length bytes of path starting at offset"""
+
+    def __init__(self, path, offset=0, length=None):
+        self._file = open(path, 'rb', buffering=0)
+        self.offset = offset
+        if length is None:
+            length = os.fstat(self._file.fileno()).st_size - offset
+        self.length = length
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), self.length - self._pos))
+        if not count:
+            return 0
+        self._file.seek(self.offset + self._pos)
+        read = self._file.readinto(memoryview(buffer)[:count]) or 0
+        self._pos += read
+        return read
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.length
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def detect(path, offset=0, length=None):
+    """Kind of container at path ('zip', 'deb', 'tar', 'appimage') or None"""
+    with _Slice(path, offset, length) as f:
+        head = f.read(AR_HEADER_SIZE)
+        if head.startswith(AR_MAGIC):
+            return 'deb'
+        if head.startswith(b'\x7fELF') and head[8:11] == APPIMAGE_MAGIC:
+            return 'appimage'
+        f.seek(0)
+        if zipfile.is_zipfile(f):
+            return 'zip'
+    import tarfile
+    try:
+        with _Slice(path, offset, length) as f, tarfile.open(fileobj=f, mode='r:*') as tar:
+            return 'tar' if tar.next() is not None else None
+    except (tarfile.TarError, EOFError, OSError):
+        return None
+
+
+def _is_app_asar(name, asar_name):
+    return posixpath.basename(name.rstrip('/')) == asar_name
+
+
+def _unpacked_rel_path(name, asar_name):
+    """Path inside the archive for a member of an asar's .unpacked folder, or None"""
+    marker = asar_name + '.unpacked/'
+    if name.startswith(marker):
+        rel_path = name[len(marker):]
+    elif '/' + marker in name:
+        rel_path = name.split('/' + marker, 1)[1]
+    else:
+        return None
+    return rel_path or None
+
+
+def _zip_member(zf, asar_name):
+    """The archive member to use from a zip; the shallowest wins"""
+    names = [info for info in zf.infolist() if _is_app_asar(info.filename, asar_name) and not info.is_dir()]
+    if not names:
+        return None
+    return min(names, key=lambda info: info.filename.count('/'))
+
+
+def _stored_offset(f, info):
+    """Offset of an uncompressed zip member's bytes, so it can be read in place"""
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    f.seek(info.header_offset)
+    local = f.read(30)
+    if len(local) != 30 or local[:4] != b'PK\x03\x04':
+        return None
+    name_size, extra_size = struct.unpack_from('<HH', local, 26)
+    return info.header_offset + 30 + name_size + extra_size
+
+
+def _write_member(src, dest_dir, rel_path, size, buffer):
+    """Copy one unpacked member out of a container stream into dest_dir"""
+    target = safe_join(dest_dir, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb', buffering=0) as out:
+        copy_stream(src, out, size, buffer)
+    return target
+
+
+def _deb_data(path, offset=0, length=None):
+    """(offset, size, name) of a Debian package's data.tar member"""
+    with _Slice(path, offset, length) as f:
+        position = len(AR_MAGIC)
+        f.seek(position)
+        while True:
+            header = f.read(AR_HEADER_SIZE)
+            if len(header) < AR_HEADER_SIZE:
+                raise Exception("No data.tar member in Debian package")
+            name = header[:16].decode('ascii', 'replace').strip().rstrip('/')
+            size = int(header[48:58].decode('ascii').strip() or 0)
+            position += AR_HEADER_SIZE
+            if name.startswith('data.tar'):
+                return offset + position, size, name
+            # Members are padded to an even length
+            position += size + (size & 1)
+            f.seek(position)
+
+
+def extract(path, dest_dir, asar_name=APP_ASAR, offset=0, length=None, manifest_path=None, progress=None):
+    """Extract the app archive inside an installer container into dest_dir
+
+    Zip-based packages (.nupkg, portable .zip) and Debian packages or
+    tarballs are read as streams: only the archive and its .unpacked
+    folder are decompressed, straight into dest_dir through a fixed
+    buffer. An archive stored uncompressed in a zip is extracted in place
+    like any other, and manifest_path is only written then. offset and
+    length select a container embedded in a larger file, as found by
+    carve.scan. Returns a dict with the member used, the written file
+    paths and the unpacked paths, or None if there is no such archive.
+    """
+    kind = detect(path, offset, length)
+    if kind == 'appimage':
+        raise Exception("AppImage squashfs images are not supported; "
+                        "run the AppImage with --appimage-extract and select squashfs-root")
+    if kind == 'zip':
+        return _extract_zip(path, dest_dir, asar_name, offset, length, manifest_path, progress)
+    if kind == 'deb':
+        offset, length, name = _deb_data(path, offset, length)
+        if name.endswith('.zst'):
+            raise Exception(f"Unsupported compression in Debian package: {name}")
+    if kind in ('deb', 'tar'):
+        return _extract_tar(path, dest_dir, asar_name, offset, length, progress)
+    return None
+
+
+def _extract_zip(path, dest_dir, asar_name, offset, length, manifest_path, progress):
+    with _Slice(path, offset, length) as f, zipfile.ZipFile(f) as zf:
+        info = _zip_member(zf, asar_name)
+        if info is None:
+            return None
+        stored = _stored_offset(f, info)
+        if stored is not None:
+            with AsarArchive(path, offset + stored) as archive:
+                unpacked_paths = archive.unpacked_paths()
+                written = archive.extract(dest_dir, manifest_path=manifest_path, progress=progress)
+        else:
+            with zf.open(info) as src:
+                written = extract_stream(src, dest_dir, progress=progress)
+            unpacked_paths = set()
+        # Sidecar bodies sit next to the archive in the package
+        buffer = bytearray(COPY_CHUNK_SIZE)
+        prefix = info.filename + '.unpacked/'
+        for member in zf.infolist():
+            if member.is_dir() or not member.filename.startswith(prefix):
+                continue
+            rel_path = member.filename[len(prefix):]
+            with zf.open(member) as src:
+                written.append(_write_member(src, dest_dir, rel_path, member.file_size, buffer))
+            unpacked_paths.add(rel_path)
+            if progress:
+                progress(1, member.file_size)
+    return {'member': info.filename, 'in_place': stored is not None, 'files': written,
+            'unpacked_paths': unpacked_paths}
+
+
+def _extract_tar(path, dest_dir, asar_name, offset, length, progress):
+    """One pass over a tar stream: the first matching archive and any unpacked files"""
+    import tarfile
+    member = None
+    written = PathList(dest_dir)
+    unpacked_paths = set()
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    with _Slice(path, offset, length) as f, tarfile.open(fileobj=f, mode='r|*') as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            name = info.name[2:] if info.name.startswith('./') else info.name
+            if member is None and _is_app_asar(name, asar_name):
+                member = name
+                with tar.extractfile(info) as src:
+                    written.extend(extract_stream(src, dest_dir, progress=progress))
+                continue
+            rel_path = _unpacked_rel_path(name, asar_name)
+            if rel_path:
+                with tar.extractfile(info) as src:
+                    written.append(_write_member(src, dest_dir, rel_path, info.size, buffer))
+                unpacked_paths.add(rel_path)
+                if progress:
+                    progress(1, info.size)
+    if member is None:
+        return None
+    return {'member': member, 'in_place': False, 'files': written, 'unpacked_paths': unpacked_paths}
+
+
+@contextlib.contextmanager
+def open_asar(path, asar_name=APP_ASAR, offset=0, length=None, spool_dir=None):
+    """Open the app archive inside a container for random access
+
+    An archive stored uncompressed in a zip is opened in place. Otherwise
+    it is streamed into a temporary file in spool_dir, removed on exit;
+    use extract() instead when the whole tree is wanted anyway.
+    """
+    kind = detect(path, offset, length)
+    if kind == 'zip':
+        with _Slice(path, offset, length) as f, zipfile.ZipFile(f) as zf:
+            info = _zip_member(zf, asar_name)
+            if info is None:
+                raise FileNotFoundError(f"No {asar_name} in {path}")
+            stored = _stored_offset(f, info)
+            if stored is not None:
+                with AsarArchive(path, offset + stored) as archive:
+                    yield archive
+                return
+            with zf.open(info) as src, _spool(src, info.file_size, spool_dir) as spooled:
+                with AsarArchive(spooled) as archive:
+                    yield archive
+        return
+    if kind == 'deb':
+        offset, length, _ = _deb_data(path, offset, length)
+    elif kind != 'tar':
+        raise AsarError(f"Not a supported container: {path}")
+    import tarfile
+    with _Slice(path, offset, length) as f, tarfile.open(fileobj=f, mode='r|*') as tar:
+        for info in tar:
+            name = info.name[2:] if info.name.startswith('./') else info.name
+            if info.isfile() and _is_app_asar(name, asar_name):
+                with tar.extractfile(info) as src, _spool(src, info.size, spool_dir) as spooled:
+                    with AsarArchive(spooled) as archive:
+                        yield archive
+                return
+    raise FileNotFoundError(f"No {asar_name} in {path}")
+
+
+@contextlib.contextmanager
+def _spool(src, size, spool_dir):
+    """Copy size bytes of src into a temporary file and yield its path"""
+    import tempfile
+    fd, spooled = tempfile.mkstemp(suffix='.asar', dir=spool_dir)
+    try:
+        with open(fd, 'wb', buffering=0) as out:
+            copy_stream(src, out, size, bytearray(COPY_CHUNK_SIZE))
+        yield spooled
+    finally:
+        os.remove(spooled)
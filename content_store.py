@@ -0,0 +1,200 @@
+import os
+import sys
+import stat
+import errno
+import shutil
+import hashlib
+import tempfile
+
+# Size of the slices written when an object is first stored
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+# Linux ioctl that clones a file's extents (copy-on-write)
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem can't do that", not "something broke"
+UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+
+READ_ONLY = ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def reflink(src, dst):
+    """Copy-on-write clone of src at dst; raises OSError where unsupported"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            try:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            except OSError:
+                target.close()
+                os.remove(dst)
+                raise
+    elif sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+    else:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+
+
+def _place(mode, source, target):
+    if mode == 'hardlink':
+        os.link(source, target)
+        return
+    if mode == 'reflink':
+        reflink(source, target)
+    else:
+        shutil.copyfile(source, target)
+    # Clones and copies are private to the target, so they may be edited
+    st = os.stat(source)
+    os.chmod(target, stat.S_IMODE(st.st_mode) | stat.S_IWUSR)
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def place_file(modes, source, target):
+    """Put source at target using the first of modes that works
+
+    modes is a list such as ['reflink', 'hardlink', 'copy']. Returns the
+    modes still worth trying, so callers stop retrying a mode the
+    filesystem has already refused.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    while True:
+        try:
+            _place(modes[0], source, target)
+            return modes
+        except OSError as e:
+            if e.errno == errno.EMLINK:
+                # Only this file has run out of links (NTFS allows 1024)
+                _place('copy', source, target)
+                return modes
+            if e.errno not in UNSUPPORTED or len(modes) == 1:
+                raise
+            modes = modes[1:]
+
+
+def _read_chunks(path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(WRITE_CHUNK_SIZE), b''):
+            yield chunk
+
+
+class ContentStore:
+    """Files stored once by SHA-256 and linked wherever they are needed
+
+    Objects live at objects/ab/<digest> and are read-only, since every
+    hardlink to them shares the same data. An object whose only remaining
+    link is the store's own is garbage and is removed by gc().
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self.object_path(digest))
+
+    def add_buffer(self, data, digest=None, executable=False):
+        """Store a bytes-like object and return its digest
+
+        Pass digest when it is already known (e.g. from an archive's
+        integrity data) to skip hashing. Nothing is written when the
+        object is already stored.
+        """
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+        if not self.has(digest):
+            view = memoryview(data)
+            self._commit(digest, executable,
+                         (view[pos:pos + WRITE_CHUNK_SIZE] for pos in range(0, len(view), WRITE_CHUNK_SIZE)))
+        elif executable:
+            self._mark_executable(digest)
+        return digest
+
+    def add_file(self, path, executable=False):
+        """Store a file from disk and return its digest"""
+        digest = hashlib.sha256()
+        for chunk in _read_chunks(path):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        if not self.has(digest):
+            self._commit(digest, executable, _read_chunks(path))
+        elif executable:
+            self._mark_executable(digest)
+        return digest
+
+    def _commit(self, digest, executable, chunks):
+        """Write an object under a temporary name and move it into place"""
+        directory = os.path.dirname(self.object_path(digest))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            mode = 0o755 if executable and os.name != 'nt' else 0o644
+            os.chmod(temp_path, mode & READ_ONLY)
+            try:
+                os.rename(temp_path, self.object_path(digest))
+            except OSError:
+                # Stored concurrently by another process; the content is the same
+                if not self.has(digest):
+                    raise
+                os.chmod(temp_path, stat.S_IWUSR | stat.S_IRUSR)
+                os.remove(temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.chmod(temp_path, stat.S_IWUSR | stat.S_IRUSR)
+                os.remove(temp_path)
+            raise
+
+    def _mark_executable(self, digest):
+        if os.name != 'nt':
+            path = self.object_path(digest)
+            mode = os.stat(path).st_mode
+            if not mode & stat.S_IXUSR:
+                os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    def link(self, digest, target, modes=('hardlink', 'copy')):
+        """Make the object appear at target; returns the modes still usable"""
+        return place_file(list(modes), self.object_path(digest), target)
+
+    def iter_objects(self):
+        """(path, stat) for every stored object"""
+        for bucket in os.scandir(self.objects_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.startswith('.tmp-'):
+                    yield entry.path, entry.stat()
+
+    def usage(self):
+        """Bytes actually held by the store"""
+        return sum(st.st_size for _, st in self.iter_objects())
+
+    def discard(self, inodes):
+        """Remove the objects with these (st_dev, st_ino) identities"""
+        for path, _ in self.iter_objects():
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in inodes:
+                os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+                os.remove(path)
+
+    def gc(self):
+        """Remove objects nothing links to any more; returns (objects, bytes) freed"""
+        count = freed = 0
+        for path, st in self.iter_objects():
+            # scandir leaves st_nlink unset on Windows, so stat again
+            if os.stat(path).st_nlink == 1:
+                os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+                os.remove(path)
+                count += 1
+                freed += st.st_size
+        return count, freed
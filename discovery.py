@@ -0,0 +1,111 @@
+import os
+from collections import namedtuple
+
+# Subtrees that never hold an app's own archive; compared case-insensitively
+SKIP_DIRS = {
+    'node_modules', 'locales', '.git', '.svn', '.hg', '__pycache__',
+    'swiftshader', 'crashpad', 'gpucache', 'code cache', 'cache',
+    'logs', 'temp', 'tmp', '$recycle.bin', 'system volume information'
+}
+
+# Archives that ship with Electron itself rather than the app
+RUNTIME_ARCHIVES = {'default_app.asar', 'electron.asar'}
+
+Candidate = namedtuple('Candidate', 'path kind score')
+
+
+def _score(name, kind, parent_name, depth, distance):
+    """Likelihood that a hit is the app's own code; higher is better"""
+    score = {'asar': 100, 'asar.unpacked': 40, 'resources': 30}[kind]
+    lower = name.lower()
+    if lower == 'app.asar':
+        score += 50
+    elif lower in RUNTIME_ARCHIVES:
+        score -= 60
+    if parent_name.lower() == 'resources':
+        score += 25
+    # Prefer hits close to the executable
+    return score - 5 * depth - 30 * distance
+
+
+def _scan(root, distance, max_depth, skip, exclude, visited):
+    """Visit every directory under root once and yield candidates"""
+    try:
+        stat = os.stat(root)
+        visited.add((stat.st_dev, stat.st_ino))
+    except OSError:
+        pass
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        parent_name = os.path.basename(directory)
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            name = entry.name
+            lower = name.lower()
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if not is_dir:
+                if lower.endswith('.asar'):
+                    yield Candidate(entry.path, 'asar', _score(name, 'asar', parent_name, depth, distance))
+                continue
+
+            if lower.endswith('.asar.unpacked'):
+                # Sidecar of an archive; its contents are never the archive itself
+                yield Candidate(entry.path, 'asar.unpacked',
+                                _score(name, 'asar.unpacked', parent_name, depth, distance))
+                continue
+            if lower in skip or os.path.normcase(entry.path) == exclude:
+                continue
+            try:
+                key = (entry.stat(follow_symlinks=False).st_dev, entry.inode())
+            except OSError:
+                continue
+            if key in visited:
+                continue
+            visited.add(key)
+
+            if lower == 'resources':
+                yield Candidate(entry.path, 'resources', _score(name, 'resources', parent_name, depth, distance))
+            if depth < max_depth:
+                stack.append((entry.path, depth + 1))
+
+
+def iter_levels(app_dir, max_depth=4, parents=2, skip=SKIP_DIRS):
+    """Yield ranked candidate lists for app_dir, then each parent in turn
+
+    Each level skips the subtree already covered by the level before it, so
+    no directory is visited twice; callers can stop as soon as a level turns
+    up what they need.
+    """
+    visited = set()
+    root = os.path.abspath(app_dir)
+    exclude = None
+    for distance in range(parents + 1):
+        found = list(_scan(root, distance, max_depth, skip, exclude, visited))
+        found.sort(key=lambda candidate: candidate.score, reverse=True)
+        yield root, found
+        parent = os.path.dirname(root)
+        if parent == root:
+            break
+        # Normalised like the entries it is compared with, which Windows may spell differently
+        exclude, root = os.path.normcase(root), parent
+
+
+def discover(app_dir, max_depth=4, parents=2, skip=SKIP_DIRS, stop_at_first_asar=True):
+    """All archive and resource candidates around app_dir, best first"""
+    candidates = []
+    for _, found in iter_levels(app_dir, max_depth, parents, skip):
+        candidates.extend(found)
+        if stop_at_first_asar and any(c.kind == 'asar' for c in found):
+            break
+    candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+    return candidates
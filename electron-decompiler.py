@@ -1,16 +1,26 @@
 import os
 import sys
-import subprocess
-import shutil
-import json
-from pathlib import Path
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import winreg
-import platform
 import ctypes
-import tempfile
-import re
+from analyzer_engine import AnalyzerEngine, app_name
+from extract_cache import ExtractionCache
+from jobs import JobScheduler
+from log_sink import LogSink, LEVELS, level_name
+
+# How often the Tk loop drains events posted by background jobs
+JOB_POLL_MS = 50
+
+# Lines kept in the console widget and its ring buffer
+CONSOLE_CAPACITY = 5000
+
+# Tk is imported by load_tk, so command-line runs never pay for it
+tk = ttk = filedialog = messagebox = None
+
+def load_tk():
+    """Import Tk and its dialogs on first use of the GUI"""
+    global tk, ttk, filedialog, messagebox
+    import tkinter
+    from tkinter import ttk as tk_ttk, filedialog as tk_filedialog, messagebox as tk_messagebox
+    tk, ttk, filedialog, messagebox = tkinter, tk_ttk, tk_filedialog, tk_messagebox
 
 def is_admin():
     try:
@@ -20,6 +30,7 @@ def is_admin():
 
 class ElectronAnalyzer:
     def __init__(self):
+        load_tk()
         try:
             # Get script directory
             if getattr(sys, 'frozen', False):
@@ -27,10 +38,16 @@ class ElectronAnalyzer:
             else:
                 self.script_dir = os.path.dirname(os.path.abspath(__file__))
             
-            # Initialize paths
-            self.app_path = None
-            self.output_dir = None
-            self.npm_path = None
+            # Long operations run on a worker; the UI only drains its events
+            self.jobs = JobScheduler(max_workers=1)
+            self.log_sink = LogSink(capacity=CONSOLE_CAPACITY)
+            
+            # All discovery/extract/pack work happens in the UI-free engine
+            self.engine = AnalyzerEngine(log=self.log)
+            # Builds opened before are restored from the cache; workspace
+            # files get edited, so only copy-on-write clones or copies
+            self.engine.cache = ExtractionCache(os.path.join(self.script_dir, '.extract_cache'),
+                                                link_mode='reflink')
             
             # Modern Dark Theme Colors
             self.colors = {
@@ -43,7 +60,9 @@ class ElectronAnalyzer:
                 'console_bg': '#000000',   # Console background
                 'console_fg': '#4a9eff',   # Console text
                 'error': '#ff4a4a',        # Error messages
-                'success': '#4aff4a'       # Success messages
+                'success': '#4aff4a',      # Success messages
+                'warning': '#ffc04a',      # Warning messages
+                'debug': '#808080'         # Debug messages
             }
             
             # Initialize root with dark theme
@@ -57,17 +76,29 @@ class ElectronAnalyzer:
             
             # Setup UI
             self.setup_ui()
-            
-            # Find NPM
-            self.find_and_setup_npm()
-            
-            self.extracted_files = []
-            self.modified_files = set()
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+            self.root.after(JOB_POLL_MS, self.poll_jobs)
             
         except Exception as e:
             messagebox.showerror("Initialization Error", f"Error during startup: {str(e)}")
             raise
 
+    @property
+    def app_path(self):
+        return self.engine.app_path
+
+    @property
+    def output_dir(self):
+        return self.engine.output_dir
+
+    @property
+    def npm_path(self):
+        return self.engine.npm_path
+
+    @npm_path.setter
+    def npm_path(self, value):
+        self.engine.npm_path = value
+
     def configure_styles(self):
         """Configure modern dark theme styles"""
         style = ttk.Style()
@@ -159,6 +190,8 @@ class ElectronAnalyzer:
         for text, cmd in [
             ("Extract ASAR", self.extract_asar),
             ("Analyze Source Maps", self.analyze_source_maps),
+            ("Scan for Secrets", self.scan_secrets),
+            ("Verify Integrity", self.verify_integrity),
             ("Setup DevTools", self.setup_devtools)
         ]:
             ttk.Button(analysis_frame,
@@ -179,10 +212,63 @@ class ElectronAnalyzer:
                       command=cmd,
                       style='Dark.TButton').pack(fill=tk.X, padx=5, pady=2)
         
+        # Code search frame
+        search_frame = ttk.LabelFrame(main_frame, text="Code Search", style='Dark.TLabelframe')
+        search_frame.pack(fill=tk.X, pady=5)
+        
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame,
+                               textvariable=self.search_var,
+                               bg=self.colors['button_bg'],
+                               fg=self.colors['fg'],
+                               insertbackground=self.colors['fg'])
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        search_entry.bind('<Return>', lambda event: self.search_code())
+        
+        self.search_regex_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame,
+                      text="Regex",
+                      variable=self.search_regex_var,
+                      bg=self.colors['frame_bg'],
+                      fg=self.colors['fg'],
+                      selectcolor=self.colors['button_bg'],
+                      activebackground=self.colors['frame_bg'],
+                      activeforeground=self.colors['fg']).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(search_frame,
+                  text="Search",
+                  command=self.search_code,
+                  style='Dark.TButton').pack(side=tk.RIGHT, padx=5)
+        
         # Console frame
         console_frame = ttk.LabelFrame(main_frame, text="Console Output", style='Dark.TLabelframe')
         console_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
+        # Console options: level filter and log file mirroring
+        options_frame = ttk.Frame(console_frame, style='Dark.TFrame')
+        options_frame.pack(fill=tk.X, padx=5)
+        
+        ttk.Label(options_frame, text="Show:", style='Dark.TLabel').pack(side=tk.LEFT)
+        self.log_level_var = tk.StringVar(value='info')
+        level_box = ttk.Combobox(options_frame,
+                                textvariable=self.log_level_var,
+                                values=list(LEVELS),
+                                state='readonly',
+                                width=10)
+        level_box.pack(side=tk.LEFT, padx=5)
+        level_box.bind('<<ComboboxSelected>>', lambda event: self.filter_console())
+        
+        self.log_file_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame,
+                      text="Save log to file",
+                      variable=self.log_file_var,
+                      command=self.toggle_log_file,
+                      bg=self.colors['frame_bg'],
+                      fg=self.colors['fg'],
+                      selectcolor=self.colors['button_bg'],
+                      activebackground=self.colors['frame_bg'],
+                      activeforeground=self.colors['fg']).pack(side=tk.LEFT, padx=5)
+        
         self.console = tk.Text(console_frame,
                              bg=self.colors['console_bg'],
                              fg=self.colors['console_fg'],
@@ -191,64 +277,116 @@ class ElectronAnalyzer:
                              padx=5,
                              pady=5)
         self.console.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        for level in ('error', 'success', 'warning', 'debug'):
+            self.console.tag_configure(level, foreground=self.colors[level])
+        
+        # Status bar for the running job
+        status_frame = ttk.Frame(main_frame, style='Dark.TFrame')
+        status_frame.pack(fill=tk.X)
+        
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(status_frame,
+                 textvariable=self.status_var,
+                 style='Dark.TLabel').pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        ttk.Button(status_frame,
+                  text="Cancel",
+                  command=self.jobs.cancel_all,
+                  style='Dark.TButton').pack(side=tk.RIGHT, padx=5)
 
-    def log(self, message):
-        """Add message to console"""
-        if hasattr(self, 'console'):
-            self.console.insert(tk.END, f"{message}\n")
-            self.console.see(tk.END)
-            self.root.update()
+    def log(self, message, level='info'):
+        """Add message to the console buffer; safe to call from worker threads"""
+        if hasattr(self, 'log_sink'):
+            self.log_sink.write(message, level)
         else:
             print(message)  # Fallback if console isn't ready
 
-    def find_and_setup_npm(self):
-        """Find NPM and set it up"""
+    def render_log(self, records):
+        """Append records to the console in one update, trimming old lines"""
+        if not records:
+            return
+        chunks = []
+        for _, level, message in records:
+            chunks.extend((f"{message}\n", level_name(level)))
+        self.console.insert(tk.END, *chunks)
+        
+        # Keep the widget as small as the ring buffer behind it
+        lines = int(self.console.index('end-1c').split('.')[0])
+        if lines > CONSOLE_CAPACITY:
+            self.console.delete('1.0', f"{lines - CONSOLE_CAPACITY}.0")
+        self.console.see(tk.END)
+
+    def filter_console(self):
+        """Re-render the buffered log at the newly selected level"""
+        records = self.log_sink.set_level(self.log_level_var.get())
+        self.console.delete('1.0', tk.END)
+        self.render_log(records)
+
+    def toggle_log_file(self):
+        """Mirror the full log stream to a rotating file next to the script"""
+        if self.log_file_var.get():
+            log_path = os.path.join(self.script_dir, 'electron-decompiler.log')
+            self.log_sink.mirror_to_file(log_path)
+            self.log(f"Saving log to: {log_path}")
+        else:
+            self.log_sink.mirror_to_file(None)
+
+    def poll_jobs(self):
+        """Drain worker events and log lines on the Tk thread, once per frame"""
+        def handle(kind, job, payload):
+            if kind == 'progress':
+                self.status_var.set(self.describe_job(job))
+            elif kind == 'done':
+                self.status_var.set(self.describe_job(job, "done"))
+                if job.on_done:
+                    job.on_done(payload)
+            elif kind == 'cancelled':
+                self.status_var.set(self.describe_job(job, "cancelled"))
+                self.log(f"{job.name} cancelled", 'warning')
+            elif kind == 'error':
+                self.status_var.set(self.describe_job(job, "failed"))
+                self.log(f"Error during {job.name}: {str(payload)}", 'error')
+                if job.on_error:
+                    job.on_error(payload)
+                else:
+                    messagebox.showerror("Error", f"{job.name} failed: {str(payload)}")
+        
         try:
-            # Check common Node.js installation paths
-            possible_paths = [
-                r"C:\Program Files\nodejs\npm.cmd",
-                r"C:\Program Files (x86)\nodejs\npm.cmd",
-                os.path.expandvars(r"%APPDATA%\npm\npm.cmd"),
-                os.path.expandvars(r"%ProgramFiles%\nodejs\npm.cmd"),
-                os.path.expandvars(r"%ProgramFiles(x86)%\nodejs\npm.cmd")
-            ]
-            
-            # Try to find npm in PATH first
-            try:
-                result = subprocess.run("where npm.cmd", shell=True, 
-                                     capture_output=True, text=True)
-                if result.returncode == 0:
-                    self.npm_path = result.stdout.strip()
-                    self.log(f"Found NPM at: {self.npm_path}")
-                    return
-            except:
-                pass
-            
-            # Try registry
+            self.jobs.drain(handle)
+            self.render_log(self.log_sink.take_pending())
+        finally:
+            self.root.after(JOB_POLL_MS, self.poll_jobs)
+
+    def describe_job(self, job, state=None):
+        """Status bar text: per-file count and throughput"""
+        text = (f"{job.name}: {job.files} files, {job.bytes / 1048576:.1f} MB "
+                f"({job.rate() / 1048576:.1f} MB/s)")
+        return f"{text} - {state}" if state else text
+
+    def run_job(self, name, func, *args, on_done=None, on_error=None):
+        """Run func(*args) on the worker with engine progress wired to the job"""
+        if self.jobs.busy():
+            messagebox.showinfo("Busy", "Another operation is still running.\n"
+                                        "Wait for it to finish or cancel it first.")
+            return None
+        
+        def work(job):
+            self.engine.progress = job.progress
             try:
-                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, 
-                                  r"SOFTWARE\Node.js", 0, 
-                                  winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
-                    nodejs_path = winreg.QueryValueEx(key, "InstallPath")[0]
-                    npm_path = os.path.join(nodejs_path, "npm.cmd")
-                    if os.path.exists(npm_path):
-                        self.npm_path = npm_path
-                        self.log(f"Found NPM at: {self.npm_path}")
-                        return
-            except:
-                pass
-            
-            # Try common paths
-            for path in possible_paths:
-                if os.path.exists(path):
-                    self.npm_path = path
-                    self.log(f"Found NPM at: {self.npm_path}")
-                    return
-            
-            self.log("NPM not found. Please install Node.js from https://nodejs.org/")
-            
-        except Exception as e:
-            self.log(f"Error finding NPM: {str(e)}")
+                return func(*args)
+            finally:
+                self.engine.progress = None
+        
+        self.status_var.set(f"{name}...")
+        return self.jobs.submit(name, work, on_done=on_done, on_error=on_error)
+
+    def on_close(self):
+        """Cancel background jobs before the window goes away"""
+        self.jobs.shutdown()
+        if self.engine.node:
+            self.engine.node.close()
+        self.log_sink.close()
+        self.root.destroy()
 
     def browse_app(self):
         """Browse for Electron executable"""
@@ -258,56 +396,24 @@ class ElectronAnalyzer:
                 filetypes=[("Executable files", "*.exe"), ("All files", "*.*")]
             )
             if path:
-                # Get the parent directory containing the .exe
-                app_dir = os.path.dirname(path)
                 # Create output directory next to script using exe name without extension
-                app_name = os.path.splitext(os.path.basename(path))[0]
-                self.output_dir = os.path.join(self.script_dir, app_name)
-                os.makedirs(self.output_dir, exist_ok=True)
-                
-                self.app_path = app_dir
+                self.engine.select_app(path, os.path.join(self.script_dir, app_name(path)))
                 self.app_path_var.set(path)
-                self.log(f"Selected application: {path}")
-                self.log(f"Working directory: {self.output_dir}")
                 
         except Exception as e:
-            self.log(f"Error selecting application: {str(e)}")
+            self.log(f"Error selecting application: {str(e)}", 'error')
 
     def install_tools(self):
         """Install required npm packages"""
-        if not self.npm_path:
+        # npm is only looked for now, the first time it is needed
+        if not self.engine.find_npm():
             msg = ("NPM not found. Please install Node.js from:\n"
                   "https://nodejs.org/en/download/\n"
                   "and restart this application.")
             messagebox.showerror("Error", msg)
             return
             
-        tools = [
-            'electron-fiddle',
-            'asar',
-            'source-map-explorer',
-            'electron-devtools-installer',
-            'electron-debug',
-            'devtron'
-        ]
-        
-        for tool in tools:
-            try:
-                self.log(f"Installing {tool}...")
-                # Use full path to npm.cmd and run with shell=True
-                cmd = f'"{self.npm_path}" install -g {tool}'
-                process = subprocess.run(cmd, shell=True, 
-                                      capture_output=True, text=True)
-                
-                if process.returncode == 0:
-                    self.log(f"Successfully installed {tool}")
-                else:
-                    self.log(f"Error installing {tool}: {process.stderr}")
-                    
-            except Exception as e:
-                self.log(f"Error installing {tool}: {str(e)}")
-                
-        self.log("\nAll tools installation completed.")
+        self.run_job("Install Tools", self.engine.install_tools)
         
     def extract_asar(self):
         """Extract ASAR archive"""
@@ -315,177 +421,19 @@ class ElectronAnalyzer:
             messagebox.showerror("Error", "Please select an application first")
             return
             
-        if not self.npm_path:
-            messagebox.showerror("Error", "NPM not found. Please install Node.js first")
-            return
-            
-        try:
-            self.log("\nSearching for ASAR files...")
-            found_asar = False
-            
-            # First check if the selected path is itself an ASAR file
-            if self.app_path.endswith('.asar'):
-                found_asar = True
-                if self.extract_single_asar(self.app_path):
-                    return True
-            
-            # Get the actual application directory (parent of the .exe)
-            app_dir = os.path.dirname(self.app_path)
-            self.log(f"Searching in application directory: {app_dir}")
-            
-            # Expanded list of common locations relative to the .exe location
-            common_paths = [
-                os.path.join(app_dir, 'resources', 'app.asar'),
-                os.path.join(app_dir, 'resources', 'default_app.asar'),
-                os.path.join(app_dir, 'app.asar'),
-                os.path.join(app_dir, 'resources', 'app', 'app.asar'),
-                os.path.join(app_dir, 'Contents', 'Resources', 'app.asar'),
-                os.path.join(app_dir, 'Contents', 'Resources', 'default_app.asar'),
-                os.path.join(app_dir, 'resources', 'electron.asar'),
-                os.path.join(app_dir, 'resources', 'default_app', 'app.asar'),
-                # Add parent directory locations
-                os.path.join(os.path.dirname(app_dir), 'resources', 'app.asar'),
-                os.path.join(os.path.dirname(app_dir), 'app.asar')
-            ]
-            
-            # First check common locations
-            for asar_path in common_paths:
-                if os.path.exists(asar_path):
-                    found_asar = True
-                    self.log(f"\nFound ASAR: {asar_path}")
-                    if self.extract_single_asar(asar_path):
-                        return True
-            
-            # If no ASAR found in common locations, do a deep search
-            if not found_asar:
-                self.log("No ASAR found in common locations. Performing deep search...")
-                # Search up to 2 parent directories
-                search_dirs = [
-                    app_dir,
-                    os.path.dirname(app_dir),
-                    os.path.dirname(os.path.dirname(app_dir))
-                ]
-                
-                for search_dir in search_dirs:
-                    self.log(f"Searching in: {search_dir}")
-                    for root, _, files in os.walk(search_dir):
-                        for file in files:
-                            if file.endswith('.asar'):
-                                found_asar = True
-                                asar_path = os.path.join(root, file)
-                                self.log(f"\nFound ASAR: {asar_path}")
-                                if self.extract_single_asar(asar_path):
-                                    return True
-            
-            # Handle unpacked resources if no ASAR found
-            if not found_asar:
-                self.log("\nNo ASAR files found. Looking for unpacked resources...")
-                if self.handle_unpacked_resources(app_dir):
-                    return True
-                
-                self.log("\nTrying alternative extraction methods...")
-                # Try to find and extract any packed JavaScript files
-                if self.extract_packed_js(app_dir):
-                    return True
-            
-            self.log("\nNo extractable resources found.")
-            messagebox.showwarning("Warning", 
-                                 "Could not find any ASAR files or resources to extract.\n"
-                                 "The application might be using a different packaging method.")
-            
-        except Exception as e:
-            self.log(f"Error during extraction process: {str(e)}")
-            messagebox.showerror("Error", f"Extraction failed: {str(e)}")
-            return False
+        self.run_job("Extract ASAR", self.engine.extract_asar, on_done=self.extraction_finished)
 
-    def extract_single_asar(self, asar_path):
-        """Extract a single ASAR file"""
-        try:
-            # Create unique extraction directory based on ASAR name
-            asar_name = os.path.splitext(os.path.basename(asar_path))[0]
-            extract_dir = os.path.join(self.output_dir, f'extracted_{asar_name}')
-            os.makedirs(extract_dir, exist_ok=True)
-            
-            # Try multiple extraction methods
-            methods = [
-                # Method 1: npm exec asar
-                lambda: subprocess.run(
-                    f'"{self.npm_path}" exec asar extract "{asar_path}" "{extract_dir}"',
-                    shell=True, capture_output=True, text=True
-                ),
-                # Method 2: global asar
-                lambda: subprocess.run(
-                    f'asar extract "{asar_path}" "{extract_dir}"',
-                    shell=True, capture_output=True, text=True
-                ),
-                # Method 3: npx asar
-                lambda: subprocess.run(
-                    f'"{self.npm_path}" exec --yes asar extract "{asar_path}" "{extract_dir}"',
-                    shell=True, capture_output=True, text=True
-                )
-            ]
-            
-            for method in methods:
-                try:
-                    result = method()
-                    if result.returncode == 0:
-                        self.log(f"Successfully extracted to: {extract_dir}")
-                        self.extracted_files = self.get_extracted_files(extract_dir)
-                        self.modified_files = set()
-                        os.startfile(extract_dir)
-                        return True
-                except Exception as e:
-                    self.log(f"Method failed: {str(e)}")
-                    continue
-                
-            self.log("All extraction methods failed")
-            return False
+    def extraction_finished(self, method):
+        """Open the extracted tree, or explain that nothing was found"""
+        if method:
+            os.startfile(self.engine.extract_dir)
+            # Keep the search index current; unchanged files are skipped
+            self.run_job("Index Code", self.engine.build_search_index)
+            return
             
-        except Exception as e:
-            self.log(f"Error extracting {asar_path}: {str(e)}")
-            return False
-
-    def handle_unpacked_resources(self, directory):
-        """Handle cases where no ASAR files are found"""
-        self.log("\nNo ASAR files found. Checking for unpacked resources...")
-        
-        # List of common resource directories
-        resource_dirs = [
-            os.path.join(directory, 'resources'),
-            os.path.join(directory, 'Resources'),
-            os.path.join(directory, 'app'),
-            os.path.join(directory, 'resources', 'app'),
-            os.path.join(directory, 'Contents', 'Resources')
-        ]
-        
-        found = False
-        for res_dir in resource_dirs:
-            if os.path.exists(res_dir):
-                found = True
-                self.log(f"Found resources directory: {res_dir}")
-                try:
-                    dest_dir = os.path.join(self.output_dir, 'resources')
-                    shutil.copytree(res_dir, dest_dir, dirs_exist_ok=True)
-                    self.log(f"Copied resources to: {dest_dir}")
-                    self.extracted_files = self.get_extracted_files(dest_dir)
-                    self.modified_files = set()
-                    os.startfile(dest_dir)
-                    break
-                except Exception as e:
-                    self.log(f"Error copying resources: {str(e)}")
-                
-        if not found:
-            self.log("No resources directory found")
-            messagebox.showwarning("Warning", 
-                                 "No ASAR files or resources directory found.")
-
-    def get_extracted_files(self, directory):
-        """Recursively get all files in extracted directory"""
-        files = []
-        for root, _, filenames in os.walk(directory):
-            for filename in filenames:
-                files.append(os.path.join(root, filename))
-        return files
+        messagebox.showwarning("Warning", 
+                             "Could not find any ASAR files or resources to extract.\n"
+                             "The application might be using a different packaging method.")
 
     def analyze_source_maps(self):
         """Analyze source maps if available"""
@@ -493,20 +441,46 @@ class ElectronAnalyzer:
             messagebox.showerror("Error", "Please extract ASAR first")
             return
             
-        try:
-            # Look for .js.map files
-            for root, _, files in os.walk(self.output_dir):
-                for file in files:
-                    if file.endswith('.js.map'):
-                        map_path = os.path.join(root, file)
-                        js_path = map_path[:-4]  # Remove .map extension
-                        if os.path.exists(js_path):
-                            self.log(f"\nAnalyzing source map: {file}")
-                            subprocess.run(['source-map-explorer', js_path], check=True)
-                            
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error analyzing source maps: {str(e)}")
+        self.run_job("Analyze Source Maps", self.engine.analyze_source_maps,
+                     on_error=lambda e: self.log(f"Error analyzing source maps: {str(e)}", 'error'))
+
+    def scan_secrets(self):
+        """Look for hard-coded keys, URLs and IPC channels in the extracted code"""
+        if not self.engine.extract_dir:
+            messagebox.showerror("Error", "Please extract ASAR first")
+            return
+            
+        self.run_job("Scan Secrets", self.engine.scan_secrets,
+                     on_error=lambda e: self.log(f"Error scanning for secrets: {str(e)}", 'error'))
+            
+    def search_code(self):
+        """Search the extracted code through the trigram index"""
+        query = self.search_var.get()
+        if not query:
+            return
+        if not self.engine.extract_dir:
+            messagebox.showerror("Error", "Please extract ASAR first")
+            return
+            
+        self.run_job("Search", self.engine.search, query, self.search_regex_var.get(),
+                     on_error=lambda e: self.log(f"Search failed: {str(e)}", 'error'))
+
+    def verify_integrity(self):
+        """Check the archive against its integrity hashes"""
+        if not self.app_path:
+            messagebox.showerror("Error", "Please select an application first")
+            return
             
+        self.run_job("Verify Integrity", self.engine.verify_integrity,
+                     on_done=self.verification_finished)
+
+    def verification_finished(self, report):
+        """Point out mismatches that would stop the app from launching"""
+        if not report['ok']:
+            messagebox.showwarning("Integrity",
+                                 f"{len(report['mismatches'])} integrity mismatches found.\n"
+                                 "See the console for details.")
+
     def setup_devtools(self):
         """Setup development tools"""
         if not self.output_dir:
@@ -514,26 +488,9 @@ class ElectronAnalyzer:
             return
             
         try:
-            # Create a development config
-            dev_config = {
-                "devTools": True,
-                "openDevTools": True,
-                "devtron": True,
-                "sourceMapSupport": True
-            }
-            
-            config_path = os.path.join(self.output_dir, 'dev-config.json')
-            os.makedirs(os.path.dirname(config_path), exist_ok=True)
-            
-            with open(config_path, 'w') as f:
-                json.dump(dev_config, f, indent=2)
-                
-            self.log("\nDevelopment configuration created:")
-            self.log(f"Config saved to: {config_path}")
-            self.log("Add these settings to your main process file to enable DevTools")
-            
+            self.engine.setup_devtools()
         except Exception as e:
-            self.log(f"Error setting up DevTools: {str(e)}")
+            self.log(f"Error setting up DevTools: {str(e)}", 'error')
             
     def edit_files(self):
         """Open file browser to edit extracted files"""
@@ -560,7 +517,7 @@ class ElectronAnalyzer:
             self.log("4. Click 'Recompile Changes' when done")
             
         except Exception as e:
-            self.log(f"Error opening editor: {str(e)}")
+            self.log(f"Error opening editor: {str(e)}", 'error')
             
     def recompile_changes(self):
         """Recompile modified files back into ASAR"""
@@ -569,19 +526,10 @@ class ElectronAnalyzer:
             return
             
         try:
-            self.log("\nPreparing to recompile changes...")
-            
-            # Find all potential ASAR locations
-            asar_locations = [
-                os.path.join(self.app_path, 'resources', 'app.asar'),
-                os.path.join(self.app_path, 'resources', 'default_app.asar'),
-                os.path.join(self.app_path, 'app.asar')
-            ]
-            
-            original_asars = [path for path in asar_locations if os.path.exists(path)]
+            original_asars = self.engine.find_original_asars()
             
             if not original_asars:
-                self.log("Warning: Could not find original ASAR file")
+                self.log("Warning: Could not find original ASAR file", 'warning')
                 # Ask user where to save the new ASAR
                 save_path = filedialog.asksaveasfilename(
                     defaultextension=".asar",
@@ -592,93 +540,17 @@ class ElectronAnalyzer:
                     return
                 original_asars = [save_path]
             
-            for original_asar in original_asars:
-                try:
-                    # Create backup
-                    backup_path = original_asar + '.backup'
-                    if os.path.exists(original_asar):
-                        shutil.copy2(original_asar, backup_path)
-                        self.log(f"Created backup at: {backup_path}")
-                    
-                    # Pack modified files
-                    new_asar = os.path.join(self.output_dir, 'app.asar')
-                    self.log(f"Creating new ASAR at: {new_asar}")
-                    
-                    # Try multiple packing methods
-                    pack_methods = [
-                        f'"{self.npm_path}" exec asar pack "{self.output_dir}" "{new_asar}"',
-                        f'asar pack "{self.output_dir}" "{new_asar}"',
-                        f'"{self.npm_path}" exec --yes asar pack "{self.output_dir}" "{new_asar}"'
-                    ]
-                    
-                    success = False
-                    for cmd in pack_methods:
-                        try:
-                            self.log(f"Trying: {cmd}")
-                            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                            if result.returncode == 0:
-                                success = True
-                                break
-                        except Exception as e:
-                            self.log(f"Method failed: {str(e)}")
-                    
-                    if not success:
-                        raise Exception("All packing methods failed")
-                    
-                    self.log("Successfully created new ASAR")
-                    
-                    # Try to replace original ASAR with elevated privileges
-                    if os.path.exists(original_asar):
-                        if self.replace_asar(new_asar, original_asar):
-                            self.log("Successfully replaced original ASAR")
-                            messagebox.showinfo("Success", 
-                                              "Changes have been recompiled and applied.\n"
-                                              f"Original file replaced at:\n{original_asar}")
-                            return True
-                        
-                except Exception as e:
-                    self.log(f"Error processing {original_asar}: {str(e)}")
-                    
-            raise Exception("Failed to replace any ASAR files")
+            self.run_job("Recompile", self.engine.recompile, original_asars,
+                         on_done=lambda replaced: messagebox.showinfo(
+                             "Success",
+                             "Changes have been recompiled and applied.\n"
+                             f"Original file replaced at:\n{replaced}"))
             
         except Exception as e:
-            self.log(f"Error during recompilation: {str(e)}")
+            self.log(f"Error during recompilation: {str(e)}", 'error')
             messagebox.showerror("Error", f"Recompilation failed: {str(e)}")
             return False
 
-    def replace_asar(self, new_asar, original_asar):
-        """Try multiple methods to replace the original ASAR file"""
-        methods = [
-            # Method 1: Direct replacement
-            lambda: os.replace(new_asar, original_asar),
-            
-            # Method 2: Take ownership and set permissions
-            lambda: self.take_ownership_and_replace(new_asar, original_asar),
-            
-            # Method 3: PowerShell elevated copy
-            lambda: subprocess.run(
-                f'powershell Start-Process cmd -Verb RunAs -ArgumentList "/c copy /Y \\"{new_asar}\\" \\"{original_asar}\\""',
-                shell=True
-            )
-        ]
-        
-        for method in methods:
-            try:
-                method()
-                if os.path.exists(original_asar):
-                    return True
-            except Exception as e:
-                self.log(f"Replacement method failed: {str(e)}")
-                continue
-            
-        return False
-
-    def take_ownership_and_replace(self, new_asar, original_asar):
-        """Take ownership of file and replace it"""
-        subprocess.run(['takeown', '/F', original_asar], shell=True, check=True)
-        subprocess.run(['icacls', original_asar, '/grant', 'administrators:F'], shell=True, check=True)
-        os.replace(new_asar, original_asar)
-
     def show_instructions(self):
         """Show readme/instructions window"""
         readme = tk.Toplevel(self.root)
@@ -719,6 +591,7 @@ Step-by-Step Guide:
    - Click "Extract ASAR" to decompile the application
    - Files will be extracted to: [script_directory]/[app_name]/
    - "Analyze Source Maps" helps understand the code structure
+   - "Scan for Secrets" lists keys, URLs, IPC channels and update feeds
    - "Setup DevTools" enables development tools
 
 4. Making Modifications:
@@ -763,46 +636,6 @@ Notes:
         close_btn = ttk.Button(readme, text="Close", command=readme.destroy)
         close_btn.pack(pady=5)
 
-    def extract_packed_js(self, directory):
-        """Try to find and extract packed JavaScript files"""
-        try:
-            js_files = []
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if file.endswith('.js'):
-                        js_files.append(os.path.join(root, file))
-            
-            if not js_files:
-                return False
-            
-            # Create extraction directory
-            extract_dir = os.path.join(self.output_dir, 'extracted_js')
-            os.makedirs(extract_dir, exist_ok=True)
-            
-            found_content = False
-            for js_file in js_files:
-                try:
-                    # Copy the file to extraction directory
-                    dest_file = os.path.join(extract_dir, os.path.basename(js_file))
-                    shutil.copy2(js_file, dest_file)
-                    found_content = True
-                    self.log(f"Copied JavaScript file: {os.path.basename(js_file)}")
-                except Exception as e:
-                    self.log(f"Error copying {js_file}: {str(e)}")
-            
-            if found_content:
-                self.log(f"\nExtracted JavaScript files to: {extract_dir}")
-                self.extracted_files = self.get_extracted_files(extract_dir)
-                self.modified_files = set()
-                os.startfile(extract_dir)
-                return True
-            
-            return False
-            
-        except Exception as e:
-            self.log(f"Error extracting JavaScript files: {str(e)}")
-            return False
-
     def run(self):
         """Start the application"""
         try:
@@ -813,6 +646,15 @@ Notes:
 
 def main():
     """Main entry point for the application"""
+    # In a frozen build, pool workers start this executable again; this
+    # turns them into workers before the arguments are looked at
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # Any arguments mean a headless command-line run
+        from analyzer_engine import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+        
     try:
         # Run the application
         app = ElectronAnalyzer()
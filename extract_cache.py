@@ -0,0 +1,287 @@
+import os
+import json
+import stat
+import time
+import shutil
+import hashlib
+from collections import Counter
+
+from asar_archive import PathList
+from content_store import ContentStore, place_file
+
+# Default disk budget for cached trees
+DEFAULT_BUDGET = 10 * 1024 * 1024 * 1024
+
+# Ways to put a cached tree into a workspace
+LINK_MODES = ('auto', 'reflink', 'hardlink', 'copy', 'direct')
+
+
+def _make_writable(path):
+    os.chmod(path, os.stat(path).st_mode | stat.S_IWUSR)
+
+
+def _remove_tree(path):
+    """rmtree that copes with the read-only files the cache stores"""
+    def retry(func, target, _):
+        _make_writable(target)
+        func(target)
+    shutil.rmtree(path, onerror=retry)
+
+
+class ExtractionCache:
+    """Content-addressed store of extracted archive trees
+
+    Trees are keyed by a hash of the archive header plus the archive size,
+    so the same build is recognised wherever it lives. The header's
+    integrity hashes vouch for the file contents; for archives without
+    them the archive's mtime is part of the key too, so an edit that keeps
+    every size the same still misses. File bodies live in
+    a shared ContentStore and each tree is hardlinks into it, so files that
+    repeat across versions and apps are stored once. Cached files are
+    read-only and are checked against their recorded size and mtime before
+    every reuse; a tree that was modified through a hardlink is dropped and
+    extracted again. Entries are evicted least-recently-used first once the
+    distinct content they hold exceeds the disk budget.
+    """
+
+    def __init__(self, root, budget=DEFAULT_BUDGET, link_mode='auto'):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}")
+        self.root = root
+        self.budget = budget
+        self.link_mode = link_mode
+        self.entries_dir = os.path.join(root, 'entries')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        self.objects = ContentStore(root)
+
+    @staticmethod
+    def key_for(archive):
+        """Cache key of an open AsarArchive"""
+        st = os.fstat(archive._file.fileno())
+        digest = hashlib.sha256(archive.header_string.encode('utf-8'))
+        digest.update(str(st.st_size).encode())
+        hashed = all('integrity' in node for _, node in archive.iter_entries()
+                     if 'files' not in node and 'link' not in node)
+        if not hashed:
+            digest.update(f"#{st.st_mtime_ns}".encode())
+        if archive.offset:
+            digest.update(f"@{archive.offset}".encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.entries_dir, key)
+
+    def _load_entry(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), 'entry.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _record(self, event, **fields):
+        """Append one event to the stats log; appends are safe across processes"""
+        fields.update(event=event, time=time.time())
+        with open(os.path.join(self.root, 'stats.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(fields) + '\n')
+
+    def _damaged(self, key, entry):
+        """Cached files whose size or mtime no longer match; None if any is missing"""
+        tree = os.path.join(self._entry_dir(key), 'tree')
+        damaged = []
+        for rel_path, info in entry['files'].items():
+            try:
+                st = os.stat(os.path.join(tree, *rel_path.split('/')))
+            except OSError:
+                return None
+            if st.st_size != info['size'] or st.st_mtime_ns != info['mtime_ns']:
+                damaged.append(st)
+        return damaged
+
+    def lookup(self, key):
+        """The cached entry for key, or None on a miss or a damaged entry"""
+        entry = self._load_entry(key)
+        if entry is None:
+            return None
+        damaged = self._damaged(key, entry)
+        if damaged != []:
+            # A body edited through a hardlink is wrong for every tree sharing
+            # it, so drop it from the store as well as this entry
+            if damaged:
+                self.objects.discard({(st.st_dev, st.st_ino) for st in damaged})
+            self._record('invalidated', key=key)
+            _remove_tree(self._entry_dir(key))
+            return None
+        # Entry mtime doubles as the LRU clock
+        os.utime(os.path.join(self._entry_dir(key), 'entry.json'))
+        self._record('hit', key=key, bytes=entry['bytes'])
+        return entry
+
+    def store(self, key, archive, progress=None):
+        """Extract archive into the cache and return its entry"""
+        staging = os.path.join(self.root, f'staging-{key}-{os.getpid()}')
+        if os.path.exists(staging):
+            _remove_tree(staging)
+        tree = os.path.join(staging, 'tree')
+        manifest_path = os.path.join(staging, 'manifest.json')
+        try:
+            archive.extract(tree, manifest_path=manifest_path, progress=progress, store=self.objects)
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                files = json.load(f)['files']
+            os.remove(manifest_path)
+            total = sum(info['size'] for info in files.values())
+
+            entry = {
+                'key': key,
+                'archive': os.path.abspath(archive.path),
+                'bytes': total,
+                'created': time.time(),
+                'files': files
+            }
+            with open(os.path.join(staging, 'entry.json'), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+
+            try:
+                os.rename(staging, self._entry_dir(key))
+            except OSError:
+                # Another process cached the same build first; keep theirs
+                _remove_tree(staging)
+                entry = self._load_entry(key) or entry
+        except BaseException:
+            if os.path.exists(staging):
+                _remove_tree(staging)
+            raise
+
+        self._record('miss', key=key, bytes=total)
+        self.evict(keep=key)
+        return entry
+
+    def tree_path(self, key):
+        """Directory holding the cached tree for key"""
+        return os.path.join(self._entry_dir(key), 'tree')
+
+    def materialize(self, key, entry, dest_dir, progress=None):
+        """Make the cached tree appear at dest_dir and return the file paths
+
+        Uses reflinks or hardlinks where the link mode and filesystem allow,
+        falling back to plain copies. Copies keep the cached mtimes so the
+        cached manifest stays valid for incremental repacks.
+        """
+        tree = self.tree_path(key)
+        modes = {
+            'auto': ['reflink', 'hardlink', 'copy'],
+            'reflink': ['reflink', 'copy'],
+            'hardlink': ['hardlink', 'copy'],
+            'copy': ['copy']
+        }[self.link_mode]
+
+        written = PathList(dest_dir)
+        for root, dirs, files in os.walk(tree):
+            rel_root = os.path.relpath(root, tree)
+            target_root = dest_dir if rel_root == '.' else os.path.join(dest_dir, rel_root)
+            os.makedirs(target_root, exist_ok=True)
+            for name in dirs:
+                source = os.path.join(root, name)
+                if os.path.islink(source):
+                    self._link_symlink(source, os.path.join(target_root, name))
+            for name in files:
+                source = os.path.join(root, name)
+                target = os.path.join(target_root, name)
+                if os.path.islink(source):
+                    self._link_symlink(source, target)
+                    continue
+                modes = place_file(modes, source, target)
+                written.append(target)
+                if progress:
+                    progress(1, 0)
+        return written
+
+    @staticmethod
+    def _link_symlink(source, target):
+        if os.path.lexists(target):
+            os.remove(target)
+        try:
+            os.symlink(os.readlink(source), target)
+        except OSError:
+            pass
+
+    def entries(self):
+        """(key, entry, last_used) for every cached tree"""
+        found = []
+        for key in os.listdir(self.entries_dir):
+            entry_file = os.path.join(self.entries_dir, key, 'entry.json')
+            try:
+                last_used = os.stat(entry_file).st_mtime
+            except OSError:
+                continue
+            entry = self._load_entry(key)
+            if entry:
+                found.append((key, entry, last_used))
+        return found
+
+    @staticmethod
+    def _contents(entry):
+        """{digest: size} of the distinct bodies in an entry"""
+        return {info['integrity']['hash']: info['size'] for info in entry['files'].values()}
+
+    def evict(self, keep=None):
+        """Drop least-recently-used trees until the cache fits its budget
+
+        The budget counts each distinct body once, however many cached
+        versions share it. Bodies still linked from a workspace stay on
+        disk after eviction but no longer count against the cache.
+        """
+        entries = sorted(self.entries(), key=lambda item: item[2])
+        references = Counter()
+        sizes = {}
+        for _, entry, _ in entries:
+            contents = self._contents(entry)
+            references.update(contents.keys())
+            sizes.update(contents)
+        used = sum(sizes.values())
+
+        for key, entry, _ in entries:
+            if used <= self.budget:
+                break
+            if key == keep:
+                continue
+            _remove_tree(self._entry_dir(key))
+            for digest, size in self._contents(entry).items():
+                references[digest] -= 1
+                if not references[digest]:
+                    used -= size
+            self._record('evicted', key=key, bytes=entry['bytes'])
+        self.objects.gc()
+
+    def stats(self):
+        """Hits, misses, bytes saved and current usage"""
+        report = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidated': 0, 'bytes_saved': 0}
+        try:
+            with open(os.path.join(self.root, 'stats.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    kind = event.get('event')
+                    if kind == 'hit':
+                        report['hits'] += 1
+                        report['bytes_saved'] += event.get('bytes', 0)
+                    elif kind == 'miss':
+                        report['misses'] += 1
+                    elif kind == 'evicted':
+                        report['evictions'] += 1
+                    elif kind == 'invalidated':
+                        report['invalidated'] += 1
+        except OSError:
+            pass
+        entries = self.entries()
+        stored = {}
+        for _, entry, _ in entries:
+            stored.update(self._contents(entry))
+        report.update(
+            entries=len(entries),
+            bytes=sum(entry['bytes'] for _, entry, _ in entries),
+            stored_bytes=sum(stored.values()),
+            budget=self.budget
+        )
+        return report
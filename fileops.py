@@ -0,0 +1,271 @@
+import os
+import json
+import stat
+import shutil
+import fnmatch
+import threading
+
+from asar_archive import copy_file, file_sha256
+
+# Files the JavaScript fallback collects by default
+JS_PATTERNS = ('*.js', '*.mjs', '*.cjs')
+
+def _matches(name, rel_path, patterns):
+    """Whether a glob matches an entry's name or its relative path"""
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern) for pattern in patterns)
+
+
+def _scan(root, include=('*',), exclude=(), skip=()):
+    """Yield (DirEntry, rel_path) for matching files under root in one scandir pass"""
+    skip = {os.path.normcase(os.path.abspath(path)) for path in skip if path}
+    stack = [(root, '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if exclude and _matches(entry.name, rel_path, exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.normcase(os.path.abspath(entry.path)) not in skip:
+                        subdirs.append((entry.path, rel_path))
+                    continue
+                if not entry.is_file() or not _matches(entry.name, rel_path, include):
+                    continue
+            except OSError:
+                continue
+            yield entry, rel_path
+        # Depth-first in name order, so output is stable from run to run
+        stack.extend(reversed(subdirs))
+
+
+def iter_files(root, include=('*',), exclude=(), min_size=0, max_size=None, skip=()):
+    """Yield (path, rel_path, size) for matching files under root as they are found
+
+    A single scandir pass; directory symlinks are not followed. exclude
+    globs prune directories as well as files, and any directory in skip
+    (such as an output folder inside the app) is never entered.
+    """
+    for entry, rel_path in _scan(root, include, exclude, skip):
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        if size < min_size or (max_size is not None and size > max_size):
+            continue
+        yield entry.path, rel_path, size
+
+
+class _Deduper:
+    """Spots files whose content was already seen, hashing only on size collisions
+
+    The first file of each size is taken without being read. Only when a
+    second file of the same size turns up are both hashed, so trees of
+    mostly distinct files cost one stat per file and no extra reads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.first_of_size = {}
+        self.seen = {}
+
+    def original_of(self, path, rel_path, size):
+        """rel_path of an earlier file with the same content, or None"""
+        with self.lock:
+            first = self.first_of_size.get(size)
+            if first is None:
+                self.first_of_size[size] = (path, rel_path)
+                return None
+        if first:
+            first_digest = file_sha256(first[0])
+        digest = file_sha256(path)
+        with self.lock:
+            if self.first_of_size[size]:
+                self.seen.setdefault(first_digest, first[1])
+                # Every later file of this size is hashed, so forget the path
+                self.first_of_size[size] = ()
+            original = self.seen.setdefault(digest, rel_path)
+        return None if original == rel_path else original
+
+
+def _copy_one(path, rel_path, dest_dir, deduper):
+    """Copy one file below dest_dir; returns (original, error) for the caller"""
+    try:
+        if deduper:
+            original = deduper.original_of(path, rel_path, os.stat(path).st_size)
+            if original:
+                return original, None
+        target = os.path.join(dest_dir, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.lexists(target):
+            os.remove(target)
+        copy_file(path, target)
+        shutil.copystat(path, target)
+        os.chmod(target, os.stat(target).st_mode | stat.S_IWUSR)
+        return None, None
+    except OSError as e:
+        return None, str(e)
+
+
+def copy_files(files, dest_dir, jobs=None, dedupe=True, progress=None):
+    """Copy (path, rel_path, size) items below dest_dir, keeping relative paths
+
+    files may be a generator; copying starts as soon as the first item
+    arrives and at most a few items per worker are queued at once. Copies
+    go through copy_file, so the kernel moves the data where it can. With
+    dedupe, a file whose content was already copied is skipped and listed
+    in the summary's duplicates as {rel_path: rel_path of the copy}.
+    progress(files, bytes) is called from the calling thread.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    jobs = jobs or min(32, (os.cpu_count() or 1) + 4)
+    deduper = _Deduper() if dedupe else None
+    summary = {'copied': 0, 'bytes': 0, 'duplicates': {}, 'errors': []}
+    pending = {}
+
+    def harvest(futures):
+        for future in futures:
+            rel_path, size = pending.pop(future)
+            original, error = future.result()
+            if error:
+                summary['errors'].append((rel_path, error))
+                continue
+            if original:
+                summary['duplicates'][rel_path] = original
+            else:
+                summary['copied'] += 1
+                summary['bytes'] += size
+            if progress:
+                progress(1, 0 if original else size)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        try:
+            for path, rel_path, size in files:
+                while len(pending) >= jobs * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    harvest(done)
+                pending[pool.submit(_copy_one, path, rel_path, dest_dir, deduper)] = (rel_path, size)
+            harvest(list(pending))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return summary
+
+
+def _load_sync_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest['source'], manifest['files']
+    except (OSError, ValueError, KeyError):
+        return None, {}
+
+
+def _remove_empty_dirs(dest_dir, rel_path):
+    """Remove the now-empty parents of a deleted file, stopping at dest_dir"""
+    parts = rel_path.split('/')[:-1]
+    while parts:
+        try:
+            os.rmdir(os.path.join(dest_dir, *parts))
+        except OSError:
+            return
+        parts.pop()
+
+
+def sync_tree(src_dir, dest_dir, manifest_path, checksum=False, jobs=None, progress=None):
+    """Make dest_dir a copy of src_dir, copying only what changed since the last sync
+
+    The manifest records each file's size and mtime in the source and the
+    mtime of the copy. A file is skipped when both are unchanged. With
+    checksum, the SHA-256 of each copied file is recorded too, and a file
+    whose mtime changed but whose content did not is skipped. Files synced
+    before but gone from the source are deleted, while files added to
+    dest_dir by hand are left alone. New and changed files are copied in
+    parallel through copy_files. Returns counts of files copied, skipped
+    and deleted, bytes copied and skipped, and a list of (rel_path, error)
+    for files that failed.
+    """
+    source = os.path.abspath(src_dir)
+    previous_source, previous = _load_sync_manifest(manifest_path)
+    if previous_source != source:
+        # Still used below to clear out what the old source left behind
+        trusted = {}
+    else:
+        trusted = previous
+    report = {'copied': 0, 'skipped': 0, 'deleted': 0, 'bytes_copied': 0, 'bytes_skipped': 0, 'errors': []}
+    files = {}
+    current = set()
+    changed = []
+
+    for entry, rel_path in _scan(src_dir, skip=[dest_dir]):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        current.add(rel_path)
+        record = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        known = trusted.get(rel_path)
+        if known and known['size'] == st.st_size:
+            try:
+                copy_st = os.stat(os.path.join(dest_dir, *rel_path.split('/')))
+                intact = copy_st.st_size == st.st_size and copy_st.st_mtime_ns == known['dest_mtime_ns']
+            except OSError:
+                intact = False
+            if intact and known['mtime_ns'] == st.st_mtime_ns:
+                files[rel_path] = known
+                report['skipped'] += 1
+                report['bytes_skipped'] += st.st_size
+                if progress:
+                    progress(1, 0)
+                continue
+            if intact and checksum and known.get('hash') and file_sha256(entry.path) == known['hash']:
+                record.update(dest_mtime_ns=known['dest_mtime_ns'], hash=known['hash'])
+                files[rel_path] = record
+                report['skipped'] += 1
+                report['bytes_skipped'] += st.st_size
+                if progress:
+                    progress(1, 0)
+                continue
+        files[rel_path] = record
+        changed.append((entry.path, rel_path, st.st_size))
+
+    result = copy_files(changed, dest_dir, jobs=jobs, dedupe=False, progress=progress)
+    report['copied'] = result['copied']
+    report['bytes_copied'] = result['bytes']
+    report['errors'] = result['errors']
+    for rel_path, _ in result['errors']:
+        # Not recorded, so the next sync tries again
+        del files[rel_path]
+
+    copied = [rel_path for _, rel_path, _ in changed if rel_path in files]
+    for rel_path in copied:
+        files[rel_path]['dest_mtime_ns'] = os.stat(os.path.join(dest_dir, *rel_path.split('/'))).st_mtime_ns
+    if checksum:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) + 4)) as pool:
+            paths = [os.path.join(src_dir, *rel_path.split('/')) for rel_path in copied]
+            for rel_path, digest in zip(copied, pool.map(file_sha256, paths)):
+                files[rel_path]['hash'] = digest
+
+    for rel_path in previous:
+        if rel_path in current:
+            continue
+        target = os.path.join(dest_dir, *rel_path.split('/'))
+        try:
+            os.remove(target)
+            report['deleted'] += 1
+        except FileNotFoundError:
+            pass
+        _remove_empty_dirs(dest_dir, rel_path)
+
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'source': source, 'files': files}, f)
+    os.replace(temp_path, manifest_path)
+    return report
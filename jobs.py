@@ -0,0 +1,129 @@
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Minimum seconds between progress events posted by one job
+PROGRESS_INTERVAL = 0.1
+
+
+class JobCancelled(BaseException):
+    """Raised inside a job once it has been asked to stop
+
+    Derives from BaseException so the engine's broad `except Exception`
+    fallbacks don't swallow it and carry on with the next method.
+    """
+
+
+class Job:
+    """One background operation and its progress counters"""
+
+    def __init__(self, name, events, on_done=None, on_error=None):
+        self.name = name
+        self.on_done = on_done
+        self.on_error = on_error
+        self.files = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._events = events
+        self._cancel = threading.Event()
+        self._last_post = 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Ask the job to stop at its next progress check"""
+        self._cancel.set()
+
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self):
+        """Throughput so far in bytes per second"""
+        elapsed = self.elapsed()
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def progress(self, files=0, nbytes=0):
+        """Count finished work; posts a throttled progress event and checks for cancel"""
+        self.files += files
+        self.bytes += nbytes
+        now = time.monotonic()
+        if now - self._last_post >= PROGRESS_INTERVAL:
+            self._last_post = now
+            self._events.put(('progress', self, None))
+        self.check()
+
+
+class JobScheduler:
+    """Runs jobs on worker threads and hands their events to the UI thread
+
+    Workers only ever touch the thread-safe events queue; the UI drains it
+    on a timer and does all widget work itself.
+    """
+
+    def __init__(self, max_workers=1):
+        self.events = queue.Queue()
+        self.active = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, name, func, *args, on_done=None, on_error=None):
+        """Queue func(job, *args) to run on a worker and return its Job"""
+        job = Job(name, self.events, on_done, on_error)
+        with self._lock:
+            self.active.add(job)
+
+        def run():
+            job.started = time.monotonic()
+            event = None
+            try:
+                job.check()
+                event = ('done', job, func(job, *args))
+            except JobCancelled:
+                event = ('cancelled', job, None)
+            except Exception as e:
+                event = ('error', job, e)
+            finally:
+                # Leave the active set before the UI hears of it, so
+                # on_done sees the scheduler idle and can start the next job
+                with self._lock:
+                    self.active.discard(job)
+                if event:
+                    self.events.put(event)
+
+        self._executor.submit(run)
+        return job
+
+    def drain(self, handler, limit=1000):
+        """Pass up to limit pending events to handler(kind, job, payload)"""
+        handled = 0
+        while handled < limit:
+            try:
+                kind, job, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            handler(kind, job, payload)
+            handled += 1
+        return handled
+
+    def busy(self):
+        with self._lock:
+            return bool(self.active)
+
+    def cancel_all(self):
+        """Cancel every queued or running job"""
+        with self._lock:
+            for job in self.active:
+                job.cancel()
+
+    def shutdown(self):
+        """Cancel running jobs and stop accepting new ones"""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,98 @@
+import time
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Level for "it worked" lines, shown in the success colour
+SUCCESS = 25
+logging.addLevelName(SUCCESS, 'SUCCESS')
+
+LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'success': SUCCESS,
+    'warning': logging.WARNING,
+    'error': logging.ERROR
+}
+
+
+def level_value(level):
+    """Numeric level for a name like 'error' or an int level"""
+    if isinstance(level, int):
+        return level
+    return LEVELS[level.lower()]
+
+
+def level_name(value):
+    """Lower-case name of the closest level at or below value"""
+    name = 'debug'
+    for candidate, number in sorted(LEVELS.items(), key=lambda item: item[1]):
+        if value >= number:
+            name = candidate
+    return name
+
+
+class LogSink:
+    """Fixed-capacity, thread-safe log buffer drained by the UI once per frame
+
+    Writers only append to bounded deques, so logging costs the same no
+    matter how large the console has grown. The UI calls take_pending() on
+    its timer and renders the batch in one widget update. The full stream,
+    including lines that scrolled out of the buffer, can be mirrored to a
+    rotating log file.
+    """
+
+    def __init__(self, capacity=5000, min_level='info'):
+        self.capacity = capacity
+        self.min_level = level_value(min_level)
+        self.records = deque(maxlen=capacity)
+        self.dropped = 0
+        self._pending = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._file_handler = None
+
+    def write(self, message, level='info'):
+        """Record one message; safe to call from any thread"""
+        record = (time.time(), level_value(level), str(message))
+        with self._lock:
+            self.records.append(record)
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(record)
+            handler = self._file_handler
+        if handler:
+            handler.handle(logging.makeLogRecord({
+                'msg': record[2],
+                'levelno': record[1],
+                'levelname': logging.getLevelName(record[1]),
+                'created': record[0]
+            }))
+
+    def take_pending(self):
+        """Records written since the last call that pass the level filter"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        return [record for record in pending if record[1] >= self.min_level]
+
+    def set_level(self, level):
+        """Change the filter and return the buffered records that now pass it"""
+        with self._lock:
+            self.min_level = level_value(level)
+            self._pending.clear()
+            return [record for record in self.records if record[1] >= self.min_level]
+
+    def mirror_to_file(self, path, max_bytes=10 * 1024 * 1024, backups=3):
+        """Also write every record to a rotating log file; None stops mirroring"""
+        handler = None
+        if path:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(message)s'))
+        with self._lock:
+            old, self._file_handler = self._file_handler, handler
+        if old:
+            old.close()
+
+    def close(self):
+        self.mirror_to_file(None)
@@ -0,0 +1,134 @@
+import gc
+import os
+import sys
+import time
+
+# Seconds between memory samples taken from progress callbacks
+CHECK_INTERVAL = 0.25
+
+# Rough private memory of one worker process before it holds any data
+WORKER_BASE = 48 * 1024 * 1024
+
+# Smallest share of a limit worth giving one app's worker process
+MIN_APP_MEMORY = 256 * 1024 * 1024
+
+# Memory one file costs while it is read and processed whole (data, lowered copy, results)
+FILE_OVERHEAD = 6
+
+# Share of the limit a Node.js child's heap may take
+NODE_HEAP_SHARE = 0.5
+
+
+class MemoryLimitExceeded(Exception):
+    """The process grew past its memory limit"""
+
+
+def private_memory():
+    """Bytes of memory private to this process, or None where unknown
+
+    Pages of memory-mapped archives are page cache the kernel can drop,
+    not private memory, so they don't count.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/status', 'r') as f:
+                for line in f:
+                    if line.startswith('RssAnon:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            return None
+        return None
+    if sys.platform == 'win32':
+        return _windows_private_bytes()
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current size, which only errs on the safe side
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _windows_private_bytes():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS_EX(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage',
+                'PeakPagefileUsage', 'PrivateUsage')
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS_EX()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PrivateUsage
+
+
+class MemoryBudget:
+    """A ceiling on the memory a run may use
+
+    Private memory is sampled as work reports progress. Over the limit,
+    garbage is collected once, and if that doesn't bring it back under,
+    MemoryLimitExceeded is raised so the run fails cleanly instead of
+    being killed by the OOM killer. The budget also sizes what would
+    otherwise grow with the input: worker pools, files read whole, and
+    the heap of Node.js child processes.
+    """
+
+    def __init__(self, limit, interval=CHECK_INTERVAL):
+        self.limit = limit
+        self.interval = interval
+        self.peak = 0
+        self._last_check = 0.0
+
+    def used(self):
+        """Private memory in use now, or 0 where that is unknown"""
+        used = private_memory() or 0
+        self.peak = max(self.peak, used)
+        return used
+
+    def headroom(self):
+        """Bytes left under the limit"""
+        return max(0, self.limit - self.used())
+
+    def check(self):
+        """Raise MemoryLimitExceeded if the process is over the limit"""
+        self._last_check = time.monotonic()
+        if self.used() <= self.limit:
+            return
+        gc.collect()
+        used = self.used()
+        if used > self.limit:
+            raise MemoryLimitExceeded(f"Using {used // (1024 * 1024)} MB, over the "
+                                      f"{self.limit // (1024 * 1024)} MB memory limit")
+
+    def progress(self, forward=None):
+        """A progress(files, bytes) callback that checks memory now and then, then calls forward"""
+        def progress(files=0, nbytes=0):
+            if time.monotonic() - self._last_check >= self.interval:
+                self.check()
+            if forward:
+                forward(files, nbytes)
+        return progress
+
+    def workers(self, requested, per_worker=WORKER_BASE):
+        """How many of the requested workers fit in what is left of the limit"""
+        requested = requested or os.cpu_count() or 1
+        return max(1, min(requested, self.headroom() // per_worker))
+
+    def max_file_size(self, workers=1):
+        """Largest file that workers may each read whole at the same time"""
+        return max(1024 * 1024, self.headroom() // (FILE_OVERHEAD * max(1, workers)))
+
+    def share(self, parts):
+        """Limit for each of parts worker processes splitting what is left"""
+        return max(WORKER_BASE, self.headroom() // max(1, parts))
+
+    def node_heap_mb(self):
+        """Heap size in MB for a Node.js child to stay inside the limit"""
+        return max(64, int(self.limit * NODE_HEAP_SHARE) // (1024 * 1024))
@@ -0,0 +1,81 @@
+// Long-lived helper for node_worker.py: one JSON request per line on stdin,
+// one JSON response per line on stdout, matched by id.
+'use strict';
+
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+// Messages meaning the file is an ES module rather than a script
+const MODULE_HINTS = [
+  'Cannot use import statement outside a module',
+  "Unexpected token 'export'",
+  'await is only valid in async functions and the top level bodies of modules'
+];
+
+function location(error, filename) {
+  // The first stack line is "filename:line" for syntax errors
+  const first = String(error.stack || '').split('\n')[0];
+  const match = first.startsWith(filename) && /:(\d+)$/.exec(first);
+  return match ? Number(match[1]) : null;
+}
+
+function checkModule(source, filename) {
+  if (typeof vm.SourceTextModule !== 'function') {
+    return { ok: true, skipped: 'modules need --experimental-vm-modules' };
+  }
+  try {
+    new vm.SourceTextModule(source, { identifier: filename });
+    return { ok: true, module: true };
+  } catch (error) {
+    return { ok: false, module: true, error: error.message, line: location(error, filename) };
+  }
+}
+
+function check(request) {
+  let source = fs.readFileSync(request.path, 'utf8');
+  // A shebang is only allowed at the very start, so blank it out
+  if (source.startsWith('#!')) {
+    source = '//' + source.slice(2);
+  }
+  if (request.path.endsWith('.mjs')) {
+    return checkModule(source, request.path);
+  }
+  try {
+    // Compiled the way CommonJS loads it, but never run
+    new vm.Script(`(function (exports, require, module, __filename, __dirname) {${source}\n})`,
+                  { filename: request.path });
+    return { ok: true };
+  } catch (error) {
+    if (MODULE_HINTS.some((hint) => error.message.includes(hint))) {
+      return checkModule(source, request.path);
+    }
+    return { ok: false, error: error.message, line: location(error, request.path) };
+  }
+}
+
+const OPERATIONS = {
+  ping: () => ({ version: process.version, pid: process.pid }),
+  check
+};
+
+const input = readline.createInterface({ input: process.stdin, terminal: false });
+input.on('line', (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  let request = {};
+  let response;
+  try {
+    request = JSON.parse(line);
+    const operation = OPERATIONS[request.op];
+    if (!operation) {
+      throw new Error(`Unknown operation: ${request.op}`);
+    }
+    response = { id: request.id, result: operation(request) };
+  } catch (error) {
+    response = { id: request.id, error: error.message };
+  }
+  process.stdout.write(JSON.stringify(response) + '\n');
+});
+input.on('close', () => process.exit(0));
@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future
+
+# The helper script the worker runs under Node
+HELPER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'node_helper.js')
+
+# Seconds without requests before the helper process is stopped
+IDLE_TIMEOUT = 60
+
+# Requests kept in flight by map()
+PIPELINE_DEPTH = 64
+
+# Restarts allowed in a row without a successful response
+MAX_RESTARTS = 3
+
+
+class WorkerError(Exception):
+    """The helper answered a request with an error"""
+
+
+class WorkerCrashed(Exception):
+    """The helper process exited with requests still outstanding"""
+
+
+class NodeWorker:
+    """One long-lived helper process that answers JSON requests line by line
+
+    Requests are written as soon as they are submitted and matched to
+    responses by id, so many can be in flight at once. When the process
+    dies, outstanding requests fail with WorkerCrashed and the next request
+    starts a new one; map() resubmits what was lost. After idle_timeout
+    seconds without work the process is stopped, and started again on
+    demand. Use NodeWorker.stub() for a Python stand-in that needs no Node.
+    """
+
+    def __init__(self, command, idle_timeout=IDLE_TIMEOUT):
+        self.command = command
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._process = None
+        self._pending = {}
+        self._next_id = 0
+        self._restarts = 0
+        self._idle_timer = None
+
+    @classmethod
+    def for_node(cls, node_path, idle_timeout=IDLE_TIMEOUT, heap_mb=None):
+        """Worker running node_helper.js; ES modules are checked through vm modules
+
+        heap_mb caps the V8 heap of the helper process.
+        """
+        flags = ['--experimental-vm-modules', '--no-warnings']
+        if heap_mb:
+            flags.append(f'--max-old-space-size={heap_mb}')
+        return cls([node_path] + flags + [HELPER_SCRIPT], idle_timeout)
+
+    @classmethod
+    def stub(cls, idle_timeout=IDLE_TIMEOUT):
+        """Worker running the Python stub below, for tests and machines without Node"""
+        return cls([sys.executable, os.path.abspath(__file__), '--stub'], idle_timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pid(self):
+        process = self._process
+        return process.pid if process and process.poll() is None else None
+
+    def _start(self):
+        """Start the helper; called with the lock held"""
+        if self._restarts > MAX_RESTARTS:
+            raise WorkerCrashed(f"Helper keeps exiting: {' '.join(self.command)}")
+        # Buffered both ways: responses are read a block at a time, not a
+        # byte per syscall, and each request is flushed as it is written
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        reader = threading.Thread(target=self._read, args=(self._process,), daemon=True)
+        reader.start()
+
+    def _read(self, process):
+        """Resolve futures from the helper's responses until it exits"""
+        for line in process.stdout:
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                future = self._pending.pop(response.get('id'), None)
+                self._restarts = 0
+                if not self._pending:
+                    self._arm_idle_timer()
+            if future is None:
+                continue
+            if 'error' in response:
+                future.set_exception(WorkerError(response['error']))
+            else:
+                future.set_result(response.get('result'))
+        process.wait()
+        with self._lock:
+            if self._process is not process:
+                return
+            self._process = None
+            lost, self._pending = self._pending, {}
+            if lost:
+                self._restarts += 1
+        for future in lost.values():
+            future.set_exception(WorkerCrashed(f"Helper exited with code {process.returncode}"))
+
+    def _arm_idle_timer(self):
+        """Stop the helper after idle_timeout seconds; called with the lock held"""
+        if self._idle_timer:
+            self._idle_timer.cancel()
+        if self.idle_timeout:
+            self._idle_timer = threading.Timer(self.idle_timeout, self._stop_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _stop_if_idle(self):
+        with self._lock:
+            if self._pending:
+                return
+            process, self._process = self._process, None
+        if process:
+            _stop(process)
+
+    def submit(self, op, **params):
+        """Send one request and return a Future for its result"""
+        future = Future()
+        with self._lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+            process = self._process
+        line = json.dumps(dict(params, id=request_id, op=op)) + '\n'
+        # Written outside the main lock: a full pipe must not stop the
+        # reader thread from taking responses off the other end
+        try:
+            with self._write_lock:
+                process.stdin.write(line.encode('utf-8'))
+                process.stdin.flush()
+        except (OSError, ValueError) as e:
+            # The reader fails the other requests once it sees the exit
+            with self._lock:
+                lost = self._pending.pop(request_id, None)
+            if lost:
+                future.set_exception(WorkerCrashed(str(e)))
+        return future
+
+    def call(self, op, timeout=None, **params):
+        """Send one request and wait for its result"""
+        return self.submit(op, **params).result(timeout)
+
+    def map(self, op, requests, depth=PIPELINE_DEPTH):
+        """Yield (params, result or exception) for each params dict, in order
+
+        Up to depth requests are in flight at once. A request lost to a
+        crash is sent again once; errors are yielded, not raised.
+        """
+        window = deque()
+        for params in requests:
+            window.append((params, self.submit(op, **params)))
+            while len(window) >= depth:
+                yield self._settle(op, window)
+        while window:
+            yield self._settle(op, window)
+
+    def _settle(self, op, window):
+        params, future = window.popleft()
+        try:
+            return params, future.result()
+        except WorkerCrashed:
+            try:
+                return params, self.submit(op, **params).result()
+            except (WorkerCrashed, WorkerError) as e:
+                return params, e
+        except WorkerError as e:
+            return params, e
+
+    def close(self):
+        """Stop the helper process; the worker starts a new one if used again"""
+        with self._lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            process, self._process = self._process, None
+            lost, self._pending = self._pending, {}
+        for future in lost.values():
+            future.set_exception(WorkerCrashed("Helper was closed"))
+        if process:
+            _stop(process)
+
+
+def _stop(process):
+    """Close the helper's stdin so it exits, killing it if it doesn't"""
+    try:
+        process.stdin.close()
+    except OSError:
+        pass
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_stub():
+    """Answer requests the way node_helper.js does, without Node
+
+    'check' only reports unreadable files, 'exit' ends the process to
+    simulate a crash, 'echo' returns the request and 'sleep' returns it
+    after the given number of seconds.
+    """
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = {}
+        try:
+            request = json.loads(line)
+            op = request.get('op')
+            if op == 'ping':
+                result = {'version': 'stub', 'pid': os.getpid()}
+            elif op == 'check':
+                with open(request['path'], 'rb'):
+                    result = {'ok': True}
+            elif op == 'echo':
+                result = request
+            elif op == 'sleep':
+                import time
+                time.sleep(request.get('seconds', 1))
+                result = request
+            elif op == 'exit':
+                os._exit(3)
+            else:
+                raise Exception(f"Unknown operation: {op}")
+            response = {'id': request.get('id'), 'result': result}
+        except Exception as e:
+            response = {'id': request.get('id'), 'error': str(e)}
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--stub']:
+        run_stub()
@@ -0,0 +1,341 @@
+import os
+import re
+import sys
+import mmap
+from array import array
+from collections import deque
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Larger files, and files that look binary, are listed but never searched
+MAX_INDEXED_SIZE = 32 * 1024 * 1024
+
+# Bytes of a file turned into trigram ids at a time
+TRIGRAM_CHUNK = 256 * 1024
+
+# Where each byte of a trigram goes in the native 32-bit word holding its id
+_TRIGRAM_LAYOUT = ((2, 0), (1, 1), (0, 2)) if sys.byteorder == 'little' else ((1, 0), (2, 1), (3, 2))
+
+# Files sent to a worker process per task
+INDEX_BATCH = 16
+
+# Cap on trigrams per query; any subset still yields a superset of matches
+MAX_QUERY_TRIGRAMS = 256
+
+# Characters of context kept either side of a match on long (minified) lines
+SNIPPET_CONTEXT = 80
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, 'POSSESSIVE_REPEAT'):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    indexed INTEGER NOT NULL,
+    trigrams BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    tri INTEGER NOT NULL,
+    file INTEGER NOT NULL,
+    PRIMARY KEY (tri, file)
+) WITHOUT ROWID;
+"""
+
+
+def _chunk_trigrams(chunk):
+    """Set of the trigram ids (a << 16 | b << 8 | c) in a lower-cased chunk
+
+    The bytes are interleaved into one 32-bit word per position with
+    slice assignments, so the ids are built and deduplicated in C.
+    """
+    count = len(chunk) - 2
+    if count <= 0:
+        return set()
+    words = bytearray(4 * count)
+    for position, shift in _TRIGRAM_LAYOUT:
+        words[position::4] = chunk[shift:shift + count]
+    return set(memoryview(words).cast('I'))
+
+
+def trigrams(data):
+    """Sorted array of the distinct 24-bit trigram ids in data, ASCII-lower-cased
+
+    data may be a memory map; it is lowered and read a chunk at a time,
+    and the ids of a file larger than one chunk are collected in a
+    2 MB bitmap rather than a set.
+    """
+    if len(data) <= TRIGRAM_CHUNK + 2:
+        return array('i', sorted(_chunk_trigrams(data[:].lower())))
+    bitmap = bytearray(1 << 21)
+    for start in range(0, len(data) - 2, TRIGRAM_CHUNK):
+        # Chunks overlap by two bytes so no trigram is split
+        for tri in _chunk_trigrams(data[start:start + TRIGRAM_CHUNK + 2].lower()):
+            bitmap[tri >> 3] |= 1 << (tri & 7)
+    ids = array('i')
+    for match in re.finditer(rb'[^\x00]', bitmap):
+        base = match.start() << 3
+        bits = bitmap[match.start()]
+        ids.extend(base | bit for bit in range(8) if bits >> bit & 1)
+    return ids
+
+
+def _index_file(path, max_size=MAX_INDEXED_SIZE):
+    """(size, mtime_ns, trigram bytes or None) for one file, None if it vanished"""
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_size > max_size:
+                return st.st_size, st.st_mtime_ns, None
+            if st.st_size == 0:
+                return 0, st.st_mtime_ns, b''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if b'\0' in data[:8192]:
+                    return st.st_size, st.st_mtime_ns, None
+                return st.st_size, st.st_mtime_ns, trigrams(data).tobytes()
+    except OSError:
+        return None
+
+
+def _index_batch(paths, max_size):
+    return [_index_file(path, max_size) for path in paths]
+
+
+def _index_pooled(pool, paths, max_size, depth):
+    """Index paths across pool in order, with at most depth batches in flight
+
+    Results are taken as they are written to the database, so a slow
+    writer holds back the workers instead of piling up their output.
+    """
+    window = deque()
+    for start in range(0, len(paths), INDEX_BATCH):
+        window.append(pool.submit(_index_batch, paths[start:start + INDEX_BATCH], max_size))
+        if len(window) >= depth:
+            yield from window.popleft().result()
+    while window:
+        yield from window.popleft().result()
+
+
+def required_literals(pattern, ignore_case=False):
+    """Literal strings every match of a regex must contain
+
+    Only runs of plain characters that are always part of a match count;
+    anything optional, alternated or a character class breaks a run. With
+    ignore_case, non-ASCII characters break runs too, since the index only
+    folds ASCII case.
+    """
+    runs = []
+
+    def walk(parsed):
+        current = []
+        for op, av in parsed:
+            if op is sre_constants.LITERAL and not (ignore_case and av > 127):
+                current.append(chr(av))
+                continue
+            if current:
+                runs.append(''.join(current))
+                current = []
+            if op is sre_constants.SUBPATTERN:
+                walk(av[-1])
+            elif op in _REPEATS and av[0] >= 1:
+                walk(av[2])
+            elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+                walk(av)
+        if current:
+            runs.append(''.join(current))
+
+    parsed = sre_parse.parse(pattern)
+    state = getattr(parsed, 'state', None) or parsed.pattern
+    if state.flags & sre_constants.SRE_FLAG_IGNORECASE:
+        ignore_case = True
+    walk(parsed)
+    return [run for run in runs if len(run.encode('utf-8')) >= 3]
+
+
+class SearchIndex:
+    """Trigram index over a directory tree, kept in a SQLite file
+
+    Every file's distinct trigrams (ASCII-lower-cased) are posted against
+    the file; a query only reads the files that contain all trigrams of
+    the literals it requires, then confirms matches with the real pattern.
+    Each file's trigram list is kept so an update can retract exactly its
+    old postings; unchanged files (same size and mtime) are skipped.
+    """
+
+    def __init__(self, db_path):
+        import sqlite3
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def root(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        return row[0] if row else None
+
+    def update(self, root, paths, jobs=None, progress=None, max_size=MAX_INDEXED_SIZE):
+        """Bring the index in line with paths (files under root)
+
+        Returns counts of files indexed, unchanged and removed.
+        progress(files, bytes) is called as files are indexed. Files over
+        max_size bytes are listed but not searched.
+        """
+        root = os.path.abspath(root)
+        known = {path: (file_id, size, mtime_ns) for file_id, path, size, mtime_ns
+                 in self.db.execute("SELECT id, path, size, mtime_ns FROM files")}
+        changed = []
+        current = set()
+        for path in paths:
+            rel_path = os.path.relpath(path, root).replace(os.sep, '/')
+            current.add(rel_path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            row = known.get(rel_path)
+            if row and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                continue
+            changed.append((rel_path, path))
+
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (root,))
+            removed = [rel_path for rel_path in known if rel_path not in current]
+            for rel_path in removed:
+                self._retract(known[rel_path][0])
+                self.db.execute("DELETE FROM files WHERE id = ?", (known[rel_path][0],))
+
+            if jobs == 1 or len(changed) < 8:
+                results = (_index_file(path, max_size) for _, path in changed)
+                pool = None
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=jobs)
+                results = _index_pooled(pool, [path for _, path in changed], max_size,
+                                        2 * (jobs or os.cpu_count() or 1))
+            try:
+                for (rel_path, _), result in zip(changed, results):
+                    if result is None:
+                        continue
+                    size, mtime_ns, blob = result
+                    row = known.get(rel_path)
+                    if row:
+                        self._retract(row[0])
+                        self.db.execute("UPDATE files SET size = ?, mtime_ns = ?, indexed = ?, trigrams = ? "
+                                        "WHERE id = ?", (size, mtime_ns, blob is not None, blob, row[0]))
+                        file_id = row[0]
+                    else:
+                        file_id = self.db.execute(
+                            "INSERT INTO files (path, size, mtime_ns, indexed, trigrams) VALUES (?, ?, ?, ?, ?)",
+                            (rel_path, size, mtime_ns, blob is not None, blob)).lastrowid
+                    if blob:
+                        ids = array('i')
+                        ids.frombytes(blob)
+                        self.db.executemany("INSERT INTO postings VALUES (?, ?)", ((tri, file_id) for tri in ids))
+                    if progress:
+                        progress(1, size)
+            finally:
+                if pool:
+                    pool.shutdown()
+
+        return {'indexed': len(changed), 'unchanged': len(current) - len(changed), 'removed': len(removed)}
+
+    def _retract(self, file_id):
+        """Remove a file's postings using its stored trigram list"""
+        row = self.db.execute("SELECT trigrams FROM files WHERE id = ?", (file_id,)).fetchone()
+        if row and row[0]:
+            ids = array('i')
+            ids.frombytes(row[0])
+            self.db.executemany("DELETE FROM postings WHERE tri = ? AND file = ?", ((tri, file_id) for tri in ids))
+
+    def candidates(self, literals):
+        """Relative paths of indexed files that may contain every literal"""
+        wanted = set()
+        for literal in literals:
+            data = literal.encode('utf-8').lower()
+            wanted.update(a << 16 | b << 8 | c for a, b, c in zip(data, data[1:], data[2:]))
+        if not wanted:
+            return [path for path, in self.db.execute("SELECT path FROM files WHERE indexed ORDER BY path")]
+        wanted = sorted(wanted)[:MAX_QUERY_TRIGRAMS]
+        marks = ','.join('?' * len(wanted))
+        return [path for path, in self.db.execute(
+            f"SELECT path FROM files WHERE id IN (SELECT file FROM postings WHERE tri IN ({marks}) "
+            f"GROUP BY file HAVING COUNT(*) = ?) ORDER BY path", wanted + [len(wanted)])]
+
+    def search(self, query, regex=False, ignore_case=False, max_results=1000):
+        """Yield matches of a substring or regex as dicts with path, line, column and text"""
+        if regex:
+            literals = required_literals(query, ignore_case)
+            pattern = query.encode('utf-8')
+        else:
+            literals = [query]
+            pattern = re.escape(query.encode('utf-8'))
+        matcher = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        root = self.root
+
+        found = 0
+        for rel_path in self.candidates(literals):
+            path = os.path.join(root, *rel_path.split('/'))
+            for match in _scan_file(path, matcher):
+                match['path'] = rel_path
+                yield match
+                found += 1
+                if found >= max_results:
+                    return
+
+    def stats(self):
+        files, indexed, size = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(indexed), 0), COALESCE(SUM(size), 0) FROM files").fetchone()
+        return {'root': self.root, 'files': files, 'indexed': indexed, 'bytes': size,
+                'index_bytes': os.path.getsize(self.db_path)}
+
+
+def _scan_file(path, matcher):
+    """Matches of a compiled bytes pattern in one file, read through mmap"""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            line = 1
+            line_start = 0
+            counted_to = 0
+            for match in matcher.finditer(data):
+                start, end = match.span()
+                # Count lines incrementally; minified files have huge lines
+                segment = data[counted_to:start]
+                newlines = segment.count(b'\n')
+                if newlines:
+                    line += newlines
+                    line_start = counted_to + segment.rfind(b'\n') + 1
+                counted_to = start
+                snippet_start = max(line_start, start - SNIPPET_CONTEXT)
+                snippet_end = data.find(b'\n', end, end + SNIPPET_CONTEXT)
+                if snippet_end == -1:
+                    snippet_end = min(len(data), end + SNIPPET_CONTEXT)
+                yield {
+                    'line': line,
+                    'column': start - line_start + 1,
+                    'text': data[snippet_start:snippet_end].decode('utf-8', 'replace')
+                }
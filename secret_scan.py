@@ -0,0 +1,259 @@
+import os
+import re
+import json
+import heapq
+import hashlib
+from collections import namedtuple
+
+from asar_archive import file_sha256
+
+Rule = namedtuple('Rule', 'name category pattern')
+
+# What the scanner looks for. Every pattern starts with a literal, so re
+# can skip ahead to candidates instead of trying the pattern at every byte;
+# an optional 'value' group narrows what is reported as the finding's value.
+RULES = (
+    Rule('aws_access_key', 'secret', rb'AKIA[0-9A-Z]{16}(?![0-9A-Za-z])'),
+    Rule('aws_temporary_key', 'secret', rb'ASIA[0-9A-Z]{16}(?![0-9A-Za-z])'),
+    Rule('github_token', 'secret', rb'gh[pousr]_[0-9A-Za-z]{36}'),
+    Rule('google_api_key', 'secret', rb'AIza[0-9A-Za-z_\-]{35}'),
+    Rule('slack_token', 'secret', rb'xox[abprs]-[0-9A-Za-z-]{10,48}'),
+    Rule('stripe_secret_key', 'secret', rb'sk_live_[0-9A-Za-z]{24,99}'),
+    Rule('private_key', 'secret', rb'-----BEGIN (?:RSA |EC |DSA |OPENSSH |ENCRYPTED )?PRIVATE KEY-----'),
+    Rule('jwt', 'secret', rb'eyJ[0-9A-Za-z_-]{10,}\.eyJ[0-9A-Za-z_-]{10,}\.[0-9A-Za-z_-]{10,}'),
+    # A keyword starting a name or a camelCase part of one (client_secret,
+    # accessToken) assigned a quoted value. The first letter is matched as
+    # a class so re can still skip ahead to candidates; lookbehinds then
+    # check what precedes it and tie it to the rest of its keyword
+    Rule('assigned_secret', 'secret',
+         rb'[aAsStTpP](?<![0-9A-Za-z][a-z])(?<![A-Z][A-Z])'
+         rb'(?:(?<=[aA])(?i:pi[_-]?key)|(?<=[sS])(?i:ecret)|(?<=[tT])(?i:oken)|(?<=[pP])(?i:assw(?:or)?d))'
+         rb'["\']?\s*[:=]\s*["\'](?P<value>[^"\'\s]{8,200})["\']'),
+    Rule('url', 'url', rb'https?://[^\s"\'`<>()\\{}|^]{4,2048}'),
+    Rule('websocket_url', 'url', rb'wss?://[^\s"\'`<>()\\{}|^]{4,2048}'),
+    Rule('ipc_main_channel', 'ipc',
+         rb'ipcMain\.(?:on|once|handle|handleOnce)\(\s*["\'`](?P<value>[^"\'`]{1,200})["\'`]'),
+    Rule('ipc_renderer_channel', 'ipc',
+         rb'ipcRenderer\.(?:on|once|invoke|send|sendSync|sendTo|postMessage)\(\s*["\'`](?P<value>[^"\'`]{1,200})["\'`]'),
+    Rule('exposed_api', 'ipc', rb'exposeInMainWorld\(\s*["\'`](?P<value>[^"\'`]{1,200})["\'`]'),
+    Rule('update_feed', 'update',
+         rb'setFeedURL\(\s*(?:\{\s*url\s*:\s*)?["\'`](?P<value>[^"\'`]{1,2048})["\'`]'),
+    Rule('update_server', 'update', rb'update\.electronjs\.org/[^\s"\'`<>()\\]{1,2048}')
+)
+
+# Characters of a match kept in a finding
+MAX_MATCH_LENGTH = 300
+
+# Files sent to a worker process per task
+SCAN_BATCH = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (digest TEXT PRIMARY KEY, findings TEXT NOT NULL);
+"""
+
+
+def rules_fingerprint(rules):
+    """Hash of the rule set; cached results only hold for the rules that produced them"""
+    digest = hashlib.sha256()
+    for rule in rules:
+        digest.update(f"{rule.name}\0{rule.category}\0".encode('utf-8') + rule.pattern + b'\0')
+    return digest.hexdigest()
+
+
+def _matches(data, pattern, rule):
+    """(offset, rule, match) for each match of one compiled rule"""
+    for match in pattern.finditer(data):
+        yield match.start(), rule, match
+
+
+def scan_buffer(data, rules=RULES):
+    """Findings in a bytes-like object, in offset order
+
+    Each rule is its own pass: re only skips ahead on a literal prefix, and
+    an alternation of all rules has none. The passes are merged by offset.
+    """
+    compiled = [(re.compile(rule.pattern), rule) for rule in rules]
+    findings = []
+    line, line_start, counted = 1, 0, 0
+    for offset, rule, match in heapq.merge(*(_matches(data, pattern, rule) for pattern, rule in compiled),
+                                           key=lambda item: item[0]):
+        # Line numbers are counted forward from the previous finding
+        # (mmap has no count(); each slice covers new bytes only)
+        newlines = data[counted:offset].count(b'\n')
+        if newlines:
+            line += newlines
+            line_start = data.rfind(b'\n', counted, offset) + 1
+        counted = offset
+        text = match.group(0)[:MAX_MATCH_LENGTH].decode('utf-8', 'replace')
+        value = match.group('value') if 'value' in match.re.groupindex else None
+        findings.append({
+            'rule': rule.name,
+            'category': rule.category,
+            'offset': offset,
+            'line': line,
+            'column': offset - line_start + 1,
+            'match': text,
+            'value': value[:MAX_MATCH_LENGTH].decode('utf-8', 'replace') if value is not None else text
+        })
+    return findings
+
+
+def scan_file(path, rules=RULES):
+    """Findings in one file, read through a memory map"""
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return scan_buffer(data, rules)
+
+
+def _scan_batch(paths, rules):
+    """[(path, findings or None, error or None)] for a batch of files"""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, scan_file(path, rules), None))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+class SecretScanner:
+    """Finds hard-coded keys, URLs, IPC channels and update feeds in files
+
+    Files are memory-mapped and scanned in worker processes, and findings
+    are yielded file by file as workers finish. Results are cached in a
+    SQLite file by content hash: a file whose size and mtime are unchanged
+    isn't even hashed again, and one with the same content as a file seen
+    before (a re-extraction, or the same package in another app) isn't
+    scanned again. Changing the rules invalidates the cached results.
+    """
+
+    def __init__(self, cache_path=None, rules=RULES):
+        self.rules = tuple(rules)
+        self.db = None
+        if cache_path:
+            import sqlite3
+            self.db = sqlite3.connect(cache_path)
+            self.db.executescript(SCHEMA)
+            fingerprint = rules_fingerprint(self.rules)
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'rules'").fetchone()
+            if not row or row[0] != fingerprint:
+                with self.db:
+                    self.db.execute("DELETE FROM results")
+                    self.db.execute("INSERT OR REPLACE INTO meta VALUES ('rules', ?)", (fingerprint,))
+        self.stats = {'files': 0, 'scanned': 0, 'cached': 0, 'findings': 0, 'errors': 0}
+
+    def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cached(self, path):
+        """(digest, findings) for path from the cache; findings is None on a miss"""
+        if not self.db:
+            return None, None
+        st = os.stat(path)
+        row = self.db.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?",
+                              (os.path.abspath(path),)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            digest = row[2]
+        else:
+            digest = file_sha256(path)
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                            (os.path.abspath(path), st.st_size, st.st_mtime_ns, digest))
+        found = self.db.execute("SELECT findings FROM results WHERE digest = ?", (digest,)).fetchone()
+        return digest, json.loads(found[0]) if found else None
+
+    def _store(self, digest, findings):
+        if self.db and digest:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (digest, json.dumps(findings)))
+
+    def _finish(self, path, findings, error, progress):
+        """Count a scanned file and return its findings with the path attached"""
+        self.stats['files'] += 1
+        if error:
+            self.stats['errors'] += 1
+            return [{'path': path, 'rule': None, 'category': 'error', 'error': error}]
+        self.stats['findings'] += len(findings)
+        if progress:
+            progress(1, 0)
+        return [dict(finding, path=path) for finding in findings]
+
+    def scan(self, paths, jobs=None, progress=None):
+        """Yield a dict per finding (path, rule, category, offset, line, column, match, value)
+
+        Findings of one file come together, in offset order; files come
+        in the order they finish. Unreadable files yield one finding with
+        category 'error'. progress(files, bytes) is called per file.
+        """
+        jobs = jobs or os.cpu_count() or 1
+        digests = {}
+        batch = []
+        in_flight = set()
+        pool = None
+        try:
+            for path in paths:
+                try:
+                    digest, findings = self._cached(path)
+                except OSError as e:
+                    yield from self._finish(path, None, str(e), progress)
+                    continue
+                if findings is not None:
+                    self.stats['cached'] += 1
+                    yield from self._finish(path, findings, None, progress)
+                    continue
+                self.stats['scanned'] += 1
+                digests[path] = digest
+                batch.append(path)
+                if jobs == 1:
+                    yield from self._collect(_scan_batch(batch, self.rules), digests, progress)
+                    batch = []
+                elif len(batch) == SCAN_BATCH:
+                    if pool is None:
+                        from concurrent.futures import ProcessPoolExecutor
+                        pool = ProcessPoolExecutor(max_workers=jobs)
+                    in_flight.add(pool.submit(_scan_batch, batch, self.rules))
+                    batch = []
+                    while len(in_flight) >= 2 * jobs:
+                        yield from self._harvest(in_flight, digests, progress)
+            if batch:
+                # Too few files left to be worth a worker
+                yield from self._collect(_scan_batch(batch, self.rules), digests, progress)
+            while in_flight:
+                yield from self._harvest(in_flight, digests, progress)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+            if self.db:
+                self.db.commit()
+
+    def _harvest(self, in_flight, digests, progress):
+        """Wait for at least one batch and yield its findings"""
+        from concurrent.futures import wait, FIRST_COMPLETED
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        for future in done:
+            yield from self._collect(future.result(), digests, progress)
+
+    def _collect(self, results, digests, progress):
+        """Cache and yield the findings of a finished batch"""
+        for path, findings, error in results:
+            digest = digests.pop(path, None)
+            if not error:
+                self._store(digest, findings)
+            yield from self._finish(path, findings, error, progress)
@@ -0,0 +1,257 @@
+import os
+import json
+from array import array
+
+BASE64_CHARS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# Translated values for the separators; digits translate to 0-63
+SEGMENT_END = 64
+LINE_END = 65
+INVALID = 66
+
+# One translate() call turns the whole mappings string into digit values
+_TABLE = bytearray([INVALID]) * 256
+for _value, _char in enumerate(BASE64_CHARS):
+    _TABLE[_char] = _value
+_TABLE[ord(',')] = SEGMENT_END
+_TABLE[ord(';')] = LINE_END
+_TABLE = bytes(_TABLE)
+
+# Buckets for generated bytes that no original source owns
+UNMAPPED = '[unmapped]'
+EOLS = '[EOLs]'
+
+
+class SourceMapError(Exception):
+    """Raised for maps that can't be decoded"""
+
+
+def decode_mappings(mappings, line_offset=0, column_offset=0, source_offset=0):
+    """Decode a VLQ mappings string into flat per-segment arrays
+
+    Returns (lines, columns, sources) arrays; sources is -1 for segments
+    that don't map to an original source. The offsets place an index-map
+    section within the generated file and the combined source list.
+    """
+    data = mappings.encode('ascii', 'replace').translate(_TABLE)
+    lines = array('l')
+    columns = array('l')
+    sources = array('l')
+    add_line, add_column, add_source = lines.append, columns.append, sources.append
+
+    line = line_offset
+    column = column_offset
+    source = 0
+    fields = []
+    value = shift = 0
+    for digit in data:
+        if digit < 64:
+            value |= (digit & 31) << shift
+            if digit & 32:
+                shift += 5
+            else:
+                fields.append(-(value >> 1) if value & 1 else value >> 1)
+                value = shift = 0
+            continue
+        if digit == INVALID:
+            raise SourceMapError("Invalid character in mappings")
+        if fields:
+            column += fields[0]
+            if len(fields) >= 4:
+                source += fields[1]
+                add_source(source + source_offset)
+            else:
+                add_source(-1)
+            add_line(line)
+            add_column(column)
+            fields = []
+        if digit == LINE_END:
+            line += 1
+            column = 0
+    if fields:
+        column += fields[0]
+        if len(fields) >= 4:
+            source += fields[1]
+            add_source(source + source_offset)
+        else:
+            add_source(-1)
+        add_line(line)
+        add_column(column)
+    return lines, columns, sources
+
+
+def load_map(map_path):
+    """Read a map and return (source names, lines, columns, sources)"""
+    with open(map_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    names = []
+    all_lines, all_columns, all_sources = array('l'), array('l'), array('l')
+
+    def add_map(section, line_offset, column_offset):
+        root = section.get('sourceRoot') or ''
+        if root and not root.endswith('/'):
+            root += '/'
+        offset = len(names)
+        names.extend(root + (name or '') for name in section.get('sources', []))
+        lines, columns, sources = decode_mappings(section.get('mappings', ''),
+                                                  line_offset, column_offset, offset)
+        all_lines.extend(lines)
+        all_columns.extend(columns)
+        all_sources.extend(sources)
+
+    if 'sections' in data:
+        # Index map: each section is a full map placed at an offset
+        for section in data['sections']:
+            if 'map' in section:
+                position = section.get('offset', {})
+                add_map(section['map'], position.get('line', 0), position.get('column', 0))
+    else:
+        add_map(data, 0, 0)
+    return names, all_lines, all_columns, all_sources
+
+
+def attribute_bytes(js_data, names, lines, columns, sources):
+    """Sizes in generated bytes per original source for one bundle"""
+    sizes = [0] * len(names)
+    unmapped = 0
+    raw_lines = js_data.split(b'\n')
+    eols = len(raw_lines) - 1
+
+    count = len(lines)
+    index = 0
+    for line_no, text in enumerate(raw_lines):
+        # Skip segments that point before this line (out-of-order maps)
+        while index < count and lines[index] < line_no:
+            index += 1
+        end = index
+        while end < count and lines[end] == line_no:
+            end += 1
+        if index == end:
+            unmapped += len(text)
+            continue
+
+        if text.isascii():
+            length = len(text)
+
+            def measure(start, stop):
+                return stop - start
+        else:
+            # Columns count characters; weigh the span in encoded bytes
+            decoded = text.decode('utf-8', 'replace')
+            length = len(decoded)
+
+            def measure(start, stop):
+                return len(decoded[start:stop].encode('utf-8'))
+
+        previous = 0
+        for segment in range(index, end):
+            start = min(columns[segment], length)
+            stop = min(columns[segment + 1], length) if segment + 1 < end else length
+            if segment == index:
+                unmapped += measure(0, start)
+            elif start < previous:
+                start = previous
+            if stop > start:
+                size = measure(start, stop)
+                source = sources[segment]
+                if source >= 0:
+                    sizes[source] += size
+                else:
+                    unmapped += size
+            previous = max(previous, stop)
+        index = end
+
+    result = {}
+    for name, size in zip(names, sizes):
+        if size:
+            result[name] = result.get(name, 0) + size
+    return result, unmapped, eols
+
+
+def analyze_bundle(js_path, map_path):
+    """Size attribution for one generated file and its map"""
+    with open(js_path, 'rb') as f:
+        js_data = f.read()
+    names, lines, columns, sources = load_map(map_path)
+    sizes, unmapped, eols = attribute_bytes(js_data, names, lines, columns, sources)
+    return {
+        'bundle': js_path,
+        'map': map_path,
+        'total_bytes': len(js_data),
+        'mapped_bytes': sum(sizes.values()),
+        'unmapped_bytes': unmapped,
+        'eol_bytes': eols,
+        'segments': len(lines),
+        'sources': sizes
+    }
+
+
+def _analyze_safely(js_path, map_path):
+    """analyze_bundle that reports failures instead of raising across the pool"""
+    try:
+        return analyze_bundle(js_path, map_path)
+    except Exception as e:
+        return {'bundle': js_path, 'map': map_path, 'error': str(e)}
+
+
+def find_map_pairs(root):
+    """(bundle, map) pairs for every .js.map whose .js sits next to it"""
+    pairs = []
+    for directory, _, files in os.walk(root):
+        for file in files:
+            if file.endswith('.js.map'):
+                map_path = os.path.join(directory, file)
+                js_path = map_path[:-4]  # Remove .map extension
+                if os.path.exists(js_path):
+                    pairs.append((js_path, map_path))
+    return pairs
+
+
+def analyze_maps(pairs, jobs=None, progress=None):
+    """Analyze bundles across a process pool and combine the results
+
+    One bad map is recorded under 'errors' and doesn't stop the others.
+    progress(files, bytes) is called as each bundle finishes.
+    """
+    bundles = []
+    errors = []
+
+    def collect(result):
+        if 'error' in result:
+            errors.append(result)
+        else:
+            bundles.append(result)
+        if progress:
+            progress(1, result.get('total_bytes', 0))
+
+    if jobs == 1 or len(pairs) <= 1:
+        for js_path, map_path in pairs:
+            collect(_analyze_safely(js_path, map_path))
+    else:
+        # Imported here; starting multiprocessing is slow and most runs never need it
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_analyze_safely, js_path, map_path) for js_path, map_path in pairs]
+            try:
+                for future in as_completed(futures):
+                    collect(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    totals = {}
+    for bundle in bundles:
+        for name, size in bundle['sources'].items():
+            totals[name] = totals.get(name, 0) + size
+        totals[UNMAPPED] = totals.get(UNMAPPED, 0) + bundle['unmapped_bytes']
+        totals[EOLS] = totals.get(EOLS, 0) + bundle['eol_bytes']
+
+    bundles.sort(key=lambda bundle: bundle['bundle'])
+    return {
+        'total_bytes': sum(bundle['total_bytes'] for bundle in bundles),
+        'bundles': bundles,
+        'sources': dict(sorted(totals.items(), key=lambda item: item[1], reverse=True)),
+        'errors': errors
+    }
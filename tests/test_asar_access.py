@@ -0,0 +1,135 @@
+import io
+import os
+
+import pytest
+
+from asar_archive import (AsarArchive, AsarEntryFile, AsarError, encode_header, pack_directory,
+                          MAX_LINK_DEPTH)
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_archive(path, header, body=b''):
+    header_bytes, _ = encode_header(header)
+    with open(path, 'wb') as f:
+        f.write(header_bytes + body)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    root = tmp_path / 'app'
+    write(str(root / 'first.txt'), b'0123456789')
+    write(str(root / 'second.txt'), b'abcdefghij')
+    write(str(root / 'lib' / 'deep' / 'data.bin'), bytes(range(256)) * 40)
+    write(str(root / 'lib' / 'addon.node'), b'native body')
+    if os.name != 'nt':
+        os.chmod(str(root / 'lib' / 'addon.node'), 0o755)
+    try:
+        os.symlink('first.txt', str(root / 'alias.txt'))
+        os.symlink(os.path.join('lib', 'deep'), str(root / 'deep'))
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks need extra privileges on Windows")
+    path = str(tmp_path / 'app.asar')
+    pack_directory(str(root), path, unpack=('*.node',))
+    with AsarArchive(path) as opened:
+        yield opened
+
+
+def test_listdir_and_stat(archive):
+    assert sorted(archive.listdir()) == ['alias.txt', 'deep', 'first.txt', 'lib', 'second.txt']
+    assert sorted(archive.listdir('lib')) == ['addon.node', 'deep']
+    # A link to a directory lists like the directory
+    assert archive.listdir('deep') == ['data.bin']
+    with pytest.raises(NotADirectoryError):
+        archive.listdir('first.txt')
+    with pytest.raises(FileNotFoundError):
+        archive.listdir('missing')
+
+    first = archive.stat('first.txt')
+    assert (first.size, first.is_dir, first.is_link, first.unpacked) == (10, False, False, False)
+    # Offsets are absolute, so the bytes can be read from the file directly
+    with open(archive.path, 'rb') as f:
+        f.seek(first.offset)
+        assert f.read(10) == b'0123456789'
+    assert archive.stat('alias.txt') == first
+    assert archive.stat('alias.txt', follow_links=False).is_link
+    assert archive.stat('lib').is_dir
+    assert archive.stat('./lib\\deep/data.bin').size == 10240
+
+
+def test_links_resolve_anywhere_in_a_path(archive):
+    assert archive.read('alias.txt') == b'0123456789'
+    assert archive.read('deep/data.bin') == archive.read('lib/deep/data.bin')
+    with archive.open('deep/data.bin') as f:
+        assert f.read(3) == b'\0\1\2'
+
+
+def test_link_depth_guard(tmp_path):
+    path = str(tmp_path / 'links.asar')
+    chain = {'target.txt': {'size': 2, 'offset': '0'}, 'over': {'link': 'link0'}}
+    for index in range(MAX_LINK_DEPTH - 1):
+        chain[f'link{index}'] = {'link': f'link{index + 1}'}
+    chain[f'link{MAX_LINK_DEPTH - 1}'] = {'link': 'target.txt'}
+    chain['loop-a'] = {'link': 'loop-b'}
+    chain['loop-b'] = {'link': 'loop-a'}
+    write_archive(path, {'files': chain}, b'ok')
+
+    with AsarArchive(path) as archive:
+        # Exactly MAX_LINK_DEPTH hops still resolve; one more does not
+        assert archive.read('link0') == b'ok'
+        with pytest.raises(AsarError):
+            archive.read('over')
+        with pytest.raises(AsarError):
+            archive.stat('loop-a')
+        assert not archive.exists('loop-a')
+        assert archive.stat('loop-a', follow_links=False).is_link
+
+
+def test_entry_file_stays_inside_its_entry(archive):
+    with archive.open('first.txt') as f:
+        assert f.read(100) == b'0123456789'
+        assert f.read() == b''
+        assert f.seek(-3, io.SEEK_END) == 7
+        assert f.read() == b'789'
+        assert f.seek(4) == 4 and f.read(2) == b'45'
+        assert f.seek(2, io.SEEK_CUR) == 8 and f.read() == b'89'
+        f.seek(50)
+        assert f.read() == b''
+        with pytest.raises(ValueError):
+            f.seek(-1)
+
+    start = archive.stat('second.txt').offset
+    raw = AsarEntryFile(archive._map, start, 10)
+    buffer = bytearray(16)
+    assert raw.readinto(buffer) == 10 and bytes(buffer[:10]) == b'abcdefghij'
+    assert raw.readinto(buffer) == 0
+    assert archive.read('first.txt', offset=8, size=100) == b'89'
+    assert archive.read('first.txt', offset=20) == b''
+
+    with archive.open('second.txt', 'r') as text:
+        assert text.read() == 'abcdefghij'
+    with pytest.raises(ValueError):
+        archive.open('first.txt', 'wb')
+    with pytest.raises(IsADirectoryError):
+        archive.open('lib')
+
+
+def test_unpacked_entries_read_from_the_sidecar(archive):
+    info = archive.stat('lib/addon.node')
+    assert info.unpacked and info.offset is None and info.size == 11
+    if os.name != 'nt':
+        assert info.executable
+    assert archive.unpacked_paths() == {'lib/addon.node'}
+    assert archive.read('lib/addon.node') == b'native body'
+    assert archive.read('lib/addon.node', offset=7, size=2) == b'bo'
+    with archive.open('lib/addon.node') as f:
+        f.seek(-4, io.SEEK_END)
+        assert f.read() == b'body'
+
+    os.remove(os.path.join(archive.unpacked_dir, 'lib', 'addon.node'))
+    with pytest.raises(FileNotFoundError):
+        archive.read('lib/addon.node')
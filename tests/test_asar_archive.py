@@ -0,0 +1,156 @@
+import os
+import io
+import json
+import struct
+
+import pytest
+
+from asar_archive import AsarArchive, AsarError, read_header, encode_header, pack_directory
+
+# Created in this order, which is neither sorted nor what a sort would give
+NAMES = ['zeta.js', 'Alpha.js', 'ä-umlaut.txt', '10.txt', '9.txt', '￿.txt', '\U0001f600.txt', '_b']
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def tree_files(root):
+    """{relative path: bytes} for regular files, following no links"""
+    found = {}
+    for base, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(base, name)
+            if os.path.islink(path):
+                continue
+            with open(path, 'rb') as f:
+                found[os.path.relpath(path, root).replace(os.sep, '/')] = f.read()
+    return found
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'app'
+    for index, name in enumerate(NAMES):
+        write(str(root / 'names' / name), name.encode('utf-8') * (index + 1))
+    write(str(root / 'package.json'), b'{"name": "app", "main": "main.js"}')
+    write(str(root / 'main.js'), b"require('./lib/addon.node');\n")
+    write(str(root / 'empty.js'), b'')
+    write(str(root / 'lib' / 'addon.node'), b'\x7fELF' + bytes(range(256)) * 4)
+    write(str(root / 'lib' / 'deep' / 'nested' / 'data.bin'), os.urandom(70000))
+    write(str(root / 'bin' / 'tool'), b'#!/bin/sh\necho tool\n')
+    if os.name != 'nt':
+        os.chmod(str(root / 'bin' / 'tool'), 0o755)
+    try:
+        os.symlink('main.js', str(root / 'index.js'))
+        os.symlink(os.path.join('lib', 'deep'), str(root / 'deep'))
+    except (OSError, NotImplementedError):
+        pass
+    return root
+
+
+def test_header_encoding_round_trip():
+    header = {'files': {'a.js': {'size': 3, 'offset': '0'}, 'ü': {'files': {}}}}
+    data, header_string = encode_header(header)
+    assert len(data) % 4 == 0
+    parsed, header_size, parsed_string = read_header(io.BytesIO(data))
+    assert parsed == header
+    assert parsed_string == header_string
+    assert 8 + header_size == len(data)
+
+
+def test_read_header_rejects_malformed_input():
+    with pytest.raises(AsarError):
+        read_header(io.BytesIO(b'abc'))
+    with pytest.raises(AsarError):
+        read_header(io.BytesIO(struct.pack('<II', 5, 8) + b'\0' * 8))
+    data, _ = encode_header({'files': {}})
+    with pytest.raises(AsarError):
+        read_header(io.BytesIO(data[:-2]))
+    not_a_table, _ = encode_header({'nothing': 1})
+    with pytest.raises(AsarError):
+        read_header(io.BytesIO(not_a_table))
+
+
+def test_pack_and_extract_round_trip(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    summary = pack_directory(str(source), archive_path, unpack=('*.node',))
+    expected = tree_files(str(source))
+    assert summary['unpacked'] == 1
+    assert summary['bytes'] == sum(len(data) for data in expected.values())
+
+    with AsarArchive(archive_path) as archive:
+        # Entries are ordered by name however the directory lists them
+        assert list(archive.header['files']['names']['files']) == sorted(NAMES)
+
+        for rel_path, data in expected.items():
+            assert archive.read(rel_path) == data
+            assert archive.stat(rel_path).size == len(data)
+        assert archive.read('lib/deep/nested/data.bin', 100, 50) == expected['lib/deep/nested/data.bin'][100:150]
+
+        empty = archive.header['files']['empty.js']
+        assert empty['size'] == 0 and 'integrity' in empty
+        addon = archive.stat('lib/addon.node')
+        assert addon.unpacked and addon.offset is None
+        assert archive.unpacked_paths() == {'lib/addon.node'}
+        with open(os.path.join(archive_path + '.unpacked', 'lib', 'addon.node'), 'rb') as f:
+            assert f.read() == expected['lib/addon.node']
+        with archive.open('lib/addon.node') as f:
+            assert f.read() == expected['lib/addon.node']
+        if os.name != 'nt':
+            assert archive.stat('bin/tool').executable
+
+        if os.path.islink(str(source / 'index.js')):
+            assert archive.header['files']['index.js'] == {'link': 'main.js'}
+            assert archive.header['files']['deep'] == {'link': 'lib/deep'}
+            assert archive.stat('index.js', follow_links=False).is_link
+            assert archive.read('index.js') == expected['main.js']
+            assert archive.read('deep/nested/data.bin') == expected['lib/deep/nested/data.bin']
+
+        dest = str(tmp_path / 'extracted')
+        written = archive.extract(dest)
+        assert len(written) == len(expected)
+
+    assert tree_files(dest) == expected
+    if os.path.islink(str(source / 'index.js')):
+        assert os.readlink(os.path.join(dest, 'index.js')) == 'main.js'
+        with open(os.path.join(dest, 'deep', 'nested', 'data.bin'), 'rb') as f:
+            assert f.read() == expected['lib/deep/nested/data.bin']
+    if os.name != 'nt':
+        assert os.stat(os.path.join(dest, 'bin', 'tool')).st_mode & 0o100
+
+
+def test_repacking_is_byte_identical(source, tmp_path):
+    first = str(tmp_path / 'first.asar')
+    second = str(tmp_path / 'second.asar')
+    pack_directory(str(source), first, unpack=('*.node',))
+    with AsarArchive(first) as archive:
+        archive.extract(str(tmp_path / 'extracted'))
+    pack_directory(str(tmp_path / 'extracted'), second, unpack=('*.node',))
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_packed_header_matches_asar_layout(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path)
+    with open(archive_path, 'rb') as f:
+        header, header_size, header_string = read_header(f)
+    assert header_string == json.dumps(header, separators=(',', ':'), ensure_ascii=False)
+    # Offsets are strings and bodies follow each other in header order
+    offsets = [(int(node['offset']), node['size']) for node in _file_nodes(header) if 'offset' in node]
+    position = 0
+    for offset, size in offsets:
+        assert offset == position
+        position += size
+    assert os.path.getsize(archive_path) == 8 + header_size + position
+
+
+def _file_nodes(node):
+    for child in node['files'].values():
+        if 'files' in child:
+            yield from _file_nodes(child)
+        elif 'link' not in child:
+            yield child
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from asar_archive import AsarArchive, pack_directory
+from asar_diff import diff_archives, iter_diff, text_diff, _change_reason, MAX_TEXT_DIFF_SIZE
+
+needs_links = pytest.mark.skipif(os.name == 'nt', reason="symlinks need extra privileges on Windows")
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(root, files, links=(), executable=()):
+    for rel_path, data in files.items():
+        write(str(root / rel_path), data)
+    for rel_path in executable:
+        os.chmod(str(root / rel_path), 0o755)
+    for rel_path, target in links:
+        os.symlink(target, str(root / rel_path))
+    return root
+
+
+@pytest.fixture
+def archives(tmp_path):
+    big = b'line\n' * (MAX_TEXT_DIFF_SIZE // 5 + 1)
+    shared = {
+        'same.js': b'module.exports = 1;\n',
+        'tool.sh': b'#!/bin/sh\necho hi\n',
+    }
+    old = build(tmp_path / 'old', dict(shared, **{
+        'grow.js': b'a\n',
+        'edit.js': b'const x = 1;\n',
+        'swap.js': b'file first\n',
+        'gone.js': b'bye\n',
+        'big.txt': big,
+        'blob.bin': b'\0\1\2\3',
+    }), links=[('alias.js', 'same.js')])
+    new = build(tmp_path / 'new', dict(shared, **{
+        'grow.js': b'a\nb',
+        'edit.js': b'const x = 2;\n',
+        'added.js': b'hello\n',
+        'big.txt': big[:-2] + b'X\n',
+        'blob.bin': b'\0\1\2\4',
+    }), links=[('alias.js', 'edit.js'), ('swap.js', 'same.js')], executable=['tool.sh'])
+    paths = str(tmp_path / 'old.asar'), str(tmp_path / 'new.asar')
+    pack_directory(str(old), paths[0])
+    pack_directory(str(new), paths[1])
+    return paths
+
+
+@needs_links
+def test_diff_archives_reports_each_reason(archives):
+    summary = diff_archives(*archives)
+    assert [change['path'] for change in summary['added']] == ['added.js']
+    assert [change['path'] for change in summary['removed']] == ['gone.js']
+    assert {change['path']: change['reason'] for change in summary['changed']} == {
+        'alias.js': 'link',
+        'big.txt': 'content',
+        'blob.bin': 'content',
+        'edit.js': 'content',
+        'grow.js': 'size',
+        'swap.js': 'type',
+        'tool.sh': 'executable',
+    }
+    assert summary['unchanged'] == 1
+
+
+@needs_links
+def test_iter_diff_is_in_path_order_with_text_diffs(archives):
+    with AsarArchive(archives[0]) as old, AsarArchive(archives[1]) as new:
+        changes = list(iter_diff(old, new, text=True, context=0))
+    assert [change['path'] for change in changes] == sorted(change['path'] for change in changes)
+    by_path = {change['path']: change for change in changes}
+    assert by_path['edit.js']['diff'] == [
+        '--- a/edit.js\n', '+++ b/edit.js\n', '@@ -1 +1 @@\n', '-const x = 1;\n', '+const x = 2;\n']
+    assert by_path['grow.js']['diff'][-2:] == ['+b\n', '\\ No newline at end of file\n']
+    assert by_path['grow.js']['old_size'] == 2 and by_path['grow.js']['new_size'] == 3
+    # Binary bodies and anything over the cap are reported without a diff
+    assert 'diff' not in by_path['blob.bin']
+    assert 'diff' not in by_path['big.txt']
+    assert 'diff' not in by_path['tool.sh']
+
+
+def test_text_diff_cap(tmp_path):
+    at_cap = b'x\n' * (MAX_TEXT_DIFF_SIZE // 2)
+    old = build(tmp_path / 'old', {'at.txt': at_cap, 'over.txt': at_cap})
+    new = build(tmp_path / 'new', {'at.txt': at_cap[:-2] + b'y\n', 'over.txt': at_cap + b'z'})
+    pack_directory(str(old), str(tmp_path / 'old.asar'))
+    pack_directory(str(new), str(tmp_path / 'new.asar'))
+    with AsarArchive(str(tmp_path / 'old.asar')) as old_archive, \
+            AsarArchive(str(tmp_path / 'new.asar')) as new_archive:
+        assert text_diff(old_archive, new_archive, 'at.txt', context=0)[-2:] == ['-x\n', '+y\n']
+        assert text_diff(old_archive, new_archive, 'over.txt') is None
+
+
+class _Bodies:
+    """Stands in for an archive whose header carries no integrity"""
+
+    def __init__(self, **bodies):
+        self.bodies = bodies
+
+    def read(self, rel_path):
+        return self.bodies[rel_path]
+
+
+def test_change_reason_without_integrity_compares_bodies():
+    node = {'size': 3, 'offset': '0'}
+    old = _Bodies(**{'a.js': b'abc'})
+    assert _change_reason(old, node, _Bodies(**{'a.js': b'abc'}), dict(node), 'a.js') is None
+    assert _change_reason(old, node, _Bodies(**{'a.js': b'abd'}), dict(node), 'a.js') == 'content'
+    # One side without a hash falls back to the bodies as well
+    hashed = dict(node, integrity={'hash': 'f' * 64})
+    assert _change_reason(old, node, _Bodies(**{'a.js': b'abc'}), hashed, 'a.js') is None
+    assert _change_reason(old, node, old, dict(node, executable=True), 'a.js') == 'executable'
+
+
+def test_change_reason_prefers_header_hashes():
+    def reader(rel_path):
+        raise AssertionError("bodies should not be read")
+    old = _Bodies()
+    old.read = reader
+    node = {'size': 3, 'integrity': {'hash': 'a' * 64}}
+    assert _change_reason(old, node, old, dict(node), 'a.js') is None
+    assert _change_reason(old, node, old, dict(node, integrity={'hash': 'b' * 64}), 'a.js') == 'content'
+    assert _change_reason(old, node, old, dict(node, size=4), 'a.js') == 'size'
+    assert _change_reason(old, node, old, {'link': 'b.js'}, 'a.js') == 'type'
+    assert _change_reason(old, {'link': 'b.js'}, old, {'link': 'c.js'}, 'a.js') == 'link'
+    assert _change_reason(old, {'link': 'b.js'}, old, {'link': 'b.js'}, 'a.js') is None
@@ -0,0 +1,88 @@
+import os
+import hashlib
+
+import pytest
+
+from asar_archive import (AsarArchive, IntegrityHasher, INTEGRITY_BLOCK_SIZE, file_integrity,
+                          pack_directory, pack_incremental, load_manifest)
+
+MIB = 1024 * 1024
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def expected_blocks(data):
+    """Electron's block list: whole blocks, then the remainder (possibly empty)"""
+    whole = len(data) // INTEGRITY_BLOCK_SIZE
+    blocks = [hashlib.sha256(data[index * INTEGRITY_BLOCK_SIZE:(index + 1) * INTEGRITY_BLOCK_SIZE]).hexdigest()
+              for index in range(whole)]
+    return blocks + [hashlib.sha256(data[whole * INTEGRITY_BLOCK_SIZE:]).hexdigest()]
+
+
+@pytest.mark.parametrize('size', [0, 1, 4 * MIB - 1, 4 * MIB, 4 * MIB + 1, 9 * MIB])
+def test_block_hashes_at_block_edges(size):
+    data = bytes(range(251)) * (size // 251) + b'x' * (size % 251)
+    hasher = IntegrityHasher()
+    # Chunks that straddle block boundaries
+    for start in range(0, size, 3 * MIB + 7):
+        hasher.update(data[start:start + 3 * MIB + 7])
+    integrity = hasher.result()
+    assert integrity['hash'] == hashlib.sha256(data).hexdigest()
+    assert integrity['blockSize'] == INTEGRITY_BLOCK_SIZE
+    assert integrity['blocks'] == expected_blocks(data)
+    assert len(integrity['blocks']) == size // INTEGRITY_BLOCK_SIZE + 1
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'app'
+    write(str(root / 'exact.bin'), os.urandom(4 * MIB))
+    write(str(root / 'nine.bin'), os.urandom(9 * MIB))
+    write(str(root / 'main.js'), b"console.log('hello');\n")
+    write(str(root / 'empty.js'), b'')
+    write(str(root / 'lib' / 'addon.node'), os.urandom(5000))
+    return root
+
+
+def test_packed_integrity_matches_file_hashes(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path, unpack=('*.node',))
+    with AsarArchive(archive_path) as archive:
+        for name in ('exact.bin', 'nine.bin', 'main.js', 'empty.js', 'lib/addon.node'):
+            node = archive._lookup(name)
+            assert node['integrity'] == file_integrity(str(source / name))
+        assert len(archive._lookup('exact.bin')['integrity']['blocks']) == 2
+        assert len(archive._lookup('nine.bin')['integrity']['blocks']) == 3
+
+
+
+def test_incremental_repack_matches_full_pack(source, tmp_path):
+    original = str(tmp_path / 'app.asar')
+    pack_directory(str(source), original, unpack=('*.node',))
+    extracted = str(tmp_path / 'extracted')
+    manifest_path = str(tmp_path / 'extracted.manifest.json')
+    with AsarArchive(original) as archive:
+        archive.extract(extracted, manifest_path=manifest_path)
+    assert set(load_manifest(manifest_path)['files']) == {'exact.bin', 'nine.bin', 'main.js', 'empty.js',
+                                                            'lib/addon.node'}
+
+    write(os.path.join(extracted, 'main.js'), b"console.log('edited');\n")
+    # Touched but unchanged: found to be the same by its content hash
+    os.utime(os.path.join(extracted, 'exact.bin'), ns=(1, 1))
+
+    incremental = str(tmp_path / 'incremental.asar')
+    full = str(tmp_path / 'full.asar')
+    summary = pack_incremental(extracted, incremental, manifest_path)
+    pack_directory(extracted, full, unpacked_paths={'lib/addon.node'})
+    assert summary['changed'] == ['main.js']
+    assert summary['reused'] == 4
+    assert summary['reused_bytes'] == 13 * MIB + 5000
+    with open(incremental, 'rb') as a, open(full, 'rb') as b:
+        assert a.read() == b.read()
+    with AsarArchive(incremental) as archive:
+        assert archive.read('main.js') == b"console.log('edited');\n"
+        assert archive.stat('lib/addon.node').unpacked
@@ -0,0 +1,124 @@
+import os
+import json
+
+import pytest
+
+from asar_archive import AsarArchive, pack_directory
+from asar_integrity import VerificationCache, verify_archive, header_hash, find_hash, patch_header_hash
+
+MIB = 1024 * 1024
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'app'
+    write(str(root / 'exact.bin'), os.urandom(4 * MIB))
+    write(str(root / 'nine.bin'), os.urandom(9 * MIB))
+    write(str(root / 'main.js'), b"console.log('hello');\n")
+    write(str(root / 'empty.js'), b'')
+    write(str(root / 'lib' / 'addon.node'), os.urandom(5000))
+    return root
+
+
+def test_packed_integrity_verifies(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path, unpack=('*.node',))
+    report = verify_archive(archive_path, jobs=2, full=True)
+    assert report['ok'], report['mismatches']
+    assert report['files'] == 5
+
+
+def test_verify_reports_the_corrupted_block(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path, unpack=('*.node',))
+    with AsarArchive(archive_path) as archive:
+        start = archive.stat('nine.bin').offset
+    with open(archive_path, 'r+b') as f:
+        f.seek(start + 8 * MIB + 10)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+    with open(str(tmp_path / 'app.asar.unpacked' / 'lib' / 'addon.node'), 'ab') as f:
+        f.write(b'!')
+
+    report = verify_archive(archive_path)
+    assert not report['ok']
+    problems = {(m['path'], m['problem'], m.get('block')) for m in report['mismatches']}
+    assert ('nine.bin', 'block', 2) in problems
+    assert any(path == 'lib/addon.node' for path, _, _ in problems)
+    assert not any(path == 'exact.bin' for path, _, _ in problems)
+
+
+def test_cache_skips_verified_entries_until_the_archive_changes(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path, unpack=('*.node',))
+    cache_path = str(tmp_path / 'integrity-cache.json')
+
+    report = verify_archive(archive_path, cache=VerificationCache(cache_path))
+    assert report['ok'] and report['skipped'] == 0
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        assert set(json.load(f)[os.path.abspath(archive_path)]['verified']) == {
+            'exact.bin', 'nine.bin', 'main.js', 'empty.js', 'lib/addon.node'}
+
+    seen = []
+    report = verify_archive(archive_path, cache=VerificationCache(cache_path),
+                            progress=lambda files, nbytes: seen.append(files))
+    assert report['ok'] and report['skipped'] == 5 and seen == []
+
+    # Any change to the archive file drops its record
+    os.utime(archive_path, ns=(1, 1))
+    assert VerificationCache(cache_path).verified(archive_path) == {}
+    assert verify_archive(archive_path, cache=VerificationCache(cache_path))['skipped'] == 0
+
+
+def test_cache_forgets_entries_that_failed(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path)
+    with AsarArchive(archive_path) as archive:
+        start = archive.stat('main.js').offset
+    with open(archive_path, 'r+b') as f:
+        f.seek(start)
+        f.write(b'C')
+    cache = VerificationCache(str(tmp_path / 'integrity-cache.json'))
+    report = verify_archive(archive_path, cache=cache)
+    assert [m['path'] for m in report['mismatches']] == ['main.js']
+    assert 'main.js' not in cache.verified(archive_path)
+    assert 'nine.bin' in cache.verified(archive_path)
+
+
+def test_missing_cache_file_starts_empty(tmp_path):
+    cache = VerificationCache(str(tmp_path / 'nothing.json'))
+    assert cache.verified(str(tmp_path / 'app.asar')) == {}
+
+
+def test_patch_header_hash_updates_embedded_hash(source, tmp_path):
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), archive_path)
+    with AsarArchive(archive_path) as archive:
+        old_hash = header_hash(archive.header_string)
+    exe_path = str(tmp_path / 'app.exe')
+    resource = f'[{{"file":"resources\\\\app.asar","alg":"SHA256","value":"{old_hash}"}}]'.encode('ascii')
+    write(exe_path, b'MZ' + os.urandom(1000) + resource + os.urandom(1000) + resource)
+    size = os.path.getsize(exe_path)
+
+    write(str(source / 'main.js'), b"console.log('changed');\n")
+    pack_directory(str(source), archive_path)
+    with AsarArchive(archive_path) as archive:
+        new_hash = header_hash(archive.header_string)
+    assert new_hash != old_hash
+
+    assert verify_archive(archive_path, exe_path=exe_path)['exe_has_header_hash'] is False
+    assert patch_header_hash(exe_path, old_hash, new_hash) == 2
+    assert find_hash(exe_path, old_hash) == 0
+    assert find_hash(exe_path, new_hash) == 2
+    assert os.path.getsize(exe_path) == size
+    assert verify_archive(archive_path, exe_path=exe_path)['exe_has_header_hash'] is True
+    assert patch_header_hash(exe_path, new_hash, new_hash) == 0
+    with pytest.raises(ValueError):
+        patch_header_hash(exe_path, new_hash, new_hash[:-1])
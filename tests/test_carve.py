@@ -0,0 +1,151 @@
+import io
+import os
+import zlib
+import struct
+import zipfile
+
+import pytest
+
+from asar_archive import AsarArchive, pack_directory
+from carve import find_asar, find_zip, find_7z, find_versions, scan, _sections, _without
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return buffer.getvalue()
+
+
+def seven_zip_bytes(payload=b'\0' * 64):
+    tail = struct.pack('<QQI', len(payload), 0, 0)
+    return b"7z\xbc\xaf\x27\x1c\x00\x04" + struct.pack('<I', zlib.crc32(tail)) + tail + payload
+
+
+def pe_bytes(sections):
+    """A bare PE image: headers in the first 0x400 bytes, then each (name, data, characteristics)"""
+    head = bytearray(0x400)
+    head[:2] = b'MZ'
+    struct.pack_into('<I', head, 0x3C, 0x80)
+    head[0x80:0x84] = b'PE\0\0'
+    struct.pack_into('<HHIIIHH', head, 0x84, 0x8664, len(sections), 0, 0, 0, 0xF0, 0x22)
+    offset = len(head)
+    for index, (name, data, characteristics) in enumerate(sections):
+        struct.pack_into('<8sIIIIIIHHI', head, 0x80 + 24 + 0xF0 + index * 40, name, len(data), offset,
+                         len(data), offset, 0, 0, 0, 0, characteristics)
+        offset += len(data)
+    return bytes(head) + b''.join(data for _, data, _ in sections)
+
+
+@pytest.fixture
+def asar_data(tmp_path):
+    root = tmp_path / 'app'
+    write(str(root / 'main.js'), b"console.log('hello');\n")
+    write(str(root / 'lib' / 'util.js'), b'module.exports = 1;\n' * 50)
+    # A zip stored as a file of the app, which belongs to the asar rather than the executable
+    write(str(root / 'assets' / 'bundle.zip'), zip_bytes({'inner.txt': b'inside'}))
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(root), archive_path)
+    with open(archive_path, 'rb') as f:
+        return f.read()
+
+
+def test_asar_found_at_its_offset(asar_data, tmp_path):
+    prefix = os.urandom(100003)
+    path = str(tmp_path / 'app.exe')
+    write(path, prefix + asar_data + os.urandom(5000))
+
+    found = scan(path)
+    assert [(region.kind, region.offset, region.length) for region in found['regions']] == [
+        ('asar', len(prefix), len(asar_data))]
+    with AsarArchive(path, len(prefix)) as archive:
+        assert archive.read('main.js') == b"console.log('hello');\n"
+
+
+def test_zip_inside_asar_is_not_reported(asar_data, tmp_path):
+    payload = zip_bytes({'readme.txt': b'outside'})
+    data = os.urandom(4096) + asar_data + os.urandom(4096) + payload
+    path = str(tmp_path / 'app.exe')
+    write(path, data)
+
+    # Searched alone, the zip stored inside the asar shows up too
+    assert len(find_zip(data)) == 2
+    regions = scan(path)['regions']
+    assert [(region.kind, region.offset) for region in regions] == [
+        ('asar', 4096), ('zip', len(data) - len(payload))]
+    assert regions[1].length == len(payload)
+
+
+def test_truncated_asar_is_rejected(asar_data):
+    assert find_asar(b'\0' * 64 + asar_data[:-10]) == []
+
+
+def test_asar_with_wrong_framing_is_rejected(asar_data):
+    broken = bytearray(asar_data)
+    struct.pack_into('<I', broken, 4, struct.unpack_from('<I', asar_data, 4)[0] + 8)
+    assert find_asar(bytes(broken)) == []
+    assert find_asar(asar_data[:16] + b'{"files": nonsense' + asar_data[34:]) == []
+
+
+def test_zip_without_local_header_is_rejected():
+    payload = bytearray(zip_bytes({'a.txt': b'a'}))
+    assert [region.offset for region in find_zip(b'x' * 10 + bytes(payload))] == [10]
+    payload[:4] = b'XXXX'
+    assert find_zip(b'x' * 10 + bytes(payload)) == []
+    # An end record cut short has nothing to point at
+    assert find_zip(b'x' * 10 + zip_bytes({'a.txt': b'a'})[:-5]) == []
+
+
+def test_7z_needs_a_matching_start_header_crc():
+    archive = seven_zip_bytes()
+    assert [(region.offset, region.length) for region in find_7z(b'y' * 7 + archive)] == [(7, len(archive))]
+
+    corrupt = bytearray(archive)
+    corrupt[14] ^= 0xff
+    assert find_7z(b'y' * 7 + bytes(corrupt)) == []
+    assert find_7z(b'y' * 7 + archive[:-1]) == []
+    assert find_7z(b'y' * 7 + archive[:20]) == []
+
+
+def test_most_frequent_versions_win():
+    data = (b'Mozilla/5.0 Chrome/120.0.6099.109 Electron/28.1.0 Safari/537.36\0' * 3
+            + b'Electron/27.0.0\0Chrome/1.2.3\0'
+            + b'https://nodejs.org/download/release/v18.18.2/node-v18.18.2-headers.tar.gz\0'
+            + b'Electron/\0/node-v\0')
+    assert find_versions(data) == {'electron': '28.1.0', 'chromium': '120.0.6099.109', 'node': '18.18.2'}
+    assert find_versions(os.urandom(1000).replace(b'/', b'_')) == {}
+
+
+def test_pe_code_sections_are_not_searched(tmp_path):
+    payload = zip_bytes({'a.txt': b'a'})
+    code = b'\xcc' * 4096 + payload + b'Electron/1.0.0\0' + b'\xcc' * 4096
+    rodata = b'\0' * 100 + b'Electron/28.1.0\0' + b'\0' * 100
+    writable = b'Electron/9.9.9\0Electron/9.9.9\0'
+    image = pe_bytes([(b'.text', code, 0x60000020), (b'.rdata', rodata, 0x40000040),
+                      (b'.data', writable, 0xC0000040)])
+    path = str(tmp_path / 'app.exe')
+    write(path, image + payload)
+
+    assert [flags for _, _, flags in _sections(image)] == [{'code'}, {'rodata'}, set()]
+    found = scan(path)
+    # Only the overlay's zip counts, and versions come from read-only data alone
+    assert [(region.kind, region.offset) for region in found['regions']] == [('zip', len(image))]
+    assert found['versions'] == {'electron': '28.1.0'}
+
+
+def test_unknown_formats_are_searched_whole():
+    assert _sections(b'MZ' + b'\0' * 100) == []
+    assert _sections(os.urandom(4096).replace(b'MZ', b'mz').replace(b'\x7fELF', b'xELF')) == []
+
+
+def test_without_cuts_holes():
+    assert _without([(0, 100)], [(10, 20), (50, 150)]) == [(0, 10), (20, 50)]
+    assert _without([(0, 10), (20, 30)], [(0, 30)]) == []
+    assert _without([(0, 10)], []) == [(0, 10)]
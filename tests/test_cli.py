@@ -0,0 +1,48 @@
+import os
+import json
+
+import pytest
+
+from analyzer_engine import main
+from asar_archive import pack_directory
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'package.json').write_bytes(b'{"name": "neighbour", "version": "1.0.0"}')
+    app = tmp_path / 'X'
+    app.mkdir()
+    pack_directory(str(source), str(app / 'app.asar'))
+    return app
+
+
+def results(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize('name', ['typo.exe', 'does-not-exist'])
+def test_extract_missing_target_fails(app_dir, tmp_path, capsys, name):
+    status = main(['extract', str(app_dir / name), '-o', str(tmp_path / 'ws'), '-j', '1'])
+    result, = results(capsys)
+    assert status == 1
+    assert result['status'] == 'error'
+    assert 'No such application' in result['error']
+    assert result['extract_dir'] is None and not result.get('source_asar')
+
+
+def test_inspect_missing_target_fails(app_dir, capsys):
+    status = main(['inspect', str(app_dir / 'does-not-exist'), '-j', '1'])
+    result, = results(capsys)
+    assert status == 1
+    assert result['status'] == 'error'
+    assert not result.get('package')
+
+
+def test_inspect_existing_target(app_dir, capsys):
+    assert main(['inspect', str(app_dir), '-j', '1']) == 0
+    result, = results(capsys)
+    assert result['status'] == 'inspected'
+    assert result['package']['name'] == 'neighbour'
+    assert result['source_asar'] == os.path.join(str(app_dir), 'app.asar')
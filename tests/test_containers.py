@@ -0,0 +1,221 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import containers
+from asar_archive import AsarArchive, pack_directory
+from containers import detect, extract, open_asar, _deb_data, _extract_tar
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def ar_member(name, data):
+    header = f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}`\n".encode('ascii')
+    return header + data + (b'\n' if len(data) & 1 else b'')
+
+
+def tar_bytes(files, mode='w:gz'):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        for name, data in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Packed app.asar with an unpacked native module, and the files it holds"""
+    root = tmp_path / 'src'
+    files = {
+        'package.json': b'{"name": "demo", "main": "main.js"}',
+        'main.js': b"require('./lib/util');\n" * 100,
+        'lib/util.js': b'module.exports = 42;\n',
+        'lib/addon.node': os.urandom(3001),
+    }
+    for rel_path, data in files.items():
+        write(str(root / rel_path), data)
+    archive_path = str(tmp_path / 'app.asar')
+    pack_directory(str(root), archive_path, unpack=('*.node',))
+    members = [('resources/app.asar', read(archive_path)),
+               ('resources/app.asar.unpacked/lib/addon.node', files['lib/addon.node'])]
+    return members, files
+
+
+def make_zip(path, members, compression):
+    with zipfile.ZipFile(path, 'w', compression) as z:
+        z.writestr('lib/net45/other.txt', b'not the app')
+        for name, data in members:
+            z.writestr(name, data)
+
+
+def make_deb(path, members):
+    data = tar_bytes([('./usr/lib/demo/' + name, body) for name, body in members])
+    write(path, b'!<arch>\n' + ar_member('debian-binary', b'2.0\n')
+          + ar_member('control.tar.gz', tar_bytes([('./control', b'Package: demo\n')]) + b'x')
+          + ar_member('data.tar.gz', data))
+
+
+def assert_tree(dest, files):
+    for rel_path, data in files.items():
+        assert read(os.path.join(dest, rel_path)) == data
+
+
+def test_detect(app, tmp_path):
+    members, _ = app
+    make_zip(str(tmp_path / 'a.zip'), members, zipfile.ZIP_STORED)
+    make_deb(str(tmp_path / 'a.deb'), members)
+    write(str(tmp_path / 'a.tar.gz'), tar_bytes(members))
+    write(str(tmp_path / 'a.AppImage'), b'\x7fELF\x02\x01\x01\0AI\x02' + b'\0' * 100)
+    write(str(tmp_path / 'noise.bin'), b'\x01' * 4096)
+
+    assert detect(str(tmp_path / 'a.zip')) == 'zip'
+    assert detect(str(tmp_path / 'a.deb')) == 'deb'
+    assert detect(str(tmp_path / 'a.tar.gz')) == 'tar'
+    assert detect(str(tmp_path / 'a.AppImage')) == 'appimage'
+    assert detect(str(tmp_path / 'noise.bin')) is None
+
+
+def test_deb_data_skips_padded_members(app, tmp_path):
+    members, _ = app
+    path = str(tmp_path / 'a.deb')
+    make_deb(path, members)
+    offset, size, name = _deb_data(path)
+    assert name == 'data.tar.gz'
+    with tarfile.open(fileobj=io.BytesIO(read(path)[offset:offset + size])) as tar:
+        assert './usr/lib/demo/resources/app.asar' in tar.getnames()
+
+    write(str(tmp_path / 'empty.deb'), b'!<arch>\n' + ar_member('debian-binary', b'2.0\n'))
+    with pytest.raises(Exception, match='No data.tar'):
+        _deb_data(str(tmp_path / 'empty.deb'))
+
+
+def test_stored_zip_is_extracted_in_place(app, tmp_path):
+    members, files = app
+    path = str(tmp_path / 'app.nupkg')
+    make_zip(path, members, zipfile.ZIP_STORED)
+    manifest = str(tmp_path / 'manifest.json')
+
+    result = extract(path, str(tmp_path / 'out'), manifest_path=manifest)
+    assert result['member'] == 'resources/app.asar'
+    assert result['in_place']
+    assert result['unpacked_paths'] == {'lib/addon.node'}
+    assert os.path.exists(manifest)
+    assert_tree(str(tmp_path / 'out'), files)
+
+
+def test_deflated_zip_is_streamed(app, tmp_path):
+    members, files = app
+    path = str(tmp_path / 'portable.zip')
+    make_zip(path, members, zipfile.ZIP_DEFLATED)
+    manifest = str(tmp_path / 'manifest.json')
+
+    result = extract(path, str(tmp_path / 'out'), manifest_path=manifest)
+    assert not result['in_place']
+    assert result['unpacked_paths'] == {'lib/addon.node'}
+    assert not os.path.exists(manifest)
+    assert len(result['files']) == len(files)
+    assert_tree(str(tmp_path / 'out'), files)
+
+
+@pytest.mark.parametrize('kind', ['tar.gz', 'deb'])
+def test_tar_and_deb_round_trip(app, tmp_path, kind):
+    members, files = app
+    path = str(tmp_path / f'app.{kind}')
+    if kind == 'deb':
+        make_deb(path, members)
+    else:
+        # The unpacked folder before the archive still comes out of the one pass
+        write(path, tar_bytes(list(reversed(members))))
+
+    result = extract(path, str(tmp_path / 'out'))
+    assert result['member'].endswith('resources/app.asar')
+    assert result['unpacked_paths'] == {'lib/addon.node'}
+    assert_tree(str(tmp_path / 'out'), files)
+
+
+def test_tar_is_read_in_one_pass(app, tmp_path, monkeypatch):
+    members, files = app
+    path = str(tmp_path / 'app.tar.gz')
+    write(path, tar_bytes(members))
+
+    def no_seek(self, offset, whence=io.SEEK_SET):
+        raise AssertionError("tar stream was seeked")
+    monkeypatch.setattr(containers._Slice, 'seek', no_seek)
+    result = _extract_tar(path, str(tmp_path / 'out'), 'app.asar', 0, None, None)
+    assert result['unpacked_paths'] == {'lib/addon.node'}
+    assert_tree(str(tmp_path / 'out'), files)
+
+
+def test_container_at_an_offset(app, tmp_path):
+    members, files = app
+    make_zip(str(tmp_path / 'inner.zip'), members, zipfile.ZIP_STORED)
+    inner = read(str(tmp_path / 'inner.zip'))
+    path = str(tmp_path / 'Setup.exe')
+    write(path, os.urandom(7777) + inner + os.urandom(333))
+
+    assert detect(path, 7777, len(inner)) == 'zip'
+    result = extract(path, str(tmp_path / 'out'), offset=7777, length=len(inner))
+    assert result['in_place']
+    assert_tree(str(tmp_path / 'out'), files)
+
+
+def test_open_asar_in_place_for_stored_zip(app, tmp_path):
+    members, files = app
+    path = str(tmp_path / 'app.nupkg')
+    make_zip(path, members, zipfile.ZIP_STORED)
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+
+    with open_asar(path, spool_dir=str(spool)) as archive:
+        assert archive.path == path
+        assert archive.read('main.js') == files['main.js']
+    assert os.listdir(str(spool)) == []
+
+
+@pytest.mark.parametrize('kind', ['zip', 'tar.gz', 'deb'])
+def test_open_asar_spools_compressed_archives(app, tmp_path, kind):
+    members, files = app
+    path = str(tmp_path / f'app.{kind}')
+    if kind == 'zip':
+        make_zip(path, members, zipfile.ZIP_DEFLATED)
+    elif kind == 'deb':
+        make_deb(path, members)
+    else:
+        write(path, tar_bytes(members))
+    spool = tmp_path / 'spool'
+    spool.mkdir()
+
+    with open_asar(path, spool_dir=str(spool)) as archive:
+        assert os.path.dirname(archive.path) == str(spool)
+        assert archive.read('lib/util.js') == files['lib/util.js']
+        assert isinstance(archive, AsarArchive)
+    # The spooled copy is gone once the archive is closed
+    assert os.listdir(str(spool)) == []
+
+
+def test_missing_archive(tmp_path):
+    path = str(tmp_path / 'other.zip')
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('readme.txt', b'nothing here')
+    write(str(tmp_path / 'other.tar.gz'), tar_bytes([('readme.txt', b'nothing here')]))
+
+    assert extract(path, str(tmp_path / 'out')) is None
+    assert extract(str(tmp_path / 'other.tar.gz'), str(tmp_path / 'out')) is None
+    for candidate in (path, str(tmp_path / 'other.tar.gz')):
+        with pytest.raises(FileNotFoundError):
+            with open_asar(candidate):
+                pass
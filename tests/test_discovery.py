@@ -0,0 +1,80 @@
+import os
+
+import discovery
+from discovery import discover, iter_levels, _scan, SKIP_DIRS
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'')
+
+
+def layout(tmp_path):
+    """An install folder with the app one level down and a stray archive beside it"""
+    app = tmp_path / 'install' / 'App'
+    for rel_path in ['app.exe', 'resources/app.asar', 'resources/default_app.asar',
+                     'resources/app.asar.unpacked/addon.node', 'plugins/deep/other.asar',
+                     'node_modules/dep/dep.asar', 'Locales/en.asar', 'Code Cache/js/cached.asar']:
+        touch(str(app / rel_path))
+    touch(str(tmp_path / 'install' / 'extra' / 'extra.asar'))
+    return app
+
+
+def names(candidates):
+    return [os.path.relpath(candidate.path, candidate.path.split(os.sep + 'install' + os.sep)[0])
+            .replace(os.sep, '/') for candidate in candidates]
+
+
+def test_discover_ranks_and_skips(tmp_path):
+    app = layout(tmp_path)
+    found = discover(str(app))
+    assert names(found)[:2] == ['install/App/resources/app.asar', 'install/App/plugins/deep/other.asar']
+    assert sorted(names(found)[2:]) == ['install/App/resources',
+                                        'install/App/resources/app.asar.unpacked',
+                                        'install/App/resources/default_app.asar']
+    assert [candidate.score for candidate in found] == sorted((c.score for c in found), reverse=True)
+
+
+def test_discover_goes_up_only_when_needed(tmp_path):
+    app = layout(tmp_path)
+    assert not any('extra' in path for path in names(discover(str(app))))
+    everything = discover(str(app), stop_at_first_asar=False)
+    assert 'install/extra/extra.asar' in names(everything)
+
+    empty = tmp_path / 'install' / 'Empty'
+    empty.mkdir()
+    # Nothing at the first level, so the parent's archives are used
+    assert names(discover(str(empty)))[:2] == ['install/App/resources/app.asar', 'install/extra/extra.asar']
+
+
+def test_levels_visit_each_directory_once(tmp_path, monkeypatch):
+    app = layout(tmp_path)
+    scanned = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(discovery.os, 'scandir', lambda path: scanned.append(path) or real_scandir(path))
+
+    levels = list(iter_levels(str(app), parents=1))
+    assert [root for root, _ in levels] == [str(app), str(tmp_path / 'install')]
+    assert len(scanned) == len(set(scanned))
+    assert not any(os.path.basename(path).lower() in SKIP_DIRS for path in scanned)
+    assert [names(found) for _, found in levels][1] == ['install/extra/extra.asar']
+
+
+def test_visited_set_stops_rescans_without_exclude(tmp_path):
+    app = layout(tmp_path)
+    visited = set()
+    first = list(_scan(str(app), 0, 4, SKIP_DIRS, None, visited))
+    # The parent level can't tell the app folder apart by path, but its inode is known
+    second = list(_scan(str(tmp_path / 'install'), 1, 4, SKIP_DIRS, None, visited))
+    assert len(first) == 5
+    assert names(second) == ['install/extra/extra.asar']
+
+
+def test_excluded_root_matches_whatever_its_case(tmp_path, monkeypatch):
+    app = layout(tmp_path)
+    # As on Windows, where the user's spelling and the directory listing can differ in case
+    monkeypatch.setattr(discovery.os.path, 'normcase', lambda path: path.lower())
+    exclude = os.path.normcase(str(app).upper())
+    found = list(_scan(str(tmp_path / 'install'), 1, 4, SKIP_DIRS, exclude, set()))
+    assert names(found) == ['install/extra/extra.asar']
@@ -0,0 +1,70 @@
+import os
+
+from asar_archive import AsarArchive, encode_header, pack_directory
+from extract_cache import ExtractionCache
+
+
+def write_archive(path, files, integrity=None):
+    """Minimal archive of {name: bytes}, with integrity entries if given"""
+    header = {'files': {}}
+    offset = 0
+    for name, data in files.items():
+        node = {'size': len(data), 'offset': str(offset)}
+        if integrity:
+            node['integrity'] = integrity(data)
+        header['files'][name] = node
+        offset += len(data)
+    header_bytes, _ = encode_header(header)
+    with open(path, 'wb') as f:
+        f.write(header_bytes + b''.join(files.values()))
+
+
+def key(path):
+    with AsarArchive(path) as archive:
+        return ExtractionCache.key_for(archive)
+
+
+def test_key_tracks_edits_to_archives_without_integrity(tmp_path):
+    path = str(tmp_path / 'app.asar')
+    write_archive(path, {'main.js': b'hello', 'other.js': b'world'})
+    before = key(path)
+    assert key(path) == before
+
+    # Same header, same size, different contents
+    write_archive(path, {'main.js': b'jello', 'other.js': b'world'})
+    os.utime(path, ns=(1, 1))
+    assert key(path) != before
+
+
+def test_key_ignores_mtime_when_integrity_covers_contents(tmp_path):
+    source = tmp_path / 'app'
+    source.mkdir()
+    (source / 'main.js').write_bytes(b'hello')
+    path = str(tmp_path / 'app.asar')
+    pack_directory(str(source), path)
+    before = key(path)
+    os.utime(path, ns=(1, 1))
+    assert key(path) == before
+
+    copy = str(tmp_path / 'copy.asar')
+    with open(path, 'rb') as src, open(copy, 'wb') as out:
+        out.write(src.read())
+    assert key(copy) == before
+
+
+def test_stale_tree_is_not_served(tmp_path):
+    path = str(tmp_path / 'app.asar')
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+    write_archive(path, {'main.js': b'hello'})
+    with AsarArchive(path) as archive:
+        cache.store(cache.key_for(archive), archive)
+
+    write_archive(path, {'main.js': b'jello'})
+    os.utime(path, ns=(1, 1))
+    with AsarArchive(path) as archive:
+        assert cache.lookup(cache.key_for(archive)) is None
+        entry = cache.store(cache.key_for(archive), archive)
+        dest = str(tmp_path / 'extracted')
+        cache.materialize(cache.key_for(archive), entry, dest)
+    with open(os.path.join(dest, 'main.js'), 'rb') as f:
+        assert f.read() == b'jello'
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+
+import fileops
+from analyzer_engine import AnalyzerEngine
+from fileops import iter_files, copy_files, sync_tree, _Deduper
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_same_size_different_content_is_copied(tmp_path):
+    src = tmp_path / 'src'
+    write(str(src / 'a.js'), b'aaaa')
+    write(str(src / 'b.js'), b'bbbb')
+    write(str(src / 'c.js'), b'aaaa')
+
+    summary = copy_files(iter_files(str(src)), str(tmp_path / 'out'), jobs=1)
+    assert summary['copied'] == 2
+    assert summary['duplicates'] == {'c.js': 'a.js'}
+    assert read(str(tmp_path / 'out' / 'b.js')) == b'bbbb'
+    assert not os.path.exists(str(tmp_path / 'out' / 'c.js'))
+
+
+def test_deduper_hashes_only_on_size_collisions(tmp_path, monkeypatch):
+    hashed = []
+    real_sha256 = fileops.file_sha256
+    monkeypatch.setattr(fileops, 'file_sha256', lambda path: hashed.append(path) or real_sha256(path))
+    for name, data in [('one', b'1'), ('two', b'22'), ('three', b'333'), ('again', b'22')]:
+        write(str(tmp_path / name), data)
+
+    deduper = _Deduper()
+    for name in ('one', 'two', 'three'):
+        assert deduper.original_of(str(tmp_path / name), name, os.path.getsize(str(tmp_path / name))) is None
+    assert hashed == []
+    assert deduper.original_of(str(tmp_path / 'again'), 'again', 2) == 'two'
+    assert sorted(hashed) == [str(tmp_path / 'again'), str(tmp_path / 'two')]
+
+
+def test_three_identical_files_at_once(tmp_path, monkeypatch):
+    real_sha256 = fileops.file_sha256
+
+    def slow_sha256(path):
+        # Holds each hash open long enough for the other threads to catch up
+        time.sleep(0.05)
+        return real_sha256(path)
+    monkeypatch.setattr(fileops, 'file_sha256', slow_sha256)
+    names = ['a.js', 'b.js', 'c.js']
+    for name in names:
+        write(str(tmp_path / name), b'same content\n')
+
+    deduper = _Deduper()
+    start = threading.Barrier(len(names))
+    results = {}
+
+    def check(name):
+        start.wait()
+        results[name] = deduper.original_of(str(tmp_path / name), name, 13)
+    threads = [threading.Thread(target=check, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    kept = [name for name, original in results.items() if original is None]
+    assert len(kept) == 1
+    assert {original for original in results.values() if original} == set(kept)
+
+    summary = copy_files(iter_files(str(tmp_path)), str(tmp_path / 'out'), jobs=3)
+    assert summary['copied'] == 1 and len(summary['duplicates']) == 2
+    original, = set(summary['duplicates'].values())
+    assert os.listdir(str(tmp_path / 'out')) == [original]
+
+
+def test_include_exclude_and_size_filters(tmp_path):
+    src = tmp_path / 'src'
+    write(str(src / 'main.js'), b'x' * 10)
+    write(str(src / 'lib' / 'util.mjs'), b'x' * 20)
+    write(str(src / 'lib' / 'huge.js'), b'x' * 1000)
+    write(str(src / 'lib' / 'tiny.js'), b'x')
+    write(str(src / 'style.css'), b'x' * 10)
+    write(str(src / 'node_modules' / 'dep' / 'index.js'), b'x' * 10)
+    write(str(src / 'test' / 'spec.js'), b'x' * 10)
+    out = src / 'out'
+    write(str(out / 'old.js'), b'x' * 10)
+
+    found = iter_files(str(src), include=fileops.JS_PATTERNS, exclude=('node_modules', 'test/*'),
+                       min_size=5, max_size=100, skip=[str(out)])
+    # Files of a directory come before its subdirectories
+    assert [(rel_path, size) for _, rel_path, size in found] == [('main.js', 10), ('lib/util.mjs', 20)]
+    assert [rel_path for _, rel_path, _ in iter_files(str(src), include=('*.css',))] == ['style.css']
+
+
+def test_extract_packed_js_writes_duplicates(tmp_path):
+    app = tmp_path / 'app'
+    write(str(app / 'main.js'), b"require('./vendor/a');\n")
+    write(str(app / 'vendor' / 'a.js'), b'module.exports = 1;\n')
+    write(str(app / 'copy' / 'a.js'), b'module.exports = 1;\n')
+    write(str(app / 'copy' / 'b.js'), b'module.exports = 2;\n')
+    engine = AnalyzerEngine(output_dir=str(tmp_path / 'ws'))
+
+    assert engine.extract_packed_js(str(app), jobs=1)
+    with open(str(tmp_path / 'ws' / 'extracted_js.duplicates.json'), encoding='utf-8') as f:
+        assert json.load(f) == {'vendor/a.js': 'copy/a.js'}
+    assert sorted(os.path.relpath(path, engine.extract_dir).replace(os.sep, '/')
+                  for path in engine.extracted_files) == ['copy/a.js', 'copy/b.js', 'main.js']
+
+
+def sync(src, dest, tmp_path, **kwargs):
+    return sync_tree(str(src), str(dest), str(tmp_path / 'sync.json'), jobs=2, **kwargs)
+
+
+def touch(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10 ** 9))
+
+
+def test_sync_skips_what_has_not_changed(tmp_path):
+    src, dest = tmp_path / 'src', tmp_path / 'dest'
+    write(str(src / 'a.js'), b'a')
+    write(str(src / 'lib' / 'b.js'), b'bb')
+
+    report = sync(src, dest, tmp_path)
+    assert (report['copied'], report['skipped'], report['bytes_copied']) == (2, 0, 3)
+    assert read(str(dest / 'lib' / 'b.js')) == b'bb'
+    report = sync(src, dest, tmp_path)
+    assert (report['copied'], report['skipped'], report['bytes_skipped']) == (0, 2, 3)
+
+
+def test_sync_recopies_changed_and_damaged_files(tmp_path):
+    src, dest = tmp_path / 'src', tmp_path / 'dest'
+    write(str(src / 'a.js'), b'one')
+    write(str(src / 'b.js'), b'two')
+    write(str(src / 'c.js'), b'six')
+    sync(src, dest, tmp_path)
+
+    write(str(src / 'a.js'), b'three')
+    # Same size, so only the copy's mtime gives the edit away
+    write(str(dest / 'b.js'), b'TWO')
+    touch(str(dest / 'b.js'), 5)
+    report = sync(src, dest, tmp_path)
+    assert (report['copied'], report['skipped']) == (2, 1)
+    assert read(str(dest / 'a.js')) == b'three'
+    assert read(str(dest / 'b.js')) == b'two'
+
+
+def test_sync_checksum_skips_touched_files(tmp_path):
+    src, dest = tmp_path / 'src', tmp_path / 'dest'
+    write(str(src / 'a.js'), b'same')
+    write(str(src / 'b.js'), b'same')
+    sync(src, dest, tmp_path, checksum=True)
+    with open(str(tmp_path / 'sync.json'), encoding='utf-8') as f:
+        assert all('hash' in record for record in json.load(f)['files'].values())
+
+    touch(str(src / 'a.js'), 5)
+    write(str(src / 'b.js'), b'diff')
+    report = sync(src, dest, tmp_path, checksum=True)
+    assert (report['copied'], report['skipped']) == (1, 1)
+    # And the new mtime is trusted from then on
+    assert sync(src, dest, tmp_path, checksum=True)['skipped'] == 2
+
+    touch(str(src / 'a.js'), 5)
+    assert sync(src, dest, tmp_path)['copied'] == 1
+
+
+def test_sync_deletes_files_gone_from_the_source(tmp_path):
+    src, dest = tmp_path / 'src', tmp_path / 'dest'
+    write(str(src / 'keep.js'), b'keep')
+    write(str(src / 'old' / 'deep' / 'gone.js'), b'gone')
+    sync(src, dest, tmp_path)
+    write(str(dest / 'notes.txt'), b'added by hand')
+
+    os.remove(str(src / 'old' / 'deep' / 'gone.js'))
+    report = sync(src, dest, tmp_path)
+    assert report['deleted'] == 1
+    assert not os.path.exists(str(dest / 'old'))
+    assert sorted(os.listdir(str(dest))) == ['keep.js', 'notes.txt']
+
+
+def test_sync_from_another_source_copies_everything(tmp_path):
+    first, second, dest = tmp_path / 'first', tmp_path / 'second', tmp_path / 'dest'
+    for root in (first, second):
+        write(str(root / 'shared.js'), b'same bytes')
+    write(str(first / 'only-first.js'), b'first')
+    write(str(second / 'only-second.js'), b'second')
+    for root in (first, second):
+        stat = os.stat(str(first / 'shared.js'))
+        os.utime(str(root / 'shared.js'), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    sync(first, dest, tmp_path)
+
+    report = sync(second, dest, tmp_path)
+    assert (report['copied'], report['skipped'], report['deleted']) == (2, 0, 1)
+    assert sorted(os.listdir(str(dest))) == ['only-second.js', 'shared.js']
+    with open(str(tmp_path / 'sync.json'), encoding='utf-8') as f:
+        assert json.load(f)['source'] == os.path.abspath(str(second))
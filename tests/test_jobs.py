@@ -0,0 +1,90 @@
+import time
+import queue
+import threading
+
+from jobs import JobScheduler
+
+
+def drain_until(scheduler, handler, count, timeout=10):
+    """Drain events until handler has seen count terminal events"""
+    seen = []
+
+    def record(kind, job, payload):
+        handler(kind, job, payload)
+        if kind != 'progress':
+            seen.append(kind)
+
+    deadline = time.monotonic() + timeout
+    while len(seen) < count and time.monotonic() < deadline:
+        scheduler.drain(record)
+        time.sleep(0.01)
+    return seen
+
+
+def test_scheduler_is_idle_when_a_job_finishes():
+    scheduler = JobScheduler()
+    busy_at_end = {}
+
+    def handler(kind, job, payload):
+        busy_at_end[kind] = scheduler.busy()
+
+    scheduler.submit('done', lambda job: 42)
+    assert drain_until(scheduler, handler, 1) == ['done']
+    scheduler.submit('error', lambda job: 1 / 0)
+    assert drain_until(scheduler, handler, 1) == ['error']
+    assert busy_at_end == {'done': False, 'error': False}
+    scheduler.shutdown()
+
+
+def test_job_leaves_active_set_before_its_event_is_posted():
+    scheduler = JobScheduler()
+    release = threading.Event()
+    job = scheduler.submit('work', lambda job: release.wait(10))
+    # With the lock held the job can't leave the active set, so its
+    # event must not arrive yet either
+    with scheduler._lock:
+        release.set()
+        try:
+            event = scheduler.events.get(timeout=0.5)
+        except queue.Empty:
+            event = None
+        assert event is None or job not in scheduler.active
+    if event is None:
+        event = scheduler.events.get(timeout=10)
+    assert event[0] == 'done' and not scheduler.busy()
+    scheduler.shutdown()
+
+
+def test_cancel_stops_a_job_at_its_next_progress_check():
+    scheduler = JobScheduler()
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.progress(1, 10)
+            time.sleep(0.01)
+
+    job = scheduler.submit('loop', work)
+    assert started.wait(10)
+    scheduler.cancel_all()
+    kinds = []
+    assert drain_until(scheduler, lambda kind, j, payload: kinds.append((kind, j)), 1) == ['cancelled']
+    assert ('cancelled', job) in kinds
+    assert job.files > 0 and not scheduler.busy()
+    scheduler.shutdown()
+
+
+def test_on_done_can_start_the_next_job():
+    scheduler = JobScheduler()
+    order = []
+
+    def handler(kind, job, payload):
+        order.append((job.name, kind, payload))
+        if job.name == 'extract' and not scheduler.busy():
+            scheduler.submit('index', lambda job: 'indexed')
+
+    scheduler.submit('extract', lambda job: 'extracted')
+    drain_until(scheduler, handler, 2)
+    assert order == [('extract', 'done', 'extracted'), ('index', 'done', 'indexed')]
+    scheduler.shutdown()
@@ -0,0 +1,134 @@
+import os
+import json
+
+import pytest
+
+import memory_budget
+from analyzer_engine import main
+from asar_archive import PathList, pack_directory
+from memory_budget import MemoryBudget, MemoryLimitExceeded, WORKER_BASE, MIN_APP_MEMORY
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """Private memory readings handed out in order; the last one repeats"""
+    readings = [0]
+
+    def private_memory():
+        return readings.pop(0) if len(readings) > 1 else readings[0]
+    monkeypatch.setattr(memory_budget, 'private_memory', private_memory)
+    return readings
+
+
+def test_check_under_and_over_the_limit(memory):
+    budget = MemoryBudget(100 * MIB)
+    memory[:] = [60 * MIB]
+    budget.check()
+    # Over once, but back under after collecting garbage
+    memory[:] = [150 * MIB, 90 * MIB]
+    budget.check()
+    memory[:] = [150 * MIB, 140 * MIB]
+    with pytest.raises(MemoryLimitExceeded, match='Using 140 MB, over the 100 MB'):
+        budget.check()
+    assert budget.peak == 150 * MIB
+
+
+def test_unknown_memory_never_trips(memory):
+    memory[:] = [None]
+    budget = MemoryBudget(MIB)
+    budget.check()
+    assert budget.headroom() == MIB
+
+
+def test_progress_checks_at_intervals(memory):
+    forwarded = []
+    budget = MemoryBudget(100 * MIB, interval=3600)
+    progress = budget.progress(lambda files, nbytes: forwarded.append((files, nbytes)))
+    memory[:] = [10 * MIB]
+    progress(1, 10)
+    # Too soon after the last check to look again
+    memory[:] = [500 * MIB]
+    progress(1, 20)
+    assert forwarded == [(1, 10), (1, 20)]
+
+    budget.interval = 0
+    with pytest.raises(MemoryLimitExceeded):
+        progress(1, 30)
+    assert forwarded == [(1, 10), (1, 20)]
+
+
+def test_workers_and_shares_fit_the_headroom(memory):
+    memory[:] = [100 * MIB]
+    budget = MemoryBudget(100 * MIB + 10 * WORKER_BASE)
+    assert budget.workers(4) == 4
+    assert budget.workers(64) == 10
+    assert budget.workers(8, MIN_APP_MEMORY) == 10 * WORKER_BASE // MIN_APP_MEMORY
+    assert budget.share(5) == 2 * WORKER_BASE
+    assert budget.share(100) == WORKER_BASE
+    assert budget.max_file_size(workers=2) == 10 * WORKER_BASE // (memory_budget.FILE_OVERHEAD * 2)
+
+    memory[:] = [900 * MIB]
+    # Over the limit still leaves one worker and a minimum share
+    assert budget.workers(16) == 1
+    assert budget.share(4) == WORKER_BASE
+    assert budget.max_file_size() == MIB
+    assert MemoryBudget(MIB).node_heap_mb() == 64
+    assert MemoryBudget(4096 * MIB).node_heap_mb() == 2048
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason="reads /proc on Linux")
+def test_private_memory_reads_this_process():
+    assert memory_budget.private_memory() > 0
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    source = tmp_path / 'source'
+    for index in range(20):
+        path = source / 'lib' / f'module{index}.js'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'module.exports = %d;\n' % index)
+    (source / 'package.json').write_bytes(b'{"name": "budget", "version": "1.0.0"}')
+    app = tmp_path / 'App'
+    app.mkdir()
+    pack_directory(str(source), str(app / 'app.asar'))
+    return app
+
+
+def run_extract(app_dir, tmp_path, capsys, limit_mb):
+    status = main(['--memory-limit', str(limit_mb), 'extract', str(app_dir), '-o', str(tmp_path / 'ws'),
+                   '-j', '1'])
+    result, = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return status, result
+
+
+def test_memory_limit_option(app_dir, tmp_path, capsys, memory):
+    memory[:] = [50 * MIB]
+    status, result = run_extract(app_dir, tmp_path, capsys, 512)
+    assert status == 0 and result['files'] == 21
+
+    memory[:] = [900 * MIB]
+    status, result = run_extract(app_dir, tmp_path, capsys, 512)
+    assert status == 1
+    assert result['status'] == 'error'
+    assert 'over the 512 MB memory limit' in result['error']
+
+
+def test_path_list_indexing_and_iteration(tmp_path):
+    root = str(tmp_path / 'out')
+    inside = [os.path.join(root, 'a.js'), os.path.join(root, 'lib', 'ü.js'), os.path.join(root, '')]
+    outside = str(tmp_path / 'elsewhere.js')
+    paths = PathList(root, inside)
+    paths.extend([outside, os.path.join(root, 'x\udcff.js')])
+
+    expected = inside[:2] + [root + os.sep, outside, os.path.join(root, 'x\udcff.js')]
+    assert len(paths) == 5
+    assert list(paths) == expected
+    assert [paths[index] for index in range(5)] == expected
+    assert paths[-1] == expected[-1] and paths[-5] == expected[0]
+    for index in (5, -6):
+        with pytest.raises(IndexError):
+            paths[index]
+    assert list(PathList(root)) == []
@@ -0,0 +1,67 @@
+import os
+import time
+import signal
+import threading
+
+import pytest
+
+from node_worker import NodeWorker, WorkerCrashed, WorkerError
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+@pytest.fixture
+def worker():
+    with NodeWorker.stub() as worker:
+        yield worker
+
+
+def test_pipelined_requests_share_one_process(worker):
+    pid = worker.call('ping', timeout=30)['pid']
+    futures = [worker.submit('echo', n=n) for n in range(200)]
+    assert [future.result(30)['n'] for future in futures] == list(range(200))
+    assert worker.call('ping', timeout=30)['pid'] == pid
+
+
+def test_map_keeps_order_and_yields_errors(worker):
+    results = list(worker.map('echo', [{'n': n} for n in range(50)], depth=8))
+    assert [params['n'] for params, _ in results] == list(range(50))
+    assert all(result['n'] == params['n'] for params, result in results)
+
+    (_, error), = worker.map('no-such-op', [{}])
+    assert isinstance(error, WorkerError)
+
+
+def test_restart_after_kill_mid_request(worker):
+    pid = worker.call('ping', timeout=30)['pid']
+    future = worker.submit('sleep', seconds=30)
+    os.kill(pid, signal.SIGTERM if os.name == 'nt' else signal.SIGKILL)
+    with pytest.raises(WorkerCrashed):
+        future.result(30)
+    assert worker.call('ping', timeout=30)['pid'] != pid
+
+
+def test_map_resubmits_requests_lost_to_a_crash(worker):
+    pid = worker.call('ping', timeout=30)['pid']
+    # Killed while the first request sleeps, with the rest queued behind it
+    killer = threading.Timer(0.3, os.kill, (pid, signal.SIGTERM if os.name == 'nt' else signal.SIGKILL))
+    killer.start()
+    results = list(worker.map('sleep', [{'n': n, 'seconds': 1 if n == 0 else 0} for n in range(5)]))
+    killer.join()
+    assert [(params['n'], result['n']) for params, result in results] == [(n, n) for n in range(5)]
+    assert worker.call('ping', timeout=30)['pid'] != pid
+
+
+def test_idle_timeout_stops_and_restarts_process():
+    with NodeWorker.stub(idle_timeout=0.3) as worker:
+        pid = worker.call('ping', timeout=30)['pid']
+        assert worker.pid == pid
+        assert wait_for(lambda: worker.pid is None)
+        assert worker.call('ping', timeout=30)['pid'] != pid
@@ -0,0 +1,55 @@
+import os
+
+from search_index import SearchIndex, trigrams, required_literals, TRIGRAM_CHUNK
+
+
+def reference_trigrams(data):
+    data = data.lower()
+    return sorted({a << 16 | b << 8 | c for a, b, c in zip(data, data[1:], data[2:])})
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def files_under(root):
+    return [os.path.join(base, name) for base, _, names in os.walk(root) for name in names]
+
+
+def test_trigrams_match_reference_across_chunks():
+    pattern = bytes(range(1, 256)) + b'Hello World '
+    for size in (0, 2, 3, 100, TRIGRAM_CHUNK + 2, TRIGRAM_CHUNK + 3, 3 * TRIGRAM_CHUNK + 7):
+        data = (pattern * (size // len(pattern) + 1))[:size]
+        assert list(trigrams(data)) == reference_trigrams(data)
+
+
+def test_index_and_query(tmp_path):
+    root = tmp_path / 'extracted_app'
+    write(str(root / 'main.js'), b"const { ipcMain } = require('electron');\nipcMain.handle('get-config', load);\n")
+    write(str(root / 'renderer' / 'app.js'), b"window.api.invoke('Get-Config');\n")
+    write(str(root / 'blob.bin'), b'\0\1\2get-config')
+    write(str(root / 'empty.js'), b'')
+
+    with SearchIndex(str(tmp_path / 'extracted_app.search.sqlite')) as index:
+        summary = index.update(str(root), files_under(str(root)))
+        assert summary == {'indexed': 4, 'unchanged': 0, 'removed': 0}
+
+        matches = list(index.search('get-config'))
+        assert [(m['path'], m['line'], m['column']) for m in matches] == [('main.js', 2, 17)]
+        assert [m['path'] for m in index.search('get-config', ignore_case=True)] == ['main.js', 'renderer/app.js']
+        assert [m['path'] for m in index.search(r"ipcMain\.handle\('([a-z-]+)'", regex=True)] == ['main.js']
+        assert list(index.search('not in any file')) == []
+
+        # Only changed files are re-read; removed files drop out of results
+        os.remove(str(root / 'main.js'))
+        write(str(root / 'renderer' / 'app.js'), b"ipcRenderer.send('get-config');\n")
+        summary = index.update(str(root), files_under(str(root)))
+        assert summary == {'indexed': 1, 'unchanged': 2, 'removed': 1}
+        assert [m['path'] for m in index.search('get-config')] == ['renderer/app.js']
+
+
+def test_required_literals():
+    assert required_literals(r"fetch\('https://api") == ["fetch('https://api"]
+    assert required_literals(r'(?:foo|bar)baz') == ['baz']
@@ -0,0 +1,96 @@
+import os
+import json
+
+import pytest
+
+from source_maps import (SourceMapError, decode_mappings, load_map, attribute_bytes, analyze_bundle,
+                         analyze_maps, find_map_pairs, UNMAPPED, EOLS)
+
+# Two generated lines: 'const a' from a.js and 'a=1;' from b.js, then two
+# bytes of indent nobody owns and 'foo();' from a.js again
+BUNDLE = b'const a=1;\n  foo();\n'
+MAP = {'version': 3, 'sources': ['a.js', 'b.js'], 'names': [], 'mappings': 'AAAA,MCAA;EDCA'}
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def write_pair(root, name, bundle=BUNDLE, source_map=MAP):
+    js_path = os.path.join(root, name)
+    write(js_path, bundle)
+    write(js_path + '.map', source_map if isinstance(source_map, bytes) else json.dumps(source_map).encode())
+    return js_path, js_path + '.map'
+
+
+def test_vlq_values():
+    # One field per segment, so each value lands in columns as a running sum
+    _, columns, sources = decode_mappings('A,C,D,gB,2H,3H')
+    assert list(columns) == [0, 1, 0, 16, 139, 16]
+    assert list(sources) == [-1] * 6
+
+
+def test_decode_tracks_lines_and_sources():
+    lines, columns, sources = decode_mappings('AAAA,CAAC;;ACAA,E')
+    assert list(lines) == [0, 0, 2, 2]
+    assert list(columns) == [0, 1, 0, 2]
+    assert list(sources) == [0, 0, 1, -1]
+
+    lines, columns, sources = decode_mappings('AAAA;ACAA', line_offset=3, column_offset=5, source_offset=10)
+    assert list(lines) == [3, 4] and list(columns) == [5, 0] and list(sources) == [10, 11]
+
+    with pytest.raises(SourceMapError):
+        decode_mappings('AA!A')
+
+
+def test_hand_built_map_known_sizes(tmp_path):
+    js_path, map_path = write_pair(str(tmp_path), 'bundle.js')
+    result = analyze_bundle(js_path, map_path)
+    assert result['sources'] == {'a.js': 12, 'b.js': 4}
+    assert (result['unmapped_bytes'], result['eol_bytes'], result['segments']) == (2, 2, 3)
+    assert result['mapped_bytes'] + result['unmapped_bytes'] + result['eol_bytes'] == len(BUNDLE)
+
+
+def test_columns_count_characters_not_bytes():
+    names = ['a.js', 'b.js']
+    lines, columns, sources = decode_mappings('AAAA,GCAA')
+    sizes, unmapped, eols = attribute_bytes("'é';".encode('utf-8'), names, lines, columns, sources)
+    assert sizes == {'a.js': 4, 'b.js': 1}
+    assert (unmapped, eols) == (0, 0)
+
+
+def test_index_map_sections(tmp_path):
+    index_map = {'version': 3, 'sections': [
+        {'offset': {'line': 0, 'column': 0}, 'map': MAP},
+        {'offset': {'line': 2, 'column': 4}, 'map': {'sources': ['c.js'], 'sourceRoot': 'src', 'mappings': 'AAAA'}},
+    ]}
+    bundle = BUNDLE + b'    bar();'
+    js_path, map_path = write_pair(str(tmp_path), 'index.js', bundle, index_map)
+
+    names, lines, columns, sources = load_map(map_path)
+    assert names == ['a.js', 'b.js', 'src/c.js']
+    assert list(lines)[-1] == 2 and list(columns)[-1] == 4 and list(sources)[-1] == 2
+    result = analyze_bundle(js_path, map_path)
+    assert result['sources'] == {'a.js': 12, 'b.js': 4, 'src/c.js': 6}
+    assert result['unmapped_bytes'] == 2 + 4
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_analyze_maps_keeps_going_past_bad_maps(tmp_path, jobs):
+    root = str(tmp_path)
+    pairs = [write_pair(root, 'good.js'), write_pair(os.path.join(root, 'lib'), 'also-good.js'),
+             write_pair(root, 'not-json.js', source_map=b'{"mappings": '),
+             write_pair(root, 'bad-vlq.js', source_map=dict(MAP, mappings='AA!A'))]
+    write(os.path.join(root, 'orphan.js.map'), json.dumps(MAP).encode())
+    assert sorted(find_map_pairs(root)) == sorted(pairs)
+
+    calls = []
+    report = analyze_maps(pairs, jobs=jobs, progress=lambda files, size: calls.append(size))
+    assert [bundle['bundle'] for bundle in report['bundles']] == sorted([pairs[0][0], pairs[1][0]])
+    assert sorted(error['bundle'] for error in report['errors']) == sorted([pairs[2][0], pairs[3][0]])
+    assert all(error['error'] for error in report['errors'])
+    assert report['sources'] == {'a.js': 24, 'b.js': 8, UNMAPPED: 4, EOLS: 4}
+    assert report['total_bytes'] == 2 * len(BUNDLE)
+    assert len(calls) == 4 and sum(calls) == 2 * len(BUNDLE)
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import shutil
+
+# Where Node.js installs itself when it isn't on PATH
+FALLBACK_DIRS = [
+    r"C:\Program Files\nodejs",
+    r"C:\Program Files (x86)\nodejs",
+    os.path.expandvars(r"%APPDATA%\npm"),
+    os.path.expandvars(r"%ProgramFiles%\nodejs"),
+    os.path.expandvars(r"%ProgramFiles(x86)%\nodejs"),
+    '/usr/local/bin',
+    '/opt/homebrew/bin'
+]
+
+
+def default_cache_path():
+    """Per-user location of the toolchain cache"""
+    base = (os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'electron-decompiler', 'toolchain.json')
+
+
+def _registry_dir():
+    """Node.js install directory recorded in the Windows registry, or None"""
+    if sys.platform != 'win32':
+        return None
+    import winreg
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Node.js", 0,
+                            winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
+            return winreg.QueryValueEx(key, "InstallPath")[0]
+    except OSError:
+        return None
+
+
+def _executable_names(tool):
+    if sys.platform == 'win32':
+        return [tool + '.cmd', tool + '.exe']
+    return [tool]
+
+
+class Toolchain:
+    """Finds external tools such as npm the first time they are needed
+
+    PATH is searched in-process with shutil.which, then the registry and
+    the usual install folders. Resolved paths and versions are kept in a
+    small JSON file and trusted for as long as the tool's size and mtime
+    are unchanged, so later runs don't search or spawn anything. Tools
+    that aren't found are not cached, so installing one takes effect on
+    the next run.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or default_cache_path()
+        self._tools = None
+
+    def _load(self):
+        if self._tools is None:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self._tools = json.load(f)
+            except (OSError, ValueError):
+                self._tools = {}
+        return self._tools
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._tools, f, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            # A read-only profile only costs the next run a fresh search
+            pass
+
+    def _cached(self, tool):
+        """The cache record for tool if the file it names is unchanged"""
+        record = self._load().get(tool)
+        if not record:
+            return None
+        try:
+            st = os.stat(record['path'])
+        except (OSError, KeyError):
+            return None
+        if st.st_size != record.get('size') or st.st_mtime_ns != record.get('mtime_ns'):
+            return None
+        return record
+
+    @staticmethod
+    def search(tool):
+        """Look for tool on PATH, then in the registry's and the usual install folders"""
+        found = shutil.which(tool)
+        if found:
+            return os.path.abspath(found)
+        folders = [_registry_dir()] + FALLBACK_DIRS
+        for folder in folders:
+            if not folder:
+                continue
+            for name in _executable_names(tool):
+                path = os.path.join(folder, name)
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def find(self, tool):
+        """Full path of tool, or None if it isn't installed"""
+        record = self._cached(tool)
+        if record:
+            return record['path']
+        path = self.search(tool)
+        if path:
+            st = os.stat(path)
+            self._load()[tool] = {'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            self._save()
+        return path
+
+    def version(self, tool):
+        """Version string the tool reports for --version, or None"""
+        path = self.find(tool)
+        if not path:
+            return None
+        record = self._tools[tool]
+        if 'version' not in record:
+            import subprocess
+            try:
+                result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=30,
+                                        shell=path.lower().endswith('.cmd'))
+            except (OSError, subprocess.SubprocessError):
+                return None
+            if result.returncode != 0:
+                return None
+            record['version'] = result.stdout.strip()
+            self._save()
+        return record['version']
+
+    def forget(self, tool=None):
+        """Drop cached records so the next lookup searches again"""
+        tools = self._load()
+        if tool:
+            tools.pop(tool, None)
+        else:
+            tools.clear()
+        self._save()
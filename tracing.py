@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import threading
+import contextlib
+
+# Span categories whose wall time counts as time spent in child processes
+SUBPROCESS = 'subprocess'
+
+
+def io_counters():
+    """(bytes read, bytes written) through system calls so far, or None where unknown
+
+    Linux only; reads served from a memory map don't count as reads.
+    """
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _child_cpu():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Span:
+    """Counters for one open span"""
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.files = 0
+        self.bytes = 0
+        self.subprocess_seconds = 0.0
+
+
+class Tracer:
+    """Records nested spans of pipeline work with their cost
+
+    Each span records wall time, CPU time of this process and of finished
+    child processes, bytes read and written, and the files and bytes
+    reported through progress while it was open. Spans nest per thread.
+    The events export as Chrome trace-event JSON (chrome://tracing or
+    Perfetto) and as a flat summary per span name.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def active(self):
+        """Whether a span is open on the calling thread"""
+        return bool(self._stack())
+
+    @contextlib.contextmanager
+    def span(self, name, category='phase', **args):
+        """Record the enclosed block as one span"""
+        stack = self._stack()
+        span = Span(name, category, args)
+        io_start = io_counters()
+        cpu_start = time.process_time()
+        child_start = _child_cpu()
+        start = time.time()
+        wall_start = time.perf_counter()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.args['error'] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            wall = time.perf_counter() - wall_start
+            io_end = io_counters()
+            if category == SUBPROCESS:
+                span.subprocess_seconds = wall
+                for parent in stack:
+                    parent.subprocess_seconds += wall
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round(start * 1e6),
+                'dur': round(wall * 1e6),
+                'pid': self.pid,
+                'tid': threading.get_ident(),
+                'args': dict(span.args,
+                             cpu_seconds=round(time.process_time() - cpu_start, 6),
+                             child_cpu_seconds=round(_child_cpu() - child_start, 6),
+                             subprocess_seconds=round(span.subprocess_seconds, 6),
+                             files=span.files,
+                             bytes=span.bytes)
+            }
+            if io_start and io_end:
+                event['args'].update(bytes_read=io_end[0] - io_start[0], bytes_written=io_end[1] - io_start[1])
+            with self._lock:
+                self.events.append(event)
+
+    def count(self, files=0, nbytes=0):
+        """Add finished work to every span open on the calling thread"""
+        for span in self._stack():
+            span.files += files
+            span.bytes += nbytes
+
+    def progress(self, forward=None):
+        """A progress(files, bytes) callback that counts into open spans, then calls forward"""
+        def progress(files=0, nbytes=0):
+            self.count(files, nbytes)
+            if forward:
+                forward(files, nbytes)
+        return progress
+
+    def merge(self, events):
+        """Add events recorded by another tracer, e.g. in a worker process"""
+        with self._lock:
+            self.events.extend(events)
+
+    def chrome_trace(self):
+        """The events as a Chrome trace-event document"""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def summary(self):
+        """Totals per span name: count, seconds, CPU, subprocess time, files and bytes"""
+        totals = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            args = event['args']
+            total = totals.setdefault(event['name'], {
+                'category': event['cat'],
+                'count': 0,
+                'seconds': 0.0,
+                'cpu_seconds': 0.0,
+                'child_cpu_seconds': 0.0,
+                'subprocess_seconds': 0.0,
+                'files': 0,
+                'bytes': 0,
+                'bytes_read': 0,
+                'bytes_written': 0,
+                'errors': 0
+            })
+            total['count'] += 1
+            total['seconds'] += event['dur'] / 1e6
+            for key in ('cpu_seconds', 'child_cpu_seconds', 'subprocess_seconds', 'files', 'bytes',
+                        'bytes_read', 'bytes_written'):
+                total[key] += args.get(key, 0)
+            if 'error' in args:
+                total['errors'] += 1
+        for total in totals.values():
+            for key in ('seconds', 'cpu_seconds', 'child_cpu_seconds', 'subprocess_seconds'):
+                total[key] = round(total[key], 6)
+        return totals
+
+    def save(self, trace_path=None, metrics_path=None):
+        """Write the Chrome trace and/or the summary as JSON files"""
+        if trace_path:
+            with open(trace_path, 'w', encoding='utf-8') as f:
+                json.dump(self.chrome_trace(), f)
+        if metrics_path:
+            with open(metrics_path, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, indent=2)